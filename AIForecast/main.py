@@ -1,12 +1,21 @@
 # This is the main file
 from AIForecast import utils
+from AIForecast.sysutils.logconfig import configure_logging
+import os
 import tkinter as tk
 
 from AIForecast.ui.widgets import AppWindow, Menus
 from AIForecast.ui.menus import MainMenu, TestMenu, TrainMenu, ClimateChangeMenu
 
 
+LOG_LEVEL_VARIABLE = 'AIFORECAST_LOG_LEVEL'
+"""
+Environment variable that sets the lowest level the application logs, such as DEBUG. Defaults to INFO.
+"""
+
+
 def main():
+    configure_logging(os.environ.get(LOG_LEVEL_VARIABLE, 'INFO').upper())
     utils.log(__name__).debug('Starting AI-Weather Forecast!')
 
     root = tk.Tk()
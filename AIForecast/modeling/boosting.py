@@ -0,0 +1,301 @@
+"""
+| Gradient boosted trees as an alternative to the Keras models. The input windows of SupervisedTimeseriesTransformer
+  are flattened into one row of lag features per window, and an XGBoost model with the 'hist' tree method is trained
+  for every forecast step and output feature on all CPU cores. On small data, such as the monthly MLO series, they
+  train in seconds where the LSTM schema takes minutes.
+|
+| BoostedForecastTrainer reports and predicts like ForecastModelTrainer, so the evaluation reports, metrics, and
+  ModelEvaluationReporter work the same for both. It is picked by a schema with "trainer": "xgboost", whose "params"
+  are XGBoost parameters, such as AIClimateChange/models/schema/xgboost.json.
+|
+| Compare with the Keras trainer with: python -m benchmarks.bench_boosting
+"""
+import base64
+import json
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from AIForecast import sysutils
+from AIForecast.modeling.checkpoints import TrainingState
+from AIForecast.modeling.dataprocessing import DTYPE, SampleSet, SplitFit, TimeseriesData, forecast_metrics, \
+    summarize_evaluation
+
+XGBOOST_TRAINER = 'xgboost'
+BOOSTED_EXTENSION = '.xgb'
+DEFAULT_PARAMS = {
+    'tree_method': 'hist',
+    'objective': 'reg:squarederror',
+    'eval_metric': 'mae',
+    'eta': 0.1,
+    'max_depth': 6,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8
+}
+"""
+XGBoost parameters of every model, which the parameters of a schema are laid over.
+"""
+DEFAULT_ROUNDS = 500
+DEFAULT_EARLY_STOPPING = 20
+"""
+Rounds without improvement on the validation set after which a model stops adding trees.
+"""
+
+
+def flatten_windows(windows: np.ndarray) -> np.ndarray:
+    """
+    :param windows: Input windows shaped (windows, steps, features).
+    :return: Returns one row per window, with feature f of step s in column s * features + f.
+    """
+    windows = np.asarray(windows, dtype=DTYPE)
+    return windows.reshape(len(windows), -1)
+
+
+class BoostedForecastModel:
+    """
+    | The XGBoost models of every forecast step and output feature, predicting like a Keras model trained on the same
+      windows.
+    """
+
+    def __init__(self, boosters: List[xgb.Booster], input_shape: Tuple[int, int], out_cols: List[str], num_steps: int):
+        """
+        :param boosters: One model per step and feature, in the order of the labels flattened to (steps, features).
+        :param input_shape: The (steps, features) of an input window.
+        :param out_cols: The names of the output features.
+        :param num_steps: The number of steps the model forecasts.
+        """
+        self.boosters: List[xgb.Booster] = boosters
+        self.input_shape: Tuple[None, int, int] = (None, *input_shape)
+        self.out_cols: List[str] = list(out_cols)
+        self.num_steps: int = num_steps
+
+    def predict(self, x: np.ndarray, batch_size: int = None, verbose: int = 0) -> np.ndarray:
+        """
+        | Takes the arguments of Keras' Model.predict, so it can stand in for a Keras model. The batch size and
+          verbosity are ignored.
+        :param x: Input windows shaped (windows, steps, features), or a single window.
+        :return: Returns the forecasts shaped (windows, features) for a single step, or (windows, steps, features).
+        """
+        x = np.asarray(x, dtype=DTYPE)
+        if x.ndim == len(self.input_shape) - 1:
+            x = x[np.newaxis]
+        matrix = xgb.DMatrix(flatten_windows(x))
+        predictions = np.column_stack([booster.predict(matrix) for booster in self.boosters]).astype(DTYPE)
+        if self.num_steps == 1:
+            return predictions
+        return predictions.reshape(len(x), self.num_steps, len(self.out_cols))
+
+    def save(self, path: str):
+        models = [base64.b64encode(bytes(booster.save_raw())).decode('ascii') for booster in self.boosters]
+        content = {
+            'trainer': XGBOOST_TRAINER,
+            'input_shape': list(self.input_shape[1:]),
+            'out_cols': self.out_cols,
+            'num_steps': self.num_steps,
+            'boosters': models
+        }
+        # Written to a temporary file first, so an interrupted write never leaves a truncated model behind.
+        with open(path + '.tmp', 'w') as f:
+            json.dump(content, f)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def load(path: str) -> 'BoostedForecastModel':
+        with open(path, 'r') as f:
+            content = json.load(f)
+        boosters = []
+        for model in content['boosters']:
+            booster = xgb.Booster()
+            booster.load_model(bytearray(base64.b64decode(model)))
+            boosters.append(booster)
+        return BoostedForecastModel(boosters, tuple(content['input_shape']), content['out_cols'],
+                                    content['num_steps'])
+
+
+class BoostedForecaster:
+    """
+    | Forecasts with saved boosted models. Has the same interface as ModelForecaster.
+    """
+
+    def __init__(self, model_path: str, test_csv: str = None):
+        """
+        :param model_path: Path to a saved .xgb model.
+        :param test_csv: default = None<br/>
+                         Path to the saved input windows to forecast from.
+        """
+        self.model: BoostedForecastModel = BoostedForecastModel.load(model_path)
+        self.test_np = None if test_csv is None else np.load(test_csv).astype(DTYPE, copy=False)
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """
+        :param x: A batch of input windows, or a single window.
+        :return: Returns the forecasts shaped (windows, steps, features).
+        """
+        x = np.asarray(x, dtype=DTYPE)
+        if x.ndim == len(self.model.input_shape) - 1:
+            x = x[np.newaxis]
+        return self.model.predict(x).reshape(len(x), self.model.num_steps, len(self.model.out_cols))
+
+    def forecast(self, time_horizon: int, windows: np.ndarray = None) -> pd.DataFrame:
+        """
+        | Forecasts the steps that follow the last input window. The models forecast a fixed number of steps, so at
+          most that many steps are forecast.
+        :param time_horizon: The number of steps to forecast.
+        :param windows: default = None<br/>
+                        Input windows, the last of which is forecast from. Defaults to the test windows.
+        :return: Returns the forecast of every output feature, indexed by the step counted from 1.
+        """
+        windows = self.test_np if windows is None else windows
+        if windows is None:
+            raise ValueError('No input windows to forecast from were given.')
+        if time_horizon > self.model.num_steps:
+            sysutils.log(__name__).warning('The models forecast %d steps, so only %d of %d steps are forecast',
+                                           self.model.num_steps, self.model.num_steps, time_horizon)
+        steps = self.predict(np.asarray(windows)[-1])[0][:time_horizon]
+        return pd.DataFrame(steps, index=pd.RangeIndex(1, len(steps) + 1, name='step'), columns=self.model.out_cols)
+
+
+class BoostedForecastTrainer:
+    def __init__(self,
+                 params: Dict[str, Any] = None,
+                 num_boost_round: int = DEFAULT_ROUNDS,
+                 early_stopping_rounds: int = DEFAULT_EARLY_STOPPING,
+                 n_jobs: int = None):
+        """
+        | Trains new XGBoost models on every split, so each split is evaluated by models that were only trained on the
+          data up to its own training cutoff. Every step and feature of the forecast has its own model. The models of
+          a split share one DMatrix, so the features are only binned for the 'hist' method once per split.
+        :param params: default = None<br/>
+                       XGBoost parameters laid over DEFAULT_PARAMS.
+        :param num_boost_round: The most trees a model is trained with.
+        :param early_stopping_rounds: The rounds without improvement on the validation set after which a model stops.
+                                      Splits without a validation set train every round.
+        :param n_jobs: default = None<br/>
+                       The threads XGBoost trains on. Defaults to every CPU core.
+        """
+        self.params: Dict[str, Any] = {**DEFAULT_PARAMS, **(params or {})}
+        self.params['nthread'] = (os.cpu_count() or 1) if n_jobs is None else n_jobs
+        self.num_boost_round: int = num_boost_round
+        self.early_stopping_rounds: int = early_stopping_rounds
+        self.state: TrainingState = TrainingState()
+        self.model: BoostedForecastModel = None
+        self.train_evaluation: pd.DataFrame = None
+        self.test_evaluation: pd.DataFrame = None
+        self.predictions: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.split_fits: List[SplitFit] = []
+
+    @staticmethod
+    def from_schema(schema_path: str) -> 'BoostedForecastTrainer':
+        """
+        :param schema_path: A JSON schema with "trainer": "xgboost". Its optional "params", "num_boost_round", and
+                            "early_stopping_rounds" are passed to the trainer.
+        :raises ValueError: raised if the schema is not an XGBoost schema.
+        """
+        with open(schema_path, 'r') as f:
+            schema = json.load(f)
+        if not isinstance(schema, dict) or schema.get('trainer') != XGBOOST_TRAINER:
+            raise ValueError(f"'{schema_path}' is not an {XGBOOST_TRAINER} schema.")
+        return BoostedForecastTrainer(schema.get('params'),
+                                      schema.get('num_boost_round', DEFAULT_ROUNDS),
+                                      schema.get('early_stopping_rounds', DEFAULT_EARLY_STOPPING))
+
+    def __call__(self,
+                 sample_set: List[TimeseriesData],
+                 epochs: int = None,
+                 learning_rate: float = None,
+                 callbacks: list = None) -> Tuple[BoostedForecastModel, pd.DataFrame, str]:
+        """
+        | Takes the arguments of ForecastModelTrainer, so Pipeline.train runs either trainer. The number of trees and
+          the learning rate are set by the trainer's parameters instead, and Keras callbacks do not apply to trees, so
+          **epochs**, **learning_rate**, and **callbacks** are ignored.
+        :return: Returns the models of the last split, the mean training and validation loss of its models per round,
+                 and the evaluation report.
+        """
+        history = None
+        train_evaluations, test_evaluations = [], []
+        self.predictions, self.split_fits = [], []
+        for split, samples in enumerate(sample_set):
+            start = time.perf_counter()
+            self.model, history, rounds = self.__fit(samples)
+            seconds = time.perf_counter() - start
+            windows = len(samples.training_samples.samples)
+            self.split_fits.append(SplitFit(False, seconds, windows * rounds, windows * self.num_boost_round, rounds,
+                                            self.num_boost_round))
+            self.state = TrainingState(rounds, split)
+            train_pred = self.__predict(samples.training_samples)
+            test_pred = self.__predict(samples.test_samples)
+            self.predictions.append((train_pred, test_pred))
+            train_evaluations.append((split, forecast_metrics(samples.training_samples.labels, train_pred,
+                                                              samples.out_cols, samples.num_steps)))
+            if len(test_pred) > 0:
+                test_evaluations.append((split, forecast_metrics(samples.test_samples.labels, test_pred,
+                                                                 samples.out_cols, samples.num_steps)))
+        self.state.complete = True
+
+        self.train_evaluation = pd.concat(dict(train_evaluations), names=['split'])
+        report = 'Training Evaluation:\n' + summarize_evaluation(self.train_evaluation)
+        if len(test_evaluations) > 0:
+            self.test_evaluation = pd.concat(dict(test_evaluations), names=['split'])
+            report += '\n\nTesting Evaluation:\n' + summarize_evaluation(self.test_evaluation)
+        report += '\n\n' + self.boosting_summary()
+        return self.model, history, report
+
+    def boosting_summary(self) -> str:
+        """
+        | Lists the time every split was trained in and the mean number of trees of its models.
+        """
+        lines = [f'  split {split}: {fit.epochs} of {fit.max_epochs} rounds in {fit.seconds:.2f}s'
+                 for split, fit in enumerate(self.split_fits)]
+        return f'Gradient Boosting: {self.params["tree_method"]} trees on {self.params["nthread"]} threads, ' \
+               f'{sum(fit.seconds for fit in self.split_fits):.2f}s.\n' + '\n'.join(lines)
+
+    def __fit(self, samples: TimeseriesData) -> Tuple[BoostedForecastModel, pd.DataFrame, int]:
+        """
+        :return: Returns the models of a split, their mean loss per round, and their mean number of rounds.
+        """
+        training, validation = samples.training_samples, samples.validation_samples
+        x, y = flatten_windows(training.samples), training.labels.reshape(len(training.samples), -1)
+        train_matrix = xgb.DMatrix(x, nthread=self.params['nthread'])
+        evals = [(train_matrix, 'train')]
+        y_val = None
+        if len(validation.samples) > 0:
+            y_val = validation.labels.reshape(len(validation.samples), -1)
+            val_matrix = xgb.DMatrix(flatten_windows(validation.samples), nthread=self.params['nthread'])
+            evals.append((val_matrix, 'validation'))
+        boosters, rounds, losses, val_losses = [], [], [], []
+        for target in range(y.shape[1]):
+            train_matrix.set_label(y[:, target])
+            if y_val is not None:
+                val_matrix.set_label(y_val[:, target])
+            result = {}
+            booster = xgb.train(self.params, train_matrix, self.num_boost_round, evals=evals,
+                                early_stopping_rounds=self.early_stopping_rounds if y_val is not None else None,
+                                evals_result=result, verbose_eval=False)
+            best_rounds = self.num_boost_round
+            if y_val is not None:
+                # Read before slicing, since the sliced booster does not keep the attributes of early stopping.
+                best_rounds = booster.best_iteration + 1
+                # Only the trees up to the best round are kept, as EarlyStopping restores the best weights.
+                booster = booster[:best_rounds]
+            boosters.append(booster)
+            rounds.append(best_rounds)
+            # The last evaluation metric is the one early stopping monitors.
+            losses.append(pd.Series(list(result['train'].values())[-1]))
+            if y_val is not None:
+                val_losses.append(pd.Series(list(result['validation'].values())[-1]))
+        history = pd.DataFrame({'loss': pd.concat(losses, axis=1).mean(axis=1)})
+        if len(val_losses) > 0:
+            history['val_loss'] = pd.concat(val_losses, axis=1).mean(axis=1)
+        mean_rounds = int(round(np.mean(rounds)))
+        sysutils.log(__name__).debug('Trained %d boosted models with %d rounds on average', len(boosters), mean_rounds)
+        model = BoostedForecastModel(boosters, training.samples.shape[1:], samples.out_cols, samples.num_steps)
+        return model, history, mean_rounds
+
+    def __predict(self, sample_set: SampleSet) -> np.ndarray:
+        if len(sample_set.samples) == 0:
+            return np.array([])
+        return self.model.predict(sample_set.samples)
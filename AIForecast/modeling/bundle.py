@@ -0,0 +1,299 @@
+"""
+| A single file that holds everything needed to forecast with a trained model: its architecture, its weights, the
+  normalization statistics of every feature, its input and output columns, and the window parameters it was trained
+  with. A forecaster loaded from a bundle takes raw data and returns forecasts in the scale of the data.
+|
+| **Layout:**
+| - 8 bytes, the magic number b'AIFBNDL' followed by the format version.
+| - 8 bytes, the length of the header as a little endian unsigned integer.
+| - The header, as UTF-8 JSON. It holds the architecture as Keras model JSON, the scaler, the transformer, the
+  feature generator if the model was trained on derived features, optional metadata, and the dtype, shape, and
+  offset of every weight.
+| - The weights, as raw little endian arrays. Every array starts at a multiple of ALIGNMENT bytes from the start of the
+  file, so the weights are read through a memory map as NumPy views without parsing or copying the file.
+|
+| Bundle with: python -m AIForecast.modeling.bundle <model.h5> [--output model.aifb]. The scaler and the training
+  state saved next to the model are bundled with it.
+"""
+import argparse
+import json
+import os
+import struct
+from os import path as filesys
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from AIForecast import sysutils
+from AIForecast.modeling.checkpoints import TrainingState, state_path
+from AIForecast.modeling.dataprocessing import DTYPE, FeatureGenerator, FeatureScaler, compile_inference
+
+BUNDLE_EXTENSION = '.aifb'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+"""
+Byte alignment of every weight array in a bundle, which covers the alignment of every NumPy dtype and SIMD load.
+"""
+_MAGIC = b'AIFBNDL'
+_PREAMBLE = struct.Struct('<7sBQ')
+
+
+def bundle_path(model_path: str) -> str:
+    """
+    :return: Returns the path a saved model is bundled to, <model>.aifb.
+    """
+    return filesys.splitext(model_path)[0] + BUNDLE_EXTENSION
+
+
+def save_bundle(model: tf.keras.Model,
+                path: str,
+                scaler: FeatureScaler,
+                transformer: Dict[str, Any],
+                metadata: Dict[str, Any] = None,
+                features: Dict[str, Any] = None) -> str:
+    """
+    | Writes a model and what it needs to forecast from raw data to a bundle.
+    :param model: The trained model.
+    :param path: The path the bundle is written to.
+    :param scaler: The normalization the model was trained with.
+    :param transformer: The arguments of the SupervisedTimeseriesTransformer the model's windows were made with.
+    :param metadata: default = None<br/>
+                     JSON serializable information stored with the bundle, such as the data it was trained on.
+    :param features: default = None<br/>
+                     The arguments of the FeatureGenerator the model's derived input columns were made with, which is
+                     applied to raw data before it is made into windows.
+    :return: Returns the path of the bundle.
+    """
+    weights = [np.ascontiguousarray(w, dtype=w.dtype.newbyteorder('<')) for w in model.get_weights()]
+    layout, offset = [], 0
+    for variable, array in zip(model.weights, weights):
+        layout.append({'name': variable.name, 'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+        offset = _align(offset + array.nbytes)
+    header = {
+        'architecture': json.loads(model.to_json()),
+        'scaler': scaler.to_dict(),
+        'transformer': transformer,
+        'features': features,
+        'metadata': metadata or {},
+        'weights': layout
+    }
+    encoded = json.dumps(header).encode('utf-8')
+    data_start = _align(_PREAMBLE.size + len(encoded))
+    # Written to a temporary file first, so an interrupted write never leaves a truncated bundle behind.
+    with open(path + '.tmp', 'wb') as f:
+        f.write(_PREAMBLE.pack(_MAGIC, FORMAT_VERSION, len(encoded)))
+        f.write(encoded)
+        for entry, array in zip(layout, weights):
+            f.seek(data_start + entry['offset'])
+            f.write(array.tobytes())
+    os.replace(path + '.tmp', path)
+    sysutils.log(__name__).info('Bundled a model with %d weights to %s', len(weights), path)
+    return path
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """
+    :return: Returns the header of a bundle, without reading its weights. The offsets of the weights are made relative
+             to the start of the file.
+    :raises ValueError: raised if the file is not a bundle, or a bundle of a newer format.
+    """
+    with open(path, 'rb') as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size or preamble[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"'{path}' is not a model bundle.")
+        _, version, length = _PREAMBLE.unpack(preamble)
+        if version > FORMAT_VERSION:
+            raise ValueError(f"'{path}' is a version {version} bundle, only versions up to {FORMAT_VERSION} are read.")
+        header = json.loads(f.read(length).decode('utf-8'))
+    data_start = _align(_PREAMBLE.size + length)
+    for entry in header['weights']:
+        entry['offset'] += data_start
+    return header
+
+
+def read_weights(path: str, header: Dict[str, Any] = None) -> List[np.ndarray]:
+    """
+    :param path: The path of the bundle.
+    :param header: default = None<br/>
+                   The bundle's header from read_header, which is read if not given.
+    :return: Returns the weights of a bundle as read only views of a memory map of the file, which are paged in from
+             the disk as they are used.
+    """
+    header = read_header(path) if header is None else header
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    weights = []
+    for entry in header['weights']:
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        raw = mapped[entry['offset']:entry['offset'] + count * dtype.itemsize]
+        weights.append(raw.view(dtype).reshape(entry['shape']))
+    return weights
+
+
+class ModelBundle:
+    """
+    A model loaded from a bundle, with its normalization and window parameters.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: The path of the bundle.
+        """
+        header = read_header(path)
+        self.path: str = path
+        self.model: tf.keras.Model = tf.keras.models.model_from_json(json.dumps(header['architecture']))
+        self.model.set_weights(read_weights(path, header))
+        self.scaler: FeatureScaler = FeatureScaler.from_dict(header['scaler'])
+        self.metadata: Dict[str, Any] = header['metadata']
+        # Bundles written before feature generation have no features.
+        self.features: Dict[str, Any] = header.get('features')
+        self.generator: FeatureGenerator = None if self.features is None else FeatureGenerator(**self.features)
+        transformer = header['transformer']
+        self.input_columns: List[str] = list(transformer['input_columns'])
+        self.output_columns: List[str] = list(transformer['output_columns'])
+        self.input_width: int = transformer['input_width']
+        self.output_width: int = transformer['output_width']
+        self.stride: int = transformer['stride']
+        self.label_offset: int = transformer['label_offset']
+
+    def raw_columns(self) -> List[str]:
+        """
+        :return: Returns the columns of the raw data the model's input columns are taken or derived from.
+        """
+        if self.generator is None:
+            return list(self.input_columns)
+        derived = set(self.generator.feature_names())
+        raw = [col for col in self.input_columns if col not in derived]
+        return raw + [col for col in self.generator.columns if col not in raw]
+
+    def transformer(self) -> Dict[str, Any]:
+        """
+        :return: Returns the arguments of the SupervisedTimeseriesTransformer the model's windows were made with.
+        """
+        return {
+            'input_columns': self.input_columns,
+            'output_columns': self.output_columns,
+            'input_width': self.input_width,
+            'output_width': self.output_width,
+            'stride': self.stride,
+            'label_offset': self.label_offset
+        }
+
+
+class BundleForecaster:
+    """
+    | Forecasts from raw data with a bundled model. Inputs are normalized and forecasts reverted to the scale of the
+      data with the bundle's scaler. Has the same interface as ModelForecaster.
+    """
+
+    def __init__(self, model_path: str, test_csv: str = None, jit_compile: bool = False):
+        """
+        :param model_path: Path to a model bundle.
+        :param test_csv: default = None<br/>
+                         Path to raw data to forecast from: a CSV file with the model's input columns, or saved raw
+                         input windows as a .npy file.
+        :param jit_compile: If True, the forward pass is compiled with XLA.
+        """
+        self.bundle: ModelBundle = ModelBundle(model_path)
+        self.test_data = None
+        if test_csv is not None:
+            self.test_data = np.load(test_csv) if test_csv.endswith('.npy') else pd.read_csv(test_csv)
+        self.__predict = compile_inference(self.bundle.model, jit_compile)
+
+    def windows(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        :param data: Raw data with the model's raw columns, in time order.
+        :return: Returns the raw input windows of the data, stepped by the bundle's stride, as the transformer makes
+                 them. The features of a model trained on derived features are derived first, which drops the first
+                 rows that the features look back over.
+        """
+        if self.bundle.generator is not None:
+            data = self.bundle.generator(data)
+        values = np.ascontiguousarray(data[self.bundle.input_columns].to_numpy(dtype=DTYPE))
+        width = self.bundle.input_width
+        if len(values) < width:
+            raise ValueError(f'{width} rows are needed to make an input window, the data has {len(values)}.')
+        count = (len(values) - width) // self.bundle.stride + 1
+        rows, cols = values.strides
+        return np.lib.stride_tricks.as_strided(values, (count, width, values.shape[1]),
+                                               (rows * self.bundle.stride, rows, cols), writeable=False)
+
+    def predict(self, x) -> np.ndarray:
+        """
+        :param x: Raw input windows, a single raw window, or raw data as a data frame, which is made into windows.
+        :return: Returns the forecasts in the scale of the data, shaped (windows, output width, output columns).
+        """
+        x = self.windows(x) if isinstance(x, pd.DataFrame) else np.asarray(x, dtype=DTYPE)
+        if x.ndim == 2:
+            x = x[np.newaxis]
+        predictions = self.__predict(self.bundle.scaler.scale_inputs(x))
+        predictions = self.bundle.scaler.unscale_outputs(predictions)
+        return predictions.reshape(len(x), self.bundle.output_width, len(self.bundle.output_columns))
+
+    def forecast(self, time_horizon: int, data=None) -> pd.DataFrame:
+        """
+        | Forecasts the steps that follow the last input window of the data. Models whose outputs are the steps right
+          after their inputs and cover every raw column forecast any horizon, by appending their forecasts to the data
+          and forecasting again. Other models forecast their output width at most.
+        :param time_horizon: The number of steps to forecast.
+        :param data: default = None<br/>
+                     Raw data as a data frame or input windows. Defaults to the test data.
+        :return: Returns the forecast of every output column, indexed by the number of steps after the last input.
+        """
+        bundle = self.bundle
+        data = self.test_data if data is None else data
+        if data is None:
+            raise ValueError('No data to forecast from was given.')
+        first_step = bundle.label_offset - bundle.input_width + 1
+        if isinstance(data, pd.DataFrame):
+            columns = bundle.raw_columns()
+            history = data[columns].to_numpy(dtype=DTYPE)
+        else:
+            # Windows hold the derived features, which cannot be derived again from forecasts.
+            columns = bundle.input_columns if bundle.generator is None else []
+            history = np.asarray(data, dtype=DTYPE).reshape(-1, bundle.input_width, len(bundle.input_columns))[-1]
+        recursive = first_step == 1 and len(columns) > 0 and set(columns) <= set(bundle.output_columns)
+        if not recursive and time_horizon > bundle.output_width:
+            sysutils.log(__name__).warning('The model forecasts %d steps and cannot forecast from its own forecasts, '
+                                           'so only %d of %d steps are forecast', bundle.output_width,
+                                           bundle.output_width, time_horizon)
+            time_horizon = bundle.output_width
+        # The rows the last window is made from, including the rows its features look back over.
+        needed = bundle.input_width + (0 if bundle.generator is None else bundle.generator.lookback)
+        outputs = [bundle.output_columns.index(col) for col in columns] if recursive else []
+        forecasts = []
+        while sum(len(f) for f in forecasts) < time_horizon:
+            if isinstance(data, pd.DataFrame):
+                last = self.windows(pd.DataFrame(history[-needed:], columns=columns))[-1]
+            else:
+                last = history
+            forecast = self.predict(last)[0]
+            forecasts.append(forecast)
+            if recursive:
+                history = np.concatenate([history, forecast[:, outputs]])
+        steps = np.concatenate(forecasts)[:time_horizon]
+        index = pd.RangeIndex(first_step, first_step + len(steps), name='step')
+        return pd.DataFrame(steps, index=index, columns=bundle.output_columns)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bundles a saved model with its scaler and window parameters.')
+    parser.add_argument('model_path')
+    parser.add_argument('--output', default=None, help='Defaults to the model path with the .aifb extension.')
+    args = parser.parse_args()
+    stem = filesys.splitext(args.model_path)[0]
+    model = tf.keras.models.load_model(args.model_path, compile=False)
+    scaler = FeatureScaler.load(stem + '_scaler.json')
+    state = TrainingState.load(state_path(args.model_path))
+    print(save_bundle(model, args.output or bundle_path(args.model_path), scaler, state.transformer,
+                      {'epochs': state.epoch, 'training_cutoff': state.to_dict()['training_cutoff']}, state.features))
+
+
+if __name__ == '__main__':
+    main()
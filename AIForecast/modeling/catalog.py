@@ -0,0 +1,426 @@
+"""
+| An SQLite index of trained models, so models can be looked up by their features, window parameters, and metrics
+  without listing directories or reading their report files.
+|
+| A model is recorded when it is saved, with the hash of its schema, the fingerprint of the data it was trained on, its
+  window parameters, its metrics, and the paths of its side files. rescan indexes models that were saved or changed
+  outside the application. It lists directories with os.scandir and only reads the side files of models whose files
+  changed since the last scan.
+|
+| The catalog is kept in FolderStructure.TRAINED_MODELS_DIR, but indexes models wherever they were saved.
+|
+| Use from the command line with:
+| python -m AIForecast.modeling.catalog rescan [directory ...]
+| python -m AIForecast.modeling.catalog best <feature> [--input-width 24] [--output-width 1] [--metric mae]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from os import path as filesys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from AIForecast import sysutils
+from AIForecast.sysutils.pathing import FolderStructure
+
+CATALOG_FILE = 'catalog.sqlite'
+"""
+File name of the catalog in FolderStructure.TRAINED_MODELS_DIR.
+"""
+MODEL_EXTENSIONS = ('.h5', '.hdf5', '.xgb')
+"""
+Extensions of saved Keras models, and of the gradient boosted models of boosting.BoostedForecastModel.
+"""
+SIDE_FILES = {
+    'training_report': '_training_report.csv',
+    'testing_report': '_testing_report.csv',
+    'learning_curve': '_learning_curve.csv',
+    'metrics': '_metrics.csv',
+    'scaler': '_scaler.json',
+    'state': '_state.json',
+    'profile': '_profile.json',
+    'trace': '_trace.json',
+    'tflite': '.tflite',
+    'bundle': '.aifb'
+}
+"""
+The files saved next to a model, by their kind, as the suffix that replaces the model's extension.
+"""
+METRICS = ('mae', 'rmse', 'mape', 'bias')
+"""
+The metrics of forecast_metrics, which models can be ranked by.
+"""
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    signature TEXT NOT NULL,
+    schema_path TEXT,
+    schema_hash TEXT,
+    data_fingerprint TEXT,
+    input_width INTEGER,
+    output_width INTEGER,
+    label_offset INTEGER,
+    stride INTEGER,
+    epochs INTEGER,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS models_by_window ON models (input_width, output_width);
+CREATE INDEX IF NOT EXISTS models_by_schema ON models (schema_hash);
+CREATE INDEX IF NOT EXISTS models_by_data ON models (data_fingerprint);
+CREATE TABLE IF NOT EXISTS features (
+    model_id INTEGER NOT NULL REFERENCES models (id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    feature TEXT NOT NULL,
+    PRIMARY KEY (model_id, role, feature)
+);
+CREATE INDEX IF NOT EXISTS features_by_name ON features (feature, role);
+CREATE TABLE IF NOT EXISTS metrics (
+    model_id INTEGER NOT NULL REFERENCES models (id) ON DELETE CASCADE,
+    set_name TEXT NOT NULL,
+    feature TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    mae REAL,
+    rmse REAL,
+    mape REAL,
+    bias REAL,
+    PRIMARY KEY (model_id, set_name, feature, step)
+);
+CREATE INDEX IF NOT EXISTS metrics_by_feature ON metrics (feature, set_name);
+CREATE TABLE IF NOT EXISTS artifacts (
+    model_id INTEGER NOT NULL REFERENCES models (id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (model_id, kind)
+);
+'''
+
+
+def catalog_path() -> str:
+    """
+    :return: Returns the path of the catalog in FolderStructure.TRAINED_MODELS_DIR.
+    """
+    directory = FolderStructure.TRAINED_MODELS_DIR.get_path()
+    os.makedirs(directory, exist_ok=True)
+    return filesys.join(directory, CATALOG_FILE)
+
+
+def schema_hash(schema_path: str) -> str:
+    """
+    :return: Returns the SHA-256 hash of a schema file's content.
+    """
+    with open(schema_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def side_files(model_path: str) -> Dict[str, str]:
+    """
+    :return: Returns the paths of the side files of a model that exist, by their kind.
+    """
+    stem = filesys.splitext(model_path)[0]
+    paths = {kind: stem + suffix for kind, suffix in SIDE_FILES.items()}
+    return {kind: path for kind, path in paths.items() if filesys.isfile(path)}
+
+
+def _signature(stats: Dict[str, os.stat_result], model_name: str) -> str:
+    """
+    | Describes the state of a model and the side files it is indexed from, so a model is only indexed again when one
+      of them changed.
+    """
+    stem = filesys.splitext(model_name)[0]
+    names = [model_name, stem + SIDE_FILES['metrics'], stem + SIDE_FILES['state']]
+    return ';'.join(f'{stats[name].st_mtime_ns}:{stats[name].st_size}' if name in stats else '-' for name in names)
+
+
+class ArtifactCatalog:
+    """
+    | The catalog of trained models. Safe to use from several threads, and from several processes since the database
+      is in write ahead logging mode.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        :param path: default = None<br/>
+                     The SQLite file of the catalog. Defaults to catalog_path. Created if it does not exist.
+        """
+        self.path: str = catalog_path() if path is None else path
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.__connection.row_factory = sqlite3.Row
+        self.__connection.execute('PRAGMA foreign_keys = ON')
+        self.__connection.execute('PRAGMA journal_mode = WAL')
+        self.__connection.executescript(_SCHEMA)
+
+    def record(self,
+               model_path: str,
+               schema_path: str = None,
+               data_fingerprint: str = None,
+               transformer: Dict[str, Any] = None,
+               train_evaluation: pd.DataFrame = None,
+               test_evaluation: pd.DataFrame = None,
+               epochs: int = None) -> int:
+        """
+        | Records a saved model. A model that is already in the catalog is replaced.
+        :param model_path: The path of the saved model. Its side files are looked up next to it.
+        :param schema_path: default = None<br/>
+                            The JSON schema the model was made from, which is hashed.
+        :param data_fingerprint: default = None<br/>
+                                 The fingerprint of the data the model was trained on, see Pipeline.data_fingerprint.
+        :param transformer: default = None<br/>
+                            The arguments of the SupervisedTimeseriesTransformer the model was trained on.
+        :param train_evaluation: default = None<br/>
+                                 The training metrics from ForecastModelTrainer, indexed by (split, step, feature).
+        :param test_evaluation: default = None<br/>
+                                The testing metrics from ForecastModelTrainer, indexed by (split, step, feature).
+        :param epochs: default = None<br/>
+                       The number of epochs the model was trained for.
+        :return: Returns the id of the model in the catalog.
+        """
+        model_path = filesys.abspath(model_path)
+        stats = self.__stats(filesys.dirname(model_path))
+        evaluations = {name: evaluation for name, evaluation in [('train', train_evaluation),
+                                                                 ('test', test_evaluation)]
+                       if evaluation is not None}
+        schema = None if schema_path is None or not filesys.isfile(schema_path) else schema_hash(schema_path)
+        with self.__lock, self.__connection:
+            return self.__insert(model_path, _signature(stats, filesys.basename(model_path)), schema_path, schema,
+                                 data_fingerprint, transformer or {}, evaluations, epochs)
+
+    def rescan(self, directories: List[str] = None) -> Tuple[int, int, int]:
+        """
+        | Indexes the models in the directories and their sub-directories, from their state and metrics side files.
+          Models whose files did not change since they were indexed are skipped, and models that no longer exist are
+          dropped. Schema hashes and data fingerprints recorded when a model was saved are kept.
+        :param directories: default = None<br/>
+                            The directories to scan. Defaults to FolderStructure.TRAINED_MODELS_DIR.
+        :return: Returns the number of models that were added, updated, and removed.
+        """
+        if directories is None:
+            directories = [FolderStructure.TRAINED_MODELS_DIR.get_path()]
+        directories = [filesys.abspath(directory) for directory in directories]
+        with self.__lock:
+            known = {row['path']: row for row in self.__connection.execute(
+                'SELECT path, signature, schema_path, schema_hash, data_fingerprint FROM models')}
+        found, added, updated = set(), 0, 0
+        for directory in directories:
+            for model_path, signature in self.__scan(directory):
+                found.add(model_path)
+                previous = known.get(model_path)
+                if previous is not None and previous['signature'] == signature:
+                    continue
+                state, evaluations = self.__read_side_files(model_path)
+                with self.__lock, self.__connection:
+                    self.__insert(model_path, signature,
+                                  None if previous is None else previous['schema_path'],
+                                  None if previous is None else previous['schema_hash'],
+                                  None if previous is None else previous['data_fingerprint'],
+                                  state.get('transformer') or {}, evaluations, state.get('epoch'))
+                added, updated = (added + 1, updated) if previous is None else (added, updated + 1)
+        removed = [path for path in known if path not in found
+                   and any(path.startswith(directory + os.sep) for directory in directories)]
+        with self.__lock, self.__connection:
+            self.__connection.executemany('DELETE FROM models WHERE path = ?', [(path,) for path in removed])
+        sysutils.log(__name__).info('Rescanned %s: %d added, %d updated, %d removed',
+                                    ', '.join(directories), added, updated, len(removed))
+        return added, updated, len(removed)
+
+    def find(self,
+             feature: str = None,
+             role: str = None,
+             input_width: int = None,
+             output_width: int = None,
+             schema: str = None,
+             data_fingerprint: str = None) -> List[Dict[str, Any]]:
+        """
+        | Looks up the models that match every given criterion.
+        :param feature: default = None<br/>
+                        A feature the model was trained with.
+        :param role: default = None<br/>
+                     'input' or 'output' to only match **feature** as an input or an output feature.
+        :param input_width: default = None<br/>
+                            The number of time steps of the model's input windows.
+        :param output_width: default = None<br/>
+                             The number of time steps the model forecasts.
+        :param schema: default = None<br/>
+                       The hash of the schema the model was made from, see schema_hash.
+        :param data_fingerprint: default = None<br/>
+                                 The fingerprint of the data the model was trained on.
+        :return: Returns the matching models as dicts of the columns of the models table, with the paths of their
+                 side files under 'artifacts'.
+        """
+        conditions, params = self.__conditions(input_width, output_width, schema, data_fingerprint)
+        if feature is not None:
+            roles = ('input', 'output') if role is None else (role,)
+            conditions.append(f'id IN (SELECT model_id FROM features WHERE feature = ? AND role IN '
+                              f'({", ".join("?" * len(roles))}))')
+            params += [feature, *roles]
+        where = '' if len(conditions) == 0 else ' WHERE ' + ' AND '.join(conditions)
+        with self.__lock:
+            rows = self.__connection.execute(f'SELECT * FROM models{where} ORDER BY path', params).fetchall()
+            return [self.__entry(row) for row in rows]
+
+    def best(self,
+             feature: str,
+             input_width: int = None,
+             output_width: int = None,
+             metric: str = 'mae',
+             set_name: str = 'test',
+             limit: int = 1) -> List[Dict[str, Any]]:
+        """
+        | Ranks the models that forecast a feature by a metric, averaged over the forecast steps.
+        :param feature: The output feature the models are ranked on.
+        :param input_width: default = None<br/>
+                            Only ranks models with this input width.
+        :param output_width: default = None<br/>
+                             Only ranks models with this output width.
+        :param metric: One of METRICS. Lower is better, for bias the absolute value is ranked.
+        :param set_name: 'test' or 'train', the set the metric was computed on.
+        :param limit: The number of models that are returned.
+        :return: Returns the best models first, as find does, with the averaged metric under 'score'.
+        :raises ValueError: raised if the metric is not one of METRICS.
+        """
+        if metric not in METRICS:
+            raise ValueError(f'{metric} is not one of {", ".join(METRICS)}.')
+        conditions, params = self.__conditions(input_width, output_width, None, None)
+        conditions = ['metrics.set_name = ?', 'metrics.feature = ?'] + [f'models.{c}' for c in conditions]
+        score = f'ABS(AVG(metrics.{metric}))' if metric == 'bias' else f'AVG(metrics.{metric})'
+        query = f'SELECT models.*, {score} AS score FROM models JOIN metrics ON metrics.model_id = models.id ' \
+                f'WHERE {" AND ".join(conditions)} GROUP BY models.id ORDER BY score LIMIT ?'
+        with self.__lock:
+            rows = self.__connection.execute(query, [set_name, feature, *params, limit]).fetchall()
+            return [self.__entry(row) for row in rows]
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+    def __insert(self,
+                 model_path: str,
+                 signature: str,
+                 schema_path: Optional[str],
+                 schema: Optional[str],
+                 data_fingerprint: Optional[str],
+                 transformer: Dict[str, Any],
+                 evaluations: Dict[str, pd.DataFrame],
+                 epochs: Optional[int]) -> int:
+        db = self.__connection
+        db.execute('DELETE FROM models WHERE path = ?', (model_path,))
+        cursor = db.execute(
+            'INSERT INTO models (path, signature, schema_path, schema_hash, data_fingerprint, input_width, '
+            'output_width, label_offset, stride, epochs, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (model_path, signature, schema_path, schema, data_fingerprint, transformer.get('input_width'),
+             transformer.get('output_width'), transformer.get('label_offset'), transformer.get('stride'), epochs,
+             time.time()))
+        model_id = cursor.lastrowid
+        features = [(model_id, 'input', col) for col in transformer.get('input_columns') or []] + \
+                   [(model_id, 'output', col) for col in transformer.get('output_columns') or []]
+        db.executemany('INSERT OR IGNORE INTO features (model_id, role, feature) VALUES (?, ?, ?)', features)
+        for set_name, evaluation in evaluations.items():
+            # The metrics of every split are averaged, so a model has one row per forecast step and feature.
+            means = evaluation.groupby(level=['step', 'feature'], sort=False)[list(METRICS)].mean()
+            db.executemany(
+                'INSERT INTO metrics (model_id, set_name, feature, step, mae, rmse, mape, bias) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(model_id, set_name, str(feature), int(step), *[None if pd.isna(v) else float(v) for v in values])
+                 for (step, feature), values in zip(means.index, means.to_numpy())])
+        db.executemany('INSERT INTO artifacts (model_id, kind, path) VALUES (?, ?, ?)',
+                       [(model_id, kind, path) for kind, path in side_files(model_path).items()])
+        return model_id
+
+    @staticmethod
+    def __conditions(input_width, output_width, schema, data_fingerprint) -> Tuple[List[str], List[Any]]:
+        criteria = [('input_width', input_width), ('output_width', output_width), ('schema_hash', schema),
+                    ('data_fingerprint', data_fingerprint)]
+        criteria = [(column, value) for column, value in criteria if value is not None]
+        return [f'{column} = ?' for column, _ in criteria], [value for _, value in criteria]
+
+    def __entry(self, row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        entry['artifacts'] = {kind: path for kind, path in self.__connection.execute(
+            'SELECT kind, path FROM artifacts WHERE model_id = ?', (row['id'],))}
+        return entry
+
+    @staticmethod
+    def __stats(directory: str) -> Dict[str, os.stat_result]:
+        with os.scandir(directory) as entries:
+            return {entry.name: entry.stat() for entry in entries if entry.is_file()}
+
+    def __scan(self, directory: str) -> Iterator[Tuple[str, str]]:
+        """
+        :return: Yields the path and signature of every model in the directory and its sub-directories.
+        """
+        pending = [directory]
+        while len(pending) > 0:
+            current = pending.pop()
+            stats = {}
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file():
+                            stats[entry.name] = entry.stat()
+            except OSError as e:
+                sysutils.log(__name__).warning('Could not scan %s: %s', current, e)
+                continue
+            for name in stats:
+                # Checkpoints being written are saved as <name>.tmp.h5 and renamed once complete.
+                if filesys.splitext(name)[1].lower() in MODEL_EXTENSIONS and '.tmp.' not in name:
+                    yield filesys.join(current, name), _signature(stats, name)
+
+    @staticmethod
+    def __read_side_files(model_path: str) -> Tuple[Dict[str, Any], Dict[str, pd.DataFrame]]:
+        files = side_files(model_path)
+        state, evaluations = {}, {}
+        try:
+            if 'state' in files:
+                with open(files['state'], 'r') as f:
+                    state = json.load(f)
+            if 'metrics' in files:
+                metrics = pd.read_csv(files['metrics'], index_col=['set', 'split', 'step', 'feature'])
+                evaluations = {set_name: metrics.xs(set_name, level='set')
+                               for set_name in metrics.index.unique(level='set')}
+        except (OSError, ValueError, KeyError) as e:
+            sysutils.log(__name__).warning('Could not read the side files of %s: %s', model_path, e)
+        return state, evaluations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Indexes and queries the catalog of trained models.')
+    parser.add_argument('--catalog', default=None, help='Defaults to catalog.sqlite in the trained models directory.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    rescan = commands.add_parser('rescan', help='Index new and changed models.')
+    rescan.add_argument('directories', nargs='*', help='Defaults to the trained models directory.')
+    best = commands.add_parser('best', help='List the models with the lowest error on a feature.')
+    best.add_argument('feature')
+    best.add_argument('--input-width', type=int, default=None)
+    best.add_argument('--output-width', type=int, default=None)
+    best.add_argument('--metric', choices=METRICS, default='mae')
+    best.add_argument('--set', dest='set_name', choices=('test', 'train'), default='test')
+    best.add_argument('--limit', type=int, default=5)
+    args = parser.parse_args()
+    catalog = ArtifactCatalog(args.catalog)
+    try:
+        if args.command == 'rescan':
+            added, updated, removed = catalog.rescan(args.directories or None)
+            print(f'{added} added, {updated} updated, {removed} removed')
+        else:
+            entries = catalog.best(args.feature, args.input_width, args.output_width, args.metric, args.set_name,
+                                   args.limit)
+            for entry in entries:
+                print(f'{entry["score"]:>12.4g}  in {entry["input_width"]} out {entry["output_width"]}  '
+                      f'{entry["path"]}')
+            if len(entries) == 0:
+                print(f'No model with {args.set_name} metrics for {args.feature} matches.')
+    finally:
+        catalog.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+"""
+| Resumable training. A checkpoint is a Keras .h5 model, which is saved with the state of its optimizer, and a
+  <model>_state.json side file with the progress of the run.
+|
+| A checkpoint of an unfinished run is resumed from the split and epoch it was written at. A finished model is fine tuned
+  on the data that is newer than its training cutoff.
+|
+| BestCheckpoint only saves models that improve on the best monitored loss so far, and writes them on a background
+  thread so the epochs are not held up by the disk.
+"""
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from os import path as filesys
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from AIForecast import sysutils
+from AIForecast.sysutils.pathing import FolderStructure
+
+SAVED_MODEL_EXTENSIONS = ('.h5', '.hdf5')
+STATE_SUFFIX = '_state.json'
+RESUME_CHECKPOINT = 'checkpoint.h5'
+"""
+File name of the checkpoint the train menu writes while a model trains, under FolderStructure.TRAINED_MODELS_DIR.
+"""
+BEST_CHECKPOINT = 'best.h5'
+"""
+File name of the best model the train menu writes while a model trains, under FolderStructure.TRAINED_MODELS_DIR.
+"""
+
+
+def is_saved_model(path: str) -> bool:
+    return filesys.splitext(path)[1].lower() in SAVED_MODEL_EXTENSIONS
+
+
+def _trained_models_file(name: str) -> str:
+    directory = FolderStructure.TRAINED_MODELS_DIR.get_path()
+    os.makedirs(directory, exist_ok=True)
+    return filesys.join(directory, name)
+
+
+def resume_checkpoint_path() -> str:
+    """
+    :return: Returns the path of the checkpoint the train menu writes, in FolderStructure.TRAINED_MODELS_DIR.
+    """
+    return _trained_models_file(RESUME_CHECKPOINT)
+
+
+def best_checkpoint_path() -> str:
+    """
+    :return: Returns the path of the best model the train menu writes, in FolderStructure.TRAINED_MODELS_DIR.
+    """
+    return _trained_models_file(BEST_CHECKPOINT)
+
+
+def state_path(model_path: str) -> str:
+    """
+    :return: Returns the path of the state side file of a saved model, <model>_state.json.
+    """
+    return filesys.splitext(model_path)[0] + STATE_SUFFIX
+
+
+class TrainingState:
+    """
+    The progress of a training run, saved next to its model.
+    """
+
+    def __init__(self,
+                 epoch: int = 0,
+                 split: int = 0,
+                 complete: bool = False,
+                 training_cutoff: Any = None,
+                 transformer: Dict[str, Any] = None,
+                 features: Dict[str, Any] = None):
+        """
+        :param epoch: The number of epochs the model of the current split has been trained for, which is the epoch
+                      training continues from.
+        :param split: The index of the split that is being trained.
+        :param complete: True once every split has been trained.
+        :param training_cutoff: default = None<br/>
+                                The index label of the last row the model was trained on. Rows after it are new data.
+        :param transformer: default = None<br/>
+                            The arguments of the SupervisedTimeseriesTransformer the training windows were made with.
+        :param features: default = None<br/>
+                         The arguments of the FeatureGenerator the model's input features were derived with, or None if
+                         the model was trained on the data's columns only.
+        """
+        self.epoch: int = epoch
+        self.split: int = split
+        self.complete: bool = complete
+        self.training_cutoff: Any = training_cutoff
+        self.transformer: Dict[str, Any] = transformer
+        self.features: Dict[str, Any] = features
+
+    def cutoff_label(self, index: pd.Index) -> Any:
+        """
+        :return: Returns the training cutoff as a label of **index**.
+        """
+        if isinstance(index, pd.DatetimeIndex):
+            return pd.Timestamp(self.training_cutoff)
+        return self.training_cutoff
+
+    def to_dict(self) -> Dict[str, Any]:
+        cutoff = self.training_cutoff
+        if isinstance(cutoff, (datetime, pd.Timestamp)):
+            cutoff = cutoff.isoformat()
+        elif hasattr(cutoff, 'item'):
+            # NumPy scalars are not JSON serializable.
+            cutoff = cutoff.item()
+        return {
+            'epoch': self.epoch,
+            'split': self.split,
+            'complete': self.complete,
+            'training_cutoff': cutoff,
+            'transformer': self.transformer,
+            'features': self.features
+        }
+
+    def save(self, path: str):
+        # Written to a temporary file first, so an interrupted write never leaves a truncated state behind.
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def load(path: str) -> 'TrainingState':
+        with open(path, 'r') as f:
+            return TrainingState(**json.load(f))
+
+
+class ResumeCheckpoint(tf.keras.callbacks.Callback):
+    """
+    | Saves the model, with its optimizer state, and the training state when a fit ends: when its split is trained,
+      stopped early, or canceled. An interrupted run is resumed from the last saved fit.
+    |
+    | Saving a model with its optimizer stalls training while the file is written, so it is not saved after every
+      epoch. The trainer saves the checkpoint of a fit that is interrupted by an exception with **save**. A process that
+      is killed while it trains a split loses the epochs of that split, and is resumed from the end of the split before.
+    """
+
+    def __init__(self, path: str, split: int = 0):
+        """
+        :param path: The .h5 file the model is saved to. The state is saved to state_path of it.
+        :param split: The index of the split that is trained while the callback is attached.
+        """
+        super().__init__()
+        self.path: str = path
+        self.split: int = split
+        self.epochs: Optional[int] = None
+
+    def on_train_begin(self, logs=None):
+        self.epochs = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        # Keras counts epochs from the initial epoch of a resumed fit, so epoch + 1 epochs have been trained.
+        self.epochs = epoch + 1
+
+    def on_train_end(self, logs=None):
+        self.save()
+
+    def save(self):
+        """
+        | Saves the model and the number of epochs trained so far. Nothing is saved before the first epoch ends.
+        """
+        if self.epochs is None:
+            return
+        temp_path = filesys.splitext(self.path)[0] + '.tmp' + filesys.splitext(self.path)[1]
+        self.model.save(temp_path)
+        os.replace(temp_path, self.path)
+        TrainingState(self.epochs, self.split).save(state_path(self.path))
+
+
+class AsyncCheckpointWriter:
+    """
+    | Saves snapshots of a model's weights on a background thread. The weights are set on a copy of the model, so the
+      model being trained is never read from the writer's thread. Only the latest snapshot is kept: one submitted while
+      an earlier one is still waiting replaces it, since only the best model is of interest.
+    """
+
+    def __init__(self, model: tf.keras.Model):
+        """
+        :param model: The model whose weights are saved. It is copied once, without its optimizer.
+        """
+        self.__shadow: tf.keras.Model = tf.keras.models.clone_model(model)
+        self.__pending: Optional[Tuple[List[np.ndarray], str]] = None
+        self.__writing: bool = False
+        self.__closed: bool = False
+        self.__error: Optional[BaseException] = None
+        self.__condition = threading.Condition()
+        self.written: List[str] = []
+        self.__thread = threading.Thread(target=self.__run, name='checkpoint-writer', daemon=True)
+        self.__thread.start()
+
+    def submit(self, weights: List[np.ndarray], path: str):
+        """
+        :param weights: A snapshot of the weights, as returned by get_weights, which copies them.
+        :param path: The .h5 file the model is saved to.
+        """
+        with self.__condition:
+            if self.__closed:
+                raise RuntimeError('The checkpoint writer has been closed.')
+            self.__pending = (weights, path)
+            self.__condition.notify_all()
+
+    def flush(self):
+        """
+        | Waits until every submitted snapshot has been written.
+        :raises Exception: raised if a snapshot could not be written, with the error of the writer's thread.
+        """
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.__pending is None and not self.__writing)
+            if self.__error is not None:
+                error, self.__error = self.__error, None
+                raise error
+
+    def close(self):
+        """
+        | Writes the remaining snapshot and stops the writer's thread.
+        """
+        try:
+            self.flush()
+        finally:
+            with self.__condition:
+                self.__closed = True
+                self.__condition.notify_all()
+            self.__thread.join()
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__pending is not None or self.__closed)
+                if self.__pending is None:
+                    return
+                (weights, path), self.__pending = self.__pending, None
+                self.__writing = True
+            try:
+                self.__shadow.set_weights(weights)
+                temp_path = filesys.splitext(path)[0] + '.tmp' + filesys.splitext(path)[1]
+                self.__shadow.save(temp_path)
+                os.replace(temp_path, path)
+                self.written.append(path)
+            except Exception as e:
+                sysutils.log(__name__).error('Could not write the checkpoint %s: %s', path, e)
+                self.__error = e
+            finally:
+                with self.__condition:
+                    self.__writing = False
+                    self.__condition.notify_all()
+
+
+class BestCheckpoint(tf.keras.callbacks.Callback):
+    """
+    | Saves the model whenever the monitored loss improves on the best loss of the fit so far. The weights are copied at
+      the end of the epoch and written by an AsyncCheckpointWriter, which is flushed when training ends.
+    |
+    | The saved models have no optimizer state, they are meant to be forecast with. Resume a run from a ResumeCheckpoint
+      instead.
+    """
+
+    def __init__(self, path: str, monitor: str = 'val_loss'):
+        """
+        :param path: The .h5 file the model is saved to. May contain {epoch}, which is formatted with the epoch number
+                     counted from 1, like ModelCheckpoint's file paths.
+        :param monitor: The logged loss to minimize. Falls back to 'loss' in epochs that have no validation loss.
+        """
+        super().__init__()
+        self.path: str = path
+        self.monitor: str = monitor
+        self.best: float = np.inf
+        self.best_epoch: int = None
+        self.writer: AsyncCheckpointWriter = None
+
+    def on_train_begin(self, logs=None):
+        self.best, self.best_epoch = np.inf, None
+        self.writer = AsyncCheckpointWriter(self.model)
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        current = logs.get(self.monitor, logs.get('loss'))
+        if current is None or not current < self.best:
+            return
+        self.best, self.best_epoch = current, epoch
+        self.writer.submit(self.model.get_weights(), self.path.format(epoch=epoch + 1))
+
+    def on_train_end(self, logs=None):
+        self.writer.close()
+
+
+def latest_checkpoint(directory: str, pattern: str = r'model-(\d+)\.hdf5') -> Optional[Tuple[str, int]]:
+    """
+    :param directory: The directory the checkpoints were written to.
+    :param pattern: A regular expression of the file names of the checkpoints, with the epoch as its first group.
+    :return: Returns the path and epoch of the checkpoint with the highest epoch, or None if there is none.
+    """
+    if not filesys.isdir(directory):
+        return None
+    matches = [(int(match.group(1)), entry.path) for entry in os.scandir(directory)
+               for match in [re.fullmatch(pattern, entry.name)] if match is not None]
+    if len(matches) == 0:
+        return None
+    epoch, path = max(matches)
+    sysutils.log(__name__).debug('Latest checkpoint in %s is %s', directory, path)
+    return path, epoch
+
+
+def clear_checkpoints(directory: str, pattern: str = r'model-(\d+)\.hdf5') -> int:
+    """
+    | Removes the checkpoints of an earlier run, so the checkpoints of a new run in the same directory are not mixed up
+      with them by latest_checkpoint.
+    :param directory: The directory the checkpoints were written to.
+    :param pattern: A regular expression of the file names of the checkpoints.
+    :return: Returns the number of removed checkpoints.
+    """
+    if not filesys.isdir(directory):
+        return 0
+    removed = 0
+    for entry in os.scandir(directory):
+        if entry.is_file() and re.fullmatch(pattern, entry.name) is not None:
+            os.remove(entry.path)
+            removed += 1
+    if removed > 0:
+        sysutils.log(__name__).debug('Removed %d checkpoints of an earlier run from %s', removed, directory)
+    return removed
@@ -1,4 +1,10 @@
-from typing import List, Callable, Tuple, Dict
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Callable, Tuple, Dict, Optional
 
 import pandas as pd
 import numpy as np
@@ -6,8 +12,34 @@ import tensorflow as tf
 from sklearn.experimental import enable_iterative_imputer
 from sklearn.impute import SimpleImputer, IterativeImputer
 
+from AIForecast import sysutils
+from AIForecast.modeling.checkpoints import BestCheckpoint, ResumeCheckpoint, TrainingState, is_saved_model, \
+    state_path
+from AIForecast.modeling.models import SCHEMAS, SchemaRegistry
+from AIForecast.modeling.tfprofiler import ProfilerCapture
 from AIForecast.sysutils.sysexceptions import TimeseriesTransformationError
 
+DTYPE = np.float32
+"""
+Floating point type of the data flowing through the pipeline. The data is cast once by DataImputer, which is the entry
+point of the pipeline. Every later stage keeps the type of its input, so the samples reach Keras in the type its layers
+compute in and are not cast again on every fit and predict.
+"""
+
+_XLA_ERRORS = (tf.errors.InvalidArgumentError, tf.errors.UnimplementedError, tf.errors.InternalError)
+"""
+Errors raised by TensorFlow when a graph contains an op that XLA cannot compile.
+"""
+_COMPILE_JIT = 'jit_compile' in inspect.signature(tf.keras.Model.compile).parameters
+"""
+Whether Model.compile takes jit_compile, which it does from TensorFlow 2.8. Older versions train without XLA.
+"""
+_FUNCTION_JIT = next((arg for arg in ('jit_compile', 'experimental_compile')
+                      if arg in inspect.signature(tf.function).parameters), None)
+"""
+The argument of tf.function that compiles it with XLA: jit_compile from TensorFlow 2.5, experimental_compile before.
+"""
+
 # ----------------- Data Classes : ----------------- #
 #
 #
@@ -112,10 +144,11 @@ class TimeseriesData:
 
 
 class DataImputer:
-    def __init__(self, imputer: str):
+    def __init__(self, imputer: str, dtype: np.dtype = DTYPE):
         if imputer not in {'Iterative', 'Simple', 'None'}:
             raise ValueError(f'Imputer type "{imputer}" was not recognized as an imputer.')
         self. imputer_type = imputer
+        self.dtype: np.dtype = dtype
         if self.imputer_type == 'Iterative':
             self.imputer = IterativeImputer(missing_values=np.nan,
                                             initial_strategy='most_frequent',
@@ -126,7 +159,160 @@ class DataImputer:
             self.imputer = SimpleImputer(missing_values=np.nan, strategy='constant', fill_value=0)
 
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        return pd.DataFrame(self.imputer.fit_transform(data), columns=data.columns)
+        return pd.DataFrame(self.imputer.fit_transform(data).astype(self.dtype, copy=False), columns=data.columns,
+                            index=data.index)
+
+
+class FeatureGenerator:
+    STATISTICS = ('mean', 'std', 'min', 'max')
+
+    def __init__(self,
+                 columns: List[str],
+                 lags: List[int] = (),
+                 windows: List[int] = (),
+                 statistics: List[str] = STATISTICS,
+                 differences: List[int] = ()):
+        """
+        | Derives lag, rolling window, and difference features from columns of the data. Every feature of a row is
+          computed from that row and the rows before it only, so the features of the first validation and testing rows
+          of a split look back into the rows before them, but never ahead. The first rows, whose lags or windows would
+          reach before the start of the data, are dropped before the data is split.
+        |
+        | Every feature is computed for all rows at once: rolling sums from the differences of cumulative sums, the
+          standard deviation from cumulative sums of squares, and the rolling minimum and maximum with the van Herk
+          algorithm, from running minimums and maximums within blocks of the window's width.
+        :param columns: The columns features are derived from. Features are added as columns named <column>_lag<k>,
+                        <column>_<statistic><window>, and <column>_diff<period>.
+        :param lags: The values **k** rows earlier.
+        :param windows: The widths of the rolling windows, which end at and include the row.
+        :param statistics: The statistics of every rolling window, from STATISTICS.
+        :param differences: The periods of the differences to the value that many rows earlier. 1 is the change from
+                            the previous row, and the length of a season, such as 12 for monthly data, is the seasonal
+                            difference.
+        :raises ValueError: raised if a lag, window, or period is not positive, a statistic is not in STATISTICS, or the
+                            standard deviation is asked for over windows of 1 row.
+        """
+        unknown = [stat for stat in statistics if stat not in self.STATISTICS]
+        if len(unknown) > 0:
+            raise ValueError(f'{unknown} are not statistics. Statistics are {list(self.STATISTICS)}.')
+        if any(int(size) < 1 for size in [*lags, *windows, *differences]):
+            raise ValueError('Lags, windows, and differences must be at least 1 row.')
+        if 'std' in statistics and any(int(window) < 2 for window in windows):
+            # The sample standard deviation of a single row is undefined, and a column without spread cannot be
+            # normalized either, so it would reach the model as NaN.
+            raise ValueError('The standard deviation needs windows of at least 2 rows.')
+        self.columns: List[str] = list(columns)
+        self.lags: List[int] = [int(lag) for lag in lags]
+        self.windows: List[int] = [int(window) for window in windows]
+        self.statistics: List[str] = list(statistics)
+        self.differences: List[int] = [int(period) for period in differences]
+
+    @property
+    def lookback(self) -> int:
+        """
+        :return: Returns the number of rows before a row its features reach back, which is the number of rows dropped
+                 from the start of the data.
+        """
+        return max([0, *self.lags, *[window - 1 for window in self.windows], *self.differences])
+
+    def feature_names(self) -> List[str]:
+        """
+        :return: Returns the names of the added columns, in the order they are added.
+        """
+        names = []
+        for col in self.columns:
+            names += [f'{col}_lag{lag}' for lag in self.lags]
+            names += [f'{col}_{stat}{window}' for window in self.windows for stat in self.statistics]
+            names += [f'{col}_diff{period}' for period in self.differences]
+        return names
+
+    def to_dict(self) -> dict:
+        """
+        :return: Returns the arguments the generator was constructed with.
+        """
+        return {
+            'columns': self.columns,
+            'lags': self.lags,
+            'windows': self.windows,
+            'statistics': self.statistics,
+            'differences': self.differences
+        }
+
+    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
+        values = data[self.columns].to_numpy(dtype=np.float64)
+        if len(values) <= self.lookback:
+            raise TimeseriesTransformationError(f'The features look back {self.lookback} rows, the data only has '
+                                                f'{len(values)}.')
+        features = []
+        for lag in self.lags:
+            features.append((lag, _shift(values, lag)))
+        for window in self.windows:
+            rolling = {}
+            if 'mean' in self.statistics or 'std' in self.statistics:
+                rolling.update(_rolling_moments(values, window))
+            if 'min' in self.statistics:
+                rolling['min'] = _rolling_extreme(values, window, np.minimum, np.inf)
+            if 'max' in self.statistics:
+                rolling['max'] = _rolling_extreme(values, window, np.maximum, -np.inf)
+            features += [(window, rolling[stat]) for stat in self.statistics]
+        for period in self.differences:
+            features.append((period, values - _shift(values, period)))
+        if len(features) == 0:
+            return data
+        # Features are stacked as (rows, feature, column) and laid out column by column, as feature_names lists them.
+        derived = np.stack([feature for _, feature in features], axis=1).transpose(0, 2, 1).reshape(len(values), -1)
+        dtype = np.result_type(*data[self.columns].dtypes)
+        derived = pd.DataFrame(derived.astype(dtype, copy=False), columns=self.feature_names(), index=data.index)
+        return pd.concat([data, derived], axis=1).iloc[self.lookback:]
+
+    def __repr__(self):
+        return f'FeatureGenerator({self.to_dict()})'
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """
+    :return: Returns the values **periods** rows earlier, NaN for the first rows.
+    """
+    shifted = np.full_like(values, np.nan)
+    shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+def _rolling_moments(values: np.ndarray, window: int) -> Dict[str, np.ndarray]:
+    """
+    :return: Returns the 'mean' and sample 'std' of the trailing windows, NaN for the rows with incomplete windows.
+    """
+    # Sums of squares lose precision far from zero, so the values are taken relative to the first row, which shifts
+    # every window by the same amount and leaves its spread unchanged.
+    origin = values[:1]
+    centered = values - origin
+    sums = np.cumsum(np.vstack([np.zeros((1, values.shape[1])), centered]), axis=0)
+    squares = np.cumsum(np.vstack([np.zeros((1, values.shape[1])), centered ** 2]), axis=0)
+    window_sums, window_squares = sums[window:] - sums[:-window], squares[window:] - squares[:-window]
+    mean, std = np.full_like(values, np.nan), np.full_like(values, np.nan)
+    mean[window - 1:] = window_sums / window + origin
+    if window > 1:
+        variance = (window_squares - window_sums ** 2 / window) / (window - 1)
+        std[window - 1:] = np.sqrt(np.maximum(variance, 0))
+    return {'mean': mean, 'std': std}
+
+
+def _rolling_extreme(values: np.ndarray, window: int, extreme: np.ufunc, fill: float) -> np.ndarray:
+    """
+    :return: Returns the minimum or maximum of the trailing windows, NaN for the rows with incomplete windows.
+    """
+    rows, cols = values.shape
+    blocks = -(-rows // window)
+    padded = np.full((blocks * window, cols), fill)
+    padded[:rows] = values
+    padded = padded.reshape(blocks, window, cols)
+    # The running extreme from the start of every block, and to the end of every block. A window starting at row i
+    # spans the end of the block of row i and the start of the next block, up to row i + window - 1.
+    prefix = extreme.accumulate(padded, axis=1).reshape(-1, cols)
+    suffix = extreme.accumulate(padded[:, ::-1], axis=1)[:, ::-1].reshape(-1, cols)
+    result = np.full_like(values, np.nan)
+    result[window - 1:] = extreme(suffix[:rows - window + 1], prefix[window - 1:rows])
+    return result
 
 
 # --------- Pipeline Processing Classes : ---------- #
@@ -250,6 +436,109 @@ class ExpandingSplit:
         return splits
 
 
+class CutoffSplit:
+    def __init__(self, cutoff, lookback: int = 0, lookahead: int = 0):
+        """
+        | Splits off the rows after a model's training cutoff, to fine tune the model on only the data that is newer than
+          what it was trained on. The rows are all training rows, there is no validation or testing split.
+        :param cutoff: The index label of the last row the model was trained on.
+        :param lookback: The number of rows before the cutoff that are included, so the first window labels the first
+                         new row. Use the label offset of the SupervisedTimeseriesTransformer.
+        :param lookahead: The number of rows at the end that only serve as labels, since the labels of a window reach
+                          past its inputs. Use the label offset plus the output width minus the input width.
+        """
+        self.cutoff = cutoff
+        self.lookback: int = lookback
+        self.lookahead: int = max(lookahead, 0)
+
+    def __call__(self, data: pd.DataFrame) -> List[DataSplit]:
+        first_new = data.index.searchsorted(self.cutoff, side='right')
+        new_data = data.iloc[max(first_new - self.lookback, 0):]
+        training_split = new_data.iloc[:len(new_data) - self.lookahead]
+        if first_new >= len(data) or len(training_split) == 0:
+            raise IndexError(f'There are not enough rows after the training cutoff {self.cutoff} to fine tune on.')
+        return [DataSplit(new_data, training_split, new_data.iloc[:0], new_data.iloc[:0])]
+
+
+class FeatureScaler:
+    """
+    | The normalization a model was trained with, kept so raw input windows can be normalized the same way and the
+      model's predictions reverted to the scale of the data. Both normalizers are affine, so a feature x is scaled as
+      (x - center) / scale + shift.
+    """
+
+    def __init__(self,
+                 center: pd.Series,
+                 scale: pd.Series,
+                 shift: float,
+                 input_columns: List[str],
+                 output_columns: List[str]):
+        self.center: pd.Series = center.astype(np.float64)
+        self.scale: pd.Series = scale.astype(np.float64)
+        self.shift: float = float(shift)
+        self.input_columns: List[str] = list(input_columns)
+        self.output_columns: List[str] = list(output_columns)
+
+    def scale_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        :return: Returns the frame with every column the scaler has statistics of normalized.
+        """
+        columns = [col for col in frame.columns if col in self.center.index]
+        scaled = frame.copy()
+        scaled[columns] = ((frame[columns] - self.center[columns]) / self.scale[columns] + self.shift).astype(DTYPE)
+        return scaled
+
+    def scale_inputs(self, windows: np.ndarray) -> np.ndarray:
+        """
+        :param windows: Raw input windows, with the input columns as the last axis.
+        :return: Returns the normalized windows.
+        """
+        center, scale = self.center[self.input_columns].to_numpy(), self.scale[self.input_columns].to_numpy()
+        return ((np.asarray(windows) - center) / scale + self.shift).astype(DTYPE, copy=False)
+
+    def unscale_outputs(self, predictions: np.ndarray) -> np.ndarray:
+        """
+        :param predictions: Predictions of the model, with the output columns as the last axis. Single feature, single
+                            step predictions may be flat.
+        :return: Returns the predictions in the scale of the data.
+        """
+        center, scale = self.center[self.output_columns].to_numpy(), self.scale[self.output_columns].to_numpy()
+        predictions = np.asarray(predictions)
+        if predictions.ndim == 1 or predictions.shape[-1] != len(self.output_columns):
+            center, scale = center[0], scale[0]
+        return ((predictions - self.shift) * scale + center).astype(DTYPE, copy=False)
+
+    def to_dict(self) -> dict:
+        return {
+            'columns': list(self.center.index),
+            'center': self.center.tolist(),
+            'scale': self.scale.tolist(),
+            'shift': self.shift,
+            'input_columns': self.input_columns,
+            'output_columns': self.output_columns
+        }
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @staticmethod
+    def from_dict(stats: dict) -> 'FeatureScaler':
+        return FeatureScaler(pd.Series(stats['center'], index=stats['columns']),
+                             pd.Series(stats['scale'], index=stats['columns']),
+                             stats['shift'],
+                             stats['input_columns'],
+                             stats['output_columns'])
+
+    @staticmethod
+    def load(path: str) -> 'FeatureScaler':
+        with open(path, 'r') as f:
+            return FeatureScaler.from_dict(json.load(f))
+
+    def __repr__(self):
+        return f'FeatureScaler({self.to_dict()})'
+
+
 class ZStandardizer:
     def __init__(self, splits: List[DataSplit]):
         self.splits: List[DataSplit] = splits
@@ -264,6 +553,12 @@ class ZStandardizer:
             split.parent_data = (split.parent_data - mean) / std
         return self.splits
 
+    def scaler(self, input_columns: List[str], output_columns: List[str], split: int = -1) -> FeatureScaler:
+        """
+        :return: Returns the standardization of a split, by default the last split, which a model finishes training on.
+        """
+        return FeatureScaler(self.training_means[split], self.training_std[split], 0, input_columns, output_columns)
+
 
 class MinMaxNormalizer:
     def __init__(self, splits: List[DataSplit], scale_range: Tuple[int, int] = (0, 1)):
@@ -282,6 +577,34 @@ class MinMaxNormalizer:
             split.parent_data = self.a + ((split.parent_data - split_min) * ab_diff) / min_max_diff
         return self.splits
 
+    def scaler(self, input_columns: List[str], output_columns: List[str], split: int = -1) -> FeatureScaler:
+        """
+        :return: Returns the normalization of a split, by default the last split, which a model finishes training on.
+        """
+        scale = (self.training_max[split] - self.training_min[split]) / (self.b - self.a)
+        return FeatureScaler(self.training_min[split], scale, self.a, input_columns, output_columns)
+
+
+class SavedNormalizer:
+    def __init__(self, splits: List[DataSplit], scaler: FeatureScaler):
+        """
+        Normalizes splits with the saved normalization of a model, so new data is scaled the way the model was trained.
+        """
+        self.splits: List[DataSplit] = splits
+        self.saved_scaler: FeatureScaler = scaler
+
+    def __call__(self) -> List[DataSplit]:
+        for split in self.splits:
+            split.train_split = self.saved_scaler.scale_frame(split.train_split)
+            split.validation_split = self.saved_scaler.scale_frame(split.validation_split)
+            split.test_split = self.saved_scaler.scale_frame(split.test_split)
+            split.parent_data = self.saved_scaler.scale_frame(split.parent_data)
+        return self.splits
+
+    def scaler(self, input_columns: List[str], output_columns: List[str], split: int = -1) -> FeatureScaler:
+        return FeatureScaler(self.saved_scaler.center, self.saved_scaler.scale, self.saved_scaler.shift,
+                             input_columns, output_columns)
+
 
 class SupervisedTimeseriesTransformer:
     def __init__(self,
@@ -299,6 +622,19 @@ class SupervisedTimeseriesTransformer:
         self.label_offset: int = label_offset
         self.window_width: int = input_width + (output_width + label_offset - input_width)
 
+    def to_dict(self) -> dict:
+        """
+        :return: Returns the arguments the transformer was constructed with.
+        """
+        return {
+            'input_columns': list(self.input_columns),
+            'output_columns': list(self.output_columns),
+            'input_width': self.width_in,
+            'output_width': self.width_out,
+            'stride': self.stride,
+            'label_offset': self.label_offset
+        }
+
     def __call__(self, splits: List[DataSplit]) -> List[TimeseriesData]:
         return [self.__make_timeseries_samples(split) for split in splits]
 
@@ -336,78 +672,393 @@ class SupervisedTimeseriesTransformer:
             sample_set.append_sample(sample, labels)
 
 
+def forecast_metrics(labels: np.ndarray, predictions: np.ndarray, out_cols: List[str], num_steps: int) -> pd.DataFrame:
+    """
+    Computes the error of a set of forecasts for every step of the forecast horizon and every output feature.
+    :param labels: The ground truth of the forecasts. Any shape that holds num_steps * len(out_cols) values per sample.
+    :param predictions: The forecasts made by a model, in the same layout as the labels.
+    :param out_cols: The names of the output features.
+    :param num_steps: The number of steps in the forecast horizon.
+    :return: Returns a data frame indexed by (step, feature) with the mean absolute error 'mae', root mean squared error
+             'rmse', mean absolute percentage error 'mape', and mean signed error 'bias' of the forecasts. MAPE skips
+             labels that are 0.
+    """
+    shape = (len(labels), num_steps, len(out_cols))
+    truth = labels.reshape(shape)
+    error = predictions.reshape(shape) - truth
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_error = np.where(truth != 0, np.abs(error / truth), np.nan)
+        mape = np.nanmean(pct_error, axis=0) * 100 if np.any(truth != 0) else np.full(shape[1:], np.nan)
+    metrics = {
+        'mae': np.mean(np.abs(error), axis=0),
+        'rmse': np.sqrt(np.mean(np.square(error), axis=0)),
+        'mape': mape,
+        'bias': np.mean(error, axis=0)
+    }
+    index = pd.MultiIndex.from_product([range(num_steps), out_cols], names=['step', 'feature'])
+    return pd.DataFrame({name: metric.ravel() for name, metric in metrics.items()}, index=index)
+
+
+def summarize_evaluation(evaluation: pd.DataFrame) -> str:
+    """
+    :param evaluation: The metrics of every split, indexed by (split, step, feature) as the trainers report them.
+    :return: Returns the metrics averaged over the splits, as the table printed in a trainer's report.
+    """
+    return evaluation.groupby(level=['step', 'feature'], sort=False).mean().to_string()
+
+
+class SplitFit:
+    """
+    How a single split was trained by ForecastModelTrainer.
+    """
+
+    def __init__(self,
+                 warm: bool,
+                 seconds: float,
+                 trained_windows: int,
+                 cold_windows: int,
+                 epochs: int = None,
+                 max_epochs: int = None,
+                 best_epoch: int = None):
+        """
+        :param warm: True if the split was trained from the previous split's weights.
+        :param seconds: The wall time the split was trained in.
+        :param trained_windows: The windows trained on times the epochs they were trained for.
+        :param cold_windows: The windows times the epochs the split would have been trained for from scratch.
+        :param epochs: default = None<br/>
+                       The epochs the split was trained for, fewer than **max_epochs** if it was stopped early.
+        :param max_epochs: default = None<br/>
+                           The epochs the split would have been trained for without early stopping.
+        :param best_epoch: default = None<br/>
+                           The epoch, counted from 1, with the lowest monitored loss. A split that was stopped early
+                           keeps the weights of this epoch.
+        """
+        self.warm: bool = warm
+        self.seconds: float = seconds
+        self.trained_windows: int = trained_windows
+        self.cold_windows: int = cold_windows
+        self.epochs: int = epochs
+        self.max_epochs: int = max_epochs
+        self.best_epoch: int = best_epoch
+
+
 class ForecastModelTrainer:
-    def __init__(self, path_to_model: str):
-        with open(path_to_model, 'r') as f:
-            self.model: tf.keras.Model = tf.keras.models.model_from_json(f.read())
-            self.train_evaluation: pd.DataFrame = None
-            self.test_evaluation: pd.DataFrame = None
+    PREDICT_BATCH_SIZE = 1024
+    """
+    Batch size used when predicting the training and testing samples for evaluation.
+    """
+
+    def __init__(self,
+                 path_to_model: str,
+                 jit_compile: bool = False,
+                 registry: SchemaRegistry = SCHEMAS,
+                 profiler: ProfilerCapture = None,
+                 warm_start: bool = False,
+                 warm_epochs: int = None,
+                 replay: float = 0.1,
+                 checkpoint: str = None,
+                 early_stopping: int = None,
+                 reduce_lr: int = None,
+                 lr_factor: float = 0.5,
+                 best_checkpoint: str = None):
+        """
+        | Trains a new model on every split, so each split is evaluated by a model that was only trained on the data up
+          to its own training cutoff.
+        |
+        | With **warm_start**, a split whose training windows extend the previous split's, as ExpandingSplit's do, is
+          trained from the weights of the previous split's model instead. It is trained for **warm_epochs** on only the
+          windows the split added plus a random replay sample of the earlier windows. The model still only sees data up
+          to the split's training cutoff, so the evaluation of every split stays honest. Splits whose training windows
+          do not grow, such as RollingSplit's, are trained from scratch.
+        |
+        | A saved .h5 model is trained further, with the optimizer state it was saved with. If it is the checkpoint of
+          an unfinished run, the run is resumed: the splits before the checkpointed split are skipped, and the
+          checkpointed split continues from the checkpointed epoch up to **epochs**. Otherwise the model is fine tuned
+          for **epochs** more epochs on the first split, which is usually made by CutoffSplit from only the data newer
+          than the model's training cutoff.
+        |
+        | With **early_stopping**, a split stops training once its validation loss, or its training loss if it has no
+          validation set, has not improved for that many epochs, and keeps the weights of its best epoch. **epochs**
+          is then only the most a split is trained for.
+        :param path_to_model: Path to the JSON schema of the model to train, or to a saved model to train further.
+        :param jit_compile: If True, the train, test, and predict steps are compiled with XLA. If XLA cannot compile a
+                            layer of the model, the model is recompiled without XLA and training continues. Versions
+                            of TensorFlow before 2.8 cannot compile training with XLA, and train without it.
+        :param registry: The registry the schema is parsed by and the model to train is taken from.
+        :param profiler: default = None<br/>
+                         If given, a profiler trace is captured of its batch range while the first split is trained.
+        :param warm_start: If True, expanding splits are trained from the previous split's weights.
+        :param warm_epochs: default = None<br/>
+                            The epochs a warm started split is trained for. Defaults to a quarter of the epochs, at
+                            least 1.
+        :param replay: The fraction of the previous split's training windows that are trained on again with the added
+                       windows of a warm started split, so the model does not drift towards the most recent data.
+        :param checkpoint: default = None<br/>
+                           If given, the model and the training state are saved to this .h5 file whenever a split
+                           ends, is canceled, or is interrupted, so an interrupted run can be resumed by training the
+                           checkpoint.
+        :param early_stopping: default = None<br/>
+                               The epochs without improvement a split is stopped after. None trains every epoch.
+        :param reduce_lr: default = None<br/>
+                          The epochs without improvement after which the learning rate is multiplied by
+                          **lr_factor**. None keeps the learning rate.
+        :param lr_factor: The factor the learning rate is reduced by when the loss plateaus.
+        :param best_checkpoint: default = None<br/>
+                                If given, the model is saved to this .h5 file whenever the monitored loss improves, on a
+                                background thread. Every split starts over, so it ends up holding the last split's best
+                                model. The file has no optimizer state, resume from **checkpoint** instead.
+        """
+        self.path_to_model: str = path_to_model
+        self.registry: SchemaRegistry = registry
+        self.profiler: ProfilerCapture = profiler
+        self.checkpoint: str = checkpoint
+        self.resume_state: TrainingState = None
+        if is_saved_model(path_to_model):
+            saved_state = state_path(path_to_model)
+            self.resume_state = TrainingState.load(saved_state) if os.path.isfile(saved_state) \
+                else TrainingState(complete=True)
+        else:
+            # Parses the schema up front so a broken schema is reported before the data is prepared.
+            self.registry.schema(path_to_model)
+        self.state: TrainingState = TrainingState()
+        self.model: tf.keras.Model = None
+        self.train_evaluation: pd.DataFrame = None
+        self.test_evaluation: pd.DataFrame = None
+        self.predictions: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.jit_compile: bool = jit_compile
+        if jit_compile and not _COMPILE_JIT:
+            sysutils.log(__name__).warning('TensorFlow %s cannot compile training with XLA, training without XLA',
+                                           tf.__version__)
+            self.jit_compile = False
+        self.warm_start: bool = warm_start
+        self.warm_epochs: int = warm_epochs
+        self.replay: float = replay
+        self.early_stopping: int = early_stopping
+        self.reduce_lr: int = reduce_lr
+        self.lr_factor: float = lr_factor
+        self.best_checkpoint: str = best_checkpoint
+        self.split_fits: List[SplitFit] = []
 
     def __call__(self,
                  sample_set: List[TimeseriesData],
                  epochs=10,
                  learning_rate=0.001,
                  callbacks: List[tf.keras.callbacks.Callback] = None) -> Tuple[tf.keras.Model, pd.DataFrame, str]:
-        num_features = len(sample_set[0].out_cols)
-        steps_out = sample_set[0].num_steps
-        output_layer = tf.keras.layers.Dense(units=num_features * steps_out)
-        self.model.add(output_layer)
-        if steps_out > 1:
-            self.model.add(tf.keras.layers.Reshape([steps_out, num_features]))
-        self.model.compile(optimizer=tf.optimizers.Adam(learning_rate=learning_rate),
-                           loss=['mae', 'mse'],
-                           metrics=['mae', 'accuracy', 'cosine_similarity'])
+        if self.profiler is not None:
+            callbacks = (callbacks or []) + [self.profiler]
+        warm_epochs = max(1, epochs // 4) if self.warm_epochs is None else self.warm_epochs
+        rng = np.random.default_rng(0)
         history = None
-        for samples in sample_set:
+        train_evaluations, test_evaluations = [], []
+        previous_windows = 0
+        self.split_fits = []
+        resumed, start_split, initial_epoch, stopped = None, 0, 0, False
+        if self.resume_state is not None:
+            resumed = tf.keras.models.load_model(self.path_to_model)
+            initial_epoch = self.resume_state.epoch
+            if not self.resume_state.complete:
+                start_split = self.resume_state.split
+            elif resumed.optimizer is not None:
+                resumed.optimizer.learning_rate.assign(learning_rate)
+        for split, samples in enumerate(sample_set):
+            if split < start_split:
+                continue
+            training = samples.training_samples
+            warm = self.warm_start and 0 < previous_windows < len(training.samples)
+            first_epoch = 0
+            if resumed is not None and split == start_split:
+                self.model = resumed
+                if self.model.optimizer is None:
+                    # Models saved by BestCheckpoint have no optimizer state to continue from.
+                    self.__compile(learning_rate)
+                first_epoch = initial_epoch
+                end_epoch = initial_epoch + epochs if self.resume_state.complete else epochs
+                x, y, split_epochs = training.samples, training.labels, end_epoch
+            elif warm:
+                # Only windows past the previous split's are new, the earlier ones are only sampled for replay.
+                replayed = rng.choice(previous_windows, int(round(previous_windows * self.replay)), replace=False)
+                selected = np.concatenate([np.sort(replayed), np.arange(previous_windows, len(training.samples))])
+                x, y, split_epochs = training.samples[selected], training.labels[selected], warm_epochs
+                # The previous split may have reduced the learning rate on a plateau.
+                self.model.optimizer.learning_rate.assign(learning_rate)
+            elif resumed is not None:
+                # The splits after a resumed one have no schema to build their model from, they start from newly
+                # initialized weights of the resumed model's architecture.
+                self.model = tf.keras.models.clone_model(resumed)
+                self.__compile(learning_rate)
+                x, y, split_epochs = training.samples, training.labels, epochs
+            else:
+                self.model = self.registry.model(self.path_to_model, len(samples.out_cols), samples.num_steps)
+                self.__compile(learning_rate)
+                x, y, split_epochs = training.samples, training.labels, epochs
             val_set = (samples.validation_samples.samples, samples.validation_samples.labels) \
                 if len(samples.validation_samples.samples) > 0 else None
-            self.model.fit(
-                samples.training_samples.samples,
-                samples.training_samples.labels,
-                epochs=epochs,
-                validation_data=val_set,
-                callbacks=callbacks
-            )
+            monitor = 'loss' if val_set is None else 'val_loss'
+            early_stop, best = self.__early_stop(monitor), self.__best_checkpoint(monitor)
+            resume = None if self.checkpoint is None else ResumeCheckpoint(self.checkpoint, split)
+            # Early stopping restores the best weights when training ends, before the resume checkpoint saves them.
+            split_callbacks = (callbacks or []) + \
+                [cb for cb in [early_stop, self.__reduce_lr(monitor), best, resume] if cb]
+            fit_args = dict(x=x, y=y, epochs=split_epochs, initial_epoch=first_epoch, validation_data=val_set,
+                            callbacks=split_callbacks)
+            start = time.perf_counter()
+            try:
+                self.__fit(fit_args, learning_rate)
+            except KeyboardInterrupt:
+                # Keras does not end the callbacks of an interrupted fit, so the split's progress is saved here.
+                if resume is not None:
+                    resume.save()
+                raise
+            trained_epochs = len(self.model.history.epoch)
+            monitored = self.model.history.history.get(monitor, [])
+            best_epoch = first_epoch + int(np.argmin(monitored)) + 1 if len(monitored) > 0 else None
+            self.split_fits.append(SplitFit(warm, time.perf_counter() - start, len(x) * trained_epochs,
+                                            len(training.samples) * epochs, trained_epochs,
+                                            split_epochs - first_epoch, best_epoch))
+            self.state = TrainingState(first_epoch + trained_epochs, split)
+            # A run a callback stopped early, such as a canceled one, is left incomplete so it can be resumed. Early
+            # stopping finishes the split.
+            early_stopped = early_stop is not None and early_stop.stopped_epoch > 0
+            stopped = stopped or (self.model.stop_training and not early_stopped)
+            previous_windows = len(training.samples)
             history = pd.DataFrame(self.model.history.history)
-            train_eval = self.model.evaluate(samples.training_samples.samples,
-                                             samples.training_samples.labels,
-                                             return_dict=True)
-            if self.train_evaluation is None:
-                self.train_evaluation = pd.DataFrame(train_eval, index=[0])
-            else:
-                self.train_evaluation.append(train_eval, ignore_index=True)
-            test_eval = self.model.evaluate(samples.test_samples.samples,
-                                            samples.test_samples.labels,
-                                            return_dict=True)
-            if self.test_evaluation is None:
-                self.test_evaluation = pd.DataFrame(test_eval, index=[0])
-            else:
-                self.test_evaluation.append(test_eval, ignore_index=True)
+            # Each set is predicted once, right after its split is trained. The predictions are reused for the
+            # evaluation metrics and by ModelEvaluationReporter.
+            train_pred = self.__predict(samples.training_samples)
+            test_pred = self.__predict(samples.test_samples)
+            self.predictions.append((train_pred, test_pred))
+            train_evaluations.append((split, forecast_metrics(samples.training_samples.labels, train_pred,
+                                                              samples.out_cols, samples.num_steps)))
+            if len(test_pred) > 0:
+                test_evaluations.append((split, forecast_metrics(samples.test_samples.labels, test_pred,
+                                                                 samples.out_cols, samples.num_steps)))
+            if stopped:
+                # The later splits are left untrained, so the checkpoint and state stay at the stopped split.
+                break
+        self.state.complete = not stopped
+        if self.checkpoint is not None:
+            self.state.save(state_path(self.checkpoint))
 
-        report = 'Training Evaluation:\n' + self.train_evaluation.mean().to_string()
-        report += '\n\nTesting Evaluation:\n' + self.test_evaluation.mean().to_string()
+        self.train_evaluation = pd.concat(dict(train_evaluations), names=['split'])
+        report = 'Training Evaluation:\n' + summarize_evaluation(self.train_evaluation)
+        if len(test_evaluations) > 0:
+            self.test_evaluation = pd.concat(dict(test_evaluations), names=['split'])
+            report += '\n\nTesting Evaluation:\n' + summarize_evaluation(self.test_evaluation)
+        if self.warm_start:
+            report += '\n\n' + self.warm_start_summary()
+        if self.early_stopping is not None:
+            report += '\n\n' + self.early_stopping_summary()
         return self.model, history, report
 
+    def warm_start_summary(self) -> str:
+        """
+        | Compares the time the splits were trained in with the time cold training would have taken. The cold time of a
+          warm started split is estimated from the seconds per trained window of the splits trained from scratch.
+        """
+        warm = [fit for fit in self.split_fits if fit.warm]
+        cold = [fit for fit in self.split_fits if not fit.warm]
+        if len(warm) == 0:
+            return 'Warm Start: no split extended the previous split, every split was trained from scratch.'
+        rate = sum(fit.seconds for fit in cold) / max(sum(fit.trained_windows for fit in cold), 1)
+        actual = sum(fit.seconds for fit in self.split_fits)
+        estimated = sum(fit.seconds for fit in cold) + rate * sum(fit.cold_windows for fit in warm)
+        return f'Warm Start: {len(warm)} of {len(self.split_fits)} splits warm started. Trained in {actual:.1f}s, ' \
+               f'an estimated {estimated:.1f}s cold ({estimated - actual:.1f}s saved).'
+
+    def early_stopping_summary(self) -> str:
+        """
+        | Lists the epochs every split was trained for and its best epoch.
+        """
+        lines = []
+        for split, fit in enumerate(self.split_fits):
+            best = '' if fit.best_epoch is None else f', best epoch {fit.best_epoch}'
+            lines.append(f'  split {split}: trained {fit.epochs} of {fit.max_epochs} epochs{best}')
+        skipped = sum(fit.max_epochs - fit.epochs for fit in self.split_fits)
+        return f'Early Stopping: {skipped} epochs skipped.\n' + '\n'.join(lines)
+
+    def __early_stop(self, monitor: str) -> Optional[tf.keras.callbacks.EarlyStopping]:
+        if self.early_stopping is None:
+            return None
+        return tf.keras.callbacks.EarlyStopping(monitor=monitor, patience=self.early_stopping,
+                                                restore_best_weights=True)
+
+    def __reduce_lr(self, monitor: str) -> Optional[tf.keras.callbacks.ReduceLROnPlateau]:
+        if self.reduce_lr is None:
+            return None
+        return tf.keras.callbacks.ReduceLROnPlateau(monitor=monitor, factor=self.lr_factor, patience=self.reduce_lr)
+
+    def __best_checkpoint(self, monitor: str) -> Optional[BestCheckpoint]:
+        return None if self.best_checkpoint is None else BestCheckpoint(self.best_checkpoint, monitor)
+
+    def __fit(self, fit_args: dict, learning_rate: float):
+        try:
+            self.model.fit(**fit_args)
+        except _XLA_ERRORS as e:
+            if not self.jit_compile:
+                raise
+            # XLA compiles the train step on its first call, before any weights are updated, so the split can simply
+            # be trained again without XLA.
+            sysutils.log(__name__).warning('XLA could not compile the model, training without XLA: %s', e)
+            self.jit_compile = False
+            self.__compile(learning_rate)
+            self.model.fit(**fit_args)
+
+    def __compile(self, learning_rate: float):
+        jit_args = {'jit_compile': True} if self.jit_compile else {}
+        self.model.compile(optimizer=tf.optimizers.Adam(learning_rate=learning_rate),
+                           loss=['mae', 'mse'],
+                           metrics=['mae', 'accuracy', 'cosine_similarity'],
+                           **jit_args)
+
+    def __predict(self, sample_set: SampleSet) -> np.ndarray:
+        if len(sample_set.samples) == 0:
+            return np.array([])
+        return self.model.predict(sample_set.samples, batch_size=self.PREDICT_BATCH_SIZE)
+
 
 class ModelEvaluationReporter:
-    def __init__(self, trained_model: tf.keras.Model, model_history: pd.DataFrame):
+    def __init__(self,
+                 trained_model: tf.keras.Model,
+                 model_history: pd.DataFrame,
+                 predictions: List[Tuple[np.ndarray, np.ndarray]] = None,
+                 train_evaluation: pd.DataFrame = None,
+                 test_evaluation: pd.DataFrame = None):
+        """
+        Writes the model fit of every split to spool files as the splits are reported, so the report is never held in
+        memory as a whole. save copies the spooled reports to their final location.
+        :param trained_model: The model to report on.
+        :param model_history: The learning curve of the model.
+        :param predictions: The (training, testing) predictions of every split made by ForecastModelTrainer. The samples
+                            are predicted here if not given.
+        :param train_evaluation: The training metrics from ForecastModelTrainer, saved with the report if given.
+        :param test_evaluation: The testing metrics from ForecastModelTrainer, saved with the report if given.
+        """
         self.model: tf.keras.Model = trained_model
         self.model_history: pd.DataFrame = model_history
-        self.train_fit: pd.DataFrame = None
-        self.test_fit: pd.DataFrame = None
+        self.predictions: List[Tuple[np.ndarray, np.ndarray]] = predictions
+        self.train_evaluation: pd.DataFrame = train_evaluation
+        self.test_evaluation: pd.DataFrame = test_evaluation
+        self.__spool = tempfile.TemporaryDirectory()
+        self.__train_report = os.path.join(self.__spool.name, 'training_report.csv')
+        self.__test_report = os.path.join(self.__spool.name, 'testing_report.csv')
 
     def __call__(self, sample_set: List[TimeseriesData]):
-        for sample in sample_set:
-            train_df = self.__sample_to_dataframe(sample.training_samples, sample.out_cols)
-            self.train_fit = train_df if self.train_fit is None else self.train_fit.append(train_df)
-            test_df = self.__sample_to_dataframe(sample.test_samples, sample.out_cols)
-            self.test_fit = test_df if self.test_fit is None else self.test_fit.append(test_df)
+        with open(self.__train_report, 'w', newline='') as train_f, open(self.__test_report, 'w', newline='') as test_f:
+            for i, sample in enumerate(sample_set):
+                train_pred, test_pred = self.predictions[i] if self.predictions is not None else (None, None)
+                train_df = self.__sample_to_dataframe(sample.training_samples, sample.out_cols, train_pred)
+                train_df.to_csv(train_f, header=i == 0)
+                test_df = self.__sample_to_dataframe(sample.test_samples, sample.out_cols, test_pred)
+                test_df.to_csv(test_f, header=i == 0)
 
-    def __sample_to_dataframe(self, _set: SampleSet, out_cols: List[str]) -> pd.DataFrame:
+    def __sample_to_dataframe(self, _set: SampleSet, out_cols: List[str], pred: np.ndarray = None) -> pd.DataFrame:
         ground_truth = _set.labels
-        pred = self.model.predict(_set.samples)
         cols = self.__columns(ground_truth.shape, out_cols)
         col_len = len(cols) // 2
+        if len(ground_truth) == 0:
+            return pd.DataFrame(columns=cols)
+        if pred is None:
+            pred = self.model.predict(_set.samples, batch_size=ForecastModelTrainer.PREDICT_BATCH_SIZE)
         model_fit = np.hstack([ground_truth.reshape(-1, col_len), pred.reshape(-1, col_len)])
         return pd.DataFrame(model_fit, columns=cols)
 
@@ -428,20 +1079,81 @@ class ModelEvaluationReporter:
         return cols
 
     def save(self, file_loc: str):
-        self.train_fit.to_csv(f'{file_loc}_training_report.csv')
-        self.test_fit.to_csv(f'{file_loc}_testing_report.csv')
+        shutil.copyfile(self.__train_report, f'{file_loc}_training_report.csv')
+        shutil.copyfile(self.__test_report, f'{file_loc}_testing_report.csv')
         self.model_history.to_csv(f'{file_loc}_learning_curve.csv')
+        if self.train_evaluation is not None:
+            evaluations = {'train': self.train_evaluation}
+            if self.test_evaluation is not None:
+                evaluations['test'] = self.test_evaluation
+            pd.concat(evaluations, names=['set']).to_csv(f'{file_loc}_metrics.csv')
+
+
+def compile_inference(model: tf.keras.Model, jit_compile: bool = False) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    | Wraps a model's forward pass in a tf.function with a fixed input signature, so it is traced once and reused for
+      every call instead of going through the per call overhead of Model.predict. Use for small inputs, such as single
+      windows, where that overhead dominates.
+    :param model: The model to run.
+    :param jit_compile: If True, the forward pass is compiled with XLA. Falls back to the plain tf.function if XLA
+                        cannot compile the model.
+    :return: Returns a function that takes a batch of input windows and returns the model's predictions.
+    """
+    signature = [tf.TensorSpec(shape=[None, *model.input_shape[1:]], dtype=DTYPE)]
+    forward = tf.function(lambda x: model(x, training=False), input_signature=signature)
+    if jit_compile and _FUNCTION_JIT is None:
+        sysutils.log(__name__).warning('TensorFlow %s cannot compile functions with XLA, predicting without XLA',
+                                       tf.__version__)
+        jit_compile = False
+    if not jit_compile:
+        return lambda x: forward(np.asarray(x, dtype=DTYPE)).numpy()
+    jit_forward = tf.function(lambda x: model(x, training=False), input_signature=signature, **{_FUNCTION_JIT: True})
+    active = [jit_forward]
+
+    def predict(x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=DTYPE)
+        try:
+            return active[0](x).numpy()
+        except _XLA_ERRORS as e:
+            if active[0] is forward:
+                raise
+            sysutils.log(__name__).warning('XLA could not compile the model, predicting without XLA: %s', e)
+            active[0] = forward
+            return forward(x).numpy()
+    return predict
 
 
 class ModelForecaster:
-    def __init__(self, model_path: str, test_csv: str):
+    def __init__(self, model_path: str, test_csv: str, jit_compile: bool = False, profiler: ProfilerCapture = None):
+        """
+        :param model_path: Path to a saved model.
+        :param test_csv: Path to the saved input windows to forecast from.
+        :param jit_compile: If True, the forward pass is compiled with XLA.
+        :param profiler: default = None<br/>
+                         If given, a profiler trace is captured of its range of calls to **predict**. The epoch of the
+                         profiler is ignored.
+        """
         self.model: tf.keras.Model = tf.keras.models.load_model(model_path)
-        self.test_np = np.load(test_csv)
+        self.test_np = np.load(test_csv).astype(DTYPE, copy=False)
+        self.profiler: ProfilerCapture = profiler
+        self.__predict: Callable[[np.ndarray], np.ndarray] = compile_inference(self.model, jit_compile)
+        self.__step: int = 0
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        if self.profiler is None:
+            return self.__predict(x)
+        step = self.__step
+        self.__step += 1
+        self.profiler.begin_step(step)
+        try:
+            return self.__predict(x)
+        finally:
+            self.profiler.end_step(step)
 
     def forecast(self, time_horizon: int):
         # Currently does not work and needs to be implemented.
         model_in_shape = self.model.input_shape
-        curr = self.model.predict(self.test_np)
+        curr = self.predict(self.test_np)
         for _ in range(time_horizon):
             curr = np.atleast_3d(curr[-1]) if curr.ndim < len(model_in_shape) else np.expand_dims(curr[-1], 1)
-            print(self.model.predict(curr))
+            print(self.predict(curr))
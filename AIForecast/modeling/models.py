@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import threading
+from os import path as filesys
+from typing import Dict, Tuple
+
+import tensorflow as tf
+
+
+class SchemaRegistry:
+    """
+    | Parses model schema files once and hands out untrained copies of them.
+    |
+    | A schema is parsed the first time it is requested and kept keyed by its path and the hash of its content, so an
+      edited schema file is parsed again while an unchanged one never is. For every output shape a model is requested
+      with, a template of the schema with the output head attached is kept as well. Requested models are clones of
+      that template, so every trial of a sweep or split of a run gets a fresh model with newly initialized weights
+      without parsing the schema or assembling the head again.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__hashes: Dict[str, Tuple[int, int, str]] = {}
+        self.__schemas: Dict[Tuple[str, str], tf.keras.Model] = {}
+        self.__templates: Dict[Tuple[str, str, int, int], tf.keras.Model] = {}
+
+    def schema(self, schema_path: str) -> tf.keras.Model:
+        """
+        :param schema_path: Path to a JSON model schema.
+        :return: Returns the parsed schema. The returned model is shared and must not be trained or modified; use
+                 **model** to get a model to train.
+        """
+        key = self.__key(schema_path)
+        with self.__lock:
+            if key not in self.__schemas:
+                with open(key[0], 'r') as f:
+                    self.__schemas[key] = tf.keras.models.model_from_json(f.read())
+            return self.__schemas[key]
+
+    def model(self, schema_path: str, num_features: int, num_steps: int) -> tf.keras.Model:
+        """
+        | Creates an untrained model from a schema with an output head for the given output shape. The head is a Dense
+          layer with one unit per feature and step, followed by a Reshape to (steps, features) if more than one step
+          is forecast.
+        :param schema_path: Path to a sequential JSON model schema.
+        :param num_features: The number of features the model forecasts.
+        :param num_steps: The number of time steps the model forecasts.
+        :return: Returns a new, uncompiled model with freshly initialized weights.
+        """
+        schema = self.schema(schema_path)
+        key = self.__key(schema_path) + (num_features, num_steps)
+        with self.__lock:
+            if key not in self.__templates:
+                template = tf.keras.models.clone_model(schema)
+                template.add(tf.keras.layers.Dense(units=num_features * num_steps))
+                if num_steps > 1:
+                    template.add(tf.keras.layers.Reshape([num_steps, num_features]))
+                self.__templates[key] = template
+            return tf.keras.models.clone_model(self.__templates[key])
+
+    def clear(self):
+        """
+        Drops every parsed schema and template.
+        """
+        with self.__lock:
+            self.__hashes.clear()
+            self.__schemas.clear()
+            self.__templates.clear()
+
+    def __key(self, schema_path: str) -> Tuple[str, str]:
+        schema_path = filesys.abspath(schema_path)
+        stat = os.stat(schema_path)
+        with self.__lock:
+            cached = self.__hashes.get(schema_path)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                return schema_path, cached[2]
+        # The file is only hashed again when its modification time or size changes.
+        with open(schema_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with self.__lock:
+            self.__hashes[schema_path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return schema_path, digest
+
+
+SCHEMAS = SchemaRegistry()
+"""
+The registry shared by every trainer in the application.
+"""
+KERAS_TRAINER = 'keras'
+
+
+def schema_trainer(schema_path: str) -> str:
+    """
+    | Keras model JSON is trained by ForecastModelTrainer. Schemas of other kinds of models name the trainer of their
+      models under 'trainer', such as the 'xgboost' schemas of boosting.BoostedForecastTrainer.
+    :return: Returns the trainer a JSON schema is trained with.
+    """
+    with open(schema_path, 'r') as f:
+        schema = json.load(f)
+    return schema.get('trainer', KERAS_TRAINER) if isinstance(schema, dict) else KERAS_TRAINER
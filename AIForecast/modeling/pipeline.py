@@ -0,0 +1,248 @@
+import copy
+import hashlib
+from typing import Any, Callable, Dict, List, Tuple
+
+import pandas as pd
+import tensorflow as tf
+
+from AIForecast.modeling.checkpoints import TrainingState
+from AIForecast.modeling.dataprocessing import CutoffSplit, DataImputer, DataSplit, FeatureGenerator, FeatureScaler, \
+    ForecastModelTrainer, SavedNormalizer, SupervisedTimeseriesTransformer, TimeseriesData
+from AIForecast.modeling.profiling import RunProfile
+
+
+class Pipeline:
+    """
+    | Chains the data processing stages of a training run: imputer, features, split, normalizer, and transformer. Each
+      stage is declared with its parameters and only evaluated when its output is needed. The features stage is
+      optional, and skipped unless it is set.
+    |
+    | The output of every stage is memoized by a fingerprint of its parameters and the fingerprint of the stage before
+      it. Evaluating the pipeline again only re-runs the stages whose parameters, or whose upstream stages' parameters,
+      changed since the last evaluation. Changing the transformer's input width re-runs only windowing, while changing
+      the imputer re-runs every stage.
+    |
+    | Training is not memoized, since every training run starts from newly initialized weights.
+    """
+
+    STAGES = ['imputer', 'features', 'split', 'normalizer', 'transformer']
+    OPTIONAL_STAGES = {'features'}
+
+    def __init__(self, data: pd.DataFrame = None):
+        self.__data: pd.DataFrame = None
+        self.__data_fingerprint: str = ''
+        self.__stages: Dict[str, Tuple[str, Callable[[Any], Any]]] = {}
+        self.__memo: Dict[str, Tuple[str, Any]] = {}
+        self.__normalizer = None
+        self.__transformer: SupervisedTimeseriesTransformer = None
+        self.__features: FeatureGenerator = None
+        if data is not None:
+            self.set_data(data)
+
+    def set_data(self, data: pd.DataFrame) -> 'Pipeline':
+        """
+        Sets the data the pipeline runs on. Data with the same content as the current data keeps every memoized stage.
+        """
+        hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+        columns = repr([(str(col), str(dtype)) for col, dtype in data.dtypes.items()])
+        self.__data = data
+        self.__data_fingerprint = _fingerprint(columns, hashed.tobytes())
+        return self
+
+    def data_fingerprint(self) -> str:
+        """
+        :return: Returns the fingerprint of the data's columns, types, index, and values, which is the same for data
+                 with the same content.
+        """
+        return self.__data_fingerprint
+
+    def impute(self, imputer: str) -> 'Pipeline':
+        return self.set_stage('imputer', lambda data: DataImputer(imputer)(data), DataImputer, imputer)
+
+    def features(self, generator: FeatureGenerator = None) -> 'Pipeline':
+        """
+        | Derives features from the imputed data before it is split. The rows the features look back over are dropped,
+          so every split starts with complete features.
+        :param generator: default = None<br/>
+                          None - removes the features stage, so the imputed data is split as is.
+        """
+        self.__features = generator
+        if generator is None:
+            self.__stages.pop('features', None)
+            self.__memo.pop('features', None)
+            return self
+        return self.set_stage('features', generator, FeatureGenerator, generator.to_dict())
+
+    def split(self, split_type: type, *args, **kwargs) -> 'Pipeline':
+        """
+        :param split_type: StraightSplit, RollingSplit, ExpandingSplit, or another class that is constructed with
+                           **args** and **kwargs** and called with the imputed data.
+        """
+        return self.set_stage('split', lambda data: split_type(*args, **kwargs)(data), split_type, args, kwargs)
+
+    def normalize(self, normalizer_type: type, *args, **kwargs) -> 'Pipeline':
+        """
+        :param normalizer_type: default = None<br/>
+                                ZStandardizer, MinMaxNormalizer, or another class constructed with the splits,
+                                **args**, and **kwargs**.<br/>
+                                None - the splits are not normalized.
+        """
+        def normalize(splits: List[DataSplit]) -> List[DataSplit]:
+            if normalizer_type is None:
+                self.__normalizer = None
+                return splits
+            # Normalizers replace the frames of the splits they are given, so they are given copies to keep the
+            # memoized splits unnormalized.
+            self.__normalizer = normalizer_type([copy.copy(split) for split in splits], *args, **kwargs)
+            return self.__normalizer()
+        return self.set_stage('normalizer', normalize, normalizer_type, args, kwargs)
+
+    def transform(self, *args, **kwargs) -> 'Pipeline':
+        """
+        Sets the parameters of the SupervisedTimeseriesTransformer that windows the normalized splits.
+        """
+        self.__transformer = SupervisedTimeseriesTransformer(*args, **kwargs)
+        return self.set_stage('transformer', self.__transformer, SupervisedTimeseriesTransformer, args, kwargs)
+
+    def fine_tune(self, state: TrainingState, scaler: FeatureScaler) -> 'Pipeline':
+        """
+        | Sets the features, split, normalizer, and transformer stages to make the windows a saved model is fine tuned
+          on: only the rows after the model's training cutoff, with the features the model was trained on, normalized
+          with the model's saved scaler, and windowed the way the model was trained.
+        :param state: The training state saved with the model.
+        :param scaler: The scaler saved with the model.
+        :raises ValueError: raised if the state has no training cutoff or transformer.
+        """
+        if state.training_cutoff is None or state.transformer is None:
+            raise ValueError('The model was saved without a training cutoff, so its new data is not known.')
+        cutoff = state.cutoff_label(self.__data.index) if self.__data is not None else state.training_cutoff
+        transformer = state.transformer
+        self.split(CutoffSplit, cutoff, transformer['label_offset'],
+                   transformer['label_offset'] + transformer['output_width'] - transformer['input_width'])
+        self.normalize(SavedNormalizer, scaler)
+        self.features(None if state.features is None else FeatureGenerator(**state.features))
+        return self.transform(**transformer)
+
+    def set_stage(self, name: str, stage: Callable[[Any], Any], *params) -> 'Pipeline':
+        """
+        | Sets a stage of the pipeline. The stage is not run until its output, or the output of a later stage, is
+          requested.
+        :param name: One of STAGES.
+        :param stage: Takes the output of the previous stage, or the data for the first stage, and returns its output.
+        :param params: Everything the output of the stage depends on, besides its input. Their repr is fingerprinted.
+        """
+        if name not in self.STAGES:
+            raise ValueError(f'"{name}" is not a stage of the pipeline. Stages are {self.STAGES}.')
+        self.__stages[name] = (_fingerprint(name, *[_describe(param) for param in params]), stage)
+        return self
+
+    def output(self, name: str, profile: RunProfile = None) -> Any:
+        """
+        | Evaluates the pipeline up to and including a stage. Memoized stages are not run again.
+        :param name: One of STAGES.
+        :param profile: default = None<br/>
+                        If given, every stage that runs is recorded in the profile.
+        :return: Returns the output of the stage.
+        :raises ValueError: raised if the data or a stage up to the requested stage has not been set.
+        """
+        if self.__data is None:
+            raise ValueError('The pipeline has no data.')
+        output, fingerprint = self.__data, self.__data_fingerprint
+        for stage_name in self.STAGES[:self.STAGES.index(name) + 1]:
+            if stage_name in self.OPTIONAL_STAGES and stage_name not in self.__stages and stage_name != name:
+                continue
+            if stage_name not in self.__stages:
+                raise ValueError(f'The {stage_name} stage of the pipeline has not been set.')
+            params, stage = self.__stages[stage_name]
+            fingerprint = _fingerprint(fingerprint, params)
+            memo = self.__memo.get(stage_name)
+            if memo is not None and memo[0] == fingerprint:
+                output = memo[1]
+                continue
+            run = stage if profile is None else profile.wrap(stage, stage_name)
+            output = run(output)
+            self.__memo[stage_name] = (fingerprint, output)
+        return output
+
+    def is_memoized(self, name: str) -> bool:
+        """
+        :return: Returns True if the stage's output is memoized for its current parameters and upstream stages.
+        """
+        if self.__data is None:
+            return False
+        fingerprint = self.__data_fingerprint
+        for stage_name in self.STAGES[:self.STAGES.index(name) + 1]:
+            if stage_name in self.OPTIONAL_STAGES and stage_name not in self.__stages and stage_name != name:
+                continue
+            if stage_name not in self.__stages:
+                return False
+            fingerprint = _fingerprint(fingerprint, self.__stages[stage_name][0])
+        memo = self.__memo.get(name)
+        return memo is not None and memo[0] == fingerprint
+
+    def timeseries(self, profile: RunProfile = None) -> List[TimeseriesData]:
+        """
+        :return: Returns the windowed samples of every split, the output of the transformer stage.
+        """
+        return self.output('transformer', profile)
+
+    def train(self,
+              trainer: ForecastModelTrainer,
+              epochs: int = 10,
+              learning_rate: float = 0.001,
+              callbacks: List[tf.keras.callbacks.Callback] = None,
+              profile: RunProfile = None) -> Tuple[tf.keras.Model, pd.DataFrame, str]:
+        """
+        Evaluates the pipeline and trains a model on the windowed samples.
+        :return: Returns the trained model, its training history, and the evaluation report of the trainer.
+        """
+        timeseries = self.timeseries(profile)
+        run = trainer if profile is None else profile.wrap(trainer)
+        return run(timeseries, epochs, learning_rate, callbacks)
+
+    def scaler(self) -> FeatureScaler:
+        """
+        | Evaluates the pipeline up to the normalizer.
+        :return: Returns the normalization of the last split for the transformer's input and output columns, or None if
+                 the splits are not normalized.
+        """
+        self.output('normalizer')
+        if self.__normalizer is None or self.__transformer is None:
+            return None
+        return self.__normalizer.scaler(self.__transformer.input_columns, self.__transformer.output_columns)
+
+    def training_state(self, epoch: int) -> TrainingState:
+        """
+        :param epoch: The number of epochs the model was trained for.
+        :return: Returns the state a model trained on the pipeline is saved with, with the last training row of the
+                 last split as its training cutoff.
+        """
+        splits = self.output('split')
+        cutoff = splits[-1].train_split.index[-1] if len(splits) > 0 and len(splits[-1].train_split) > 0 else None
+        transformer = None if self.__transformer is None else self.__transformer.to_dict()
+        features = None if self.__features is None else self.__features.to_dict()
+        return TrainingState(epoch, len(splits) - 1, True, cutoff, transformer, features)
+
+    def clear(self):
+        """
+        Drops every memoized stage output.
+        """
+        self.__memo.clear()
+
+
+def _describe(param) -> str:
+    if isinstance(param, type):
+        return f'{param.__module__}.{param.__qualname__}'
+    if isinstance(param, dict):
+        return repr(sorted((key, _describe(value)) for key, value in param.items()))
+    if isinstance(param, (list, tuple)):
+        return repr([_describe(value) for value in param])
+    return repr(param)
+
+
+def _fingerprint(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
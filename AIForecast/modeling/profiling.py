@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from AIForecast.modeling.dataprocessing import DataSplit, SampleSet, TimeseriesData
+
+PROFILE_MEMORY_VARIABLE = 'AIFORECAST_PROFILE_MEMORY'
+"""
+Environment variable that turns on tracing the peak memory of the stages of training runs started from the application,
+when set to 1. Tracing slows training down by about half, so it is off by default.
+"""
+
+
+def memory_profiling_enabled() -> bool:
+    """
+    :return: Returns True if PROFILE_MEMORY_VARIABLE turns memory tracing on.
+    """
+    return os.environ.get(PROFILE_MEMORY_VARIABLE, '0').strip().lower() in {'1', 'true', 'yes'}
+
+
+class StageProfile:
+    """
+    The measurements of a single run of a pipeline stage.
+    """
+
+    def __init__(self, name: str, start: float, depth: int):
+        self.name: str = name
+        self.start: float = start
+        self.depth: int = depth
+        self.thread: int = threading.get_ident()
+        self.wall_time: float = 0.0
+        self.cpu_time: float = 0.0
+        self.peak_memory: int = None
+        self.output_bytes: int = 0
+        self.output_shapes: List[tuple] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'start': self.start,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'peak_memory': self.peak_memory,
+            'output_bytes': self.output_bytes,
+            'output_shapes': [list(shape) for shape in self.output_shapes]
+        }
+
+
+class RunProfile:
+    """
+    | Records the wall time, CPU time, peak memory, and output size of every stage of a training run.
+    |
+    | Wrap a stage callable with **wrap**, or a block of code with **stage**, and every call is recorded as a
+      StageProfile. Stages may be nested; a stage's measurements include the stages nested inside it.
+    |
+    | CPU time is the CPU time of the whole process, so it includes the threads TensorFlow trains on. Peak memory is
+      measured with tracemalloc as the most memory allocated above what was allocated when the stage started. It covers
+      Python and NumPy allocations, but not memory TensorFlow allocates natively.
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        """
+        :param trace_memory: If True, peak memory is traced while a stage runs. Tracing slows down Python code that
+                             allocates many small objects.
+        """
+        self.trace_memory: bool = trace_memory
+        self.stages: List[StageProfile] = []
+        self.__origin: float = time.perf_counter()
+        self.__depth: int = 0
+        self.__peaks: List[int] = []
+        self.__started_tracing: bool = False
+
+    def wrap(self, stage: Callable, name: str = None) -> Callable:
+        """
+        :param stage: A pipeline stage, or any other callable.
+        :param name: default = None<br/>
+                     The name the stage is recorded under. Defaults to the class name of the stage.
+        :return: Returns a callable that runs the stage and records every call to it.
+        """
+        name = type(stage).__name__ if name is None else name
+
+        def profiled(*args, **kwargs):
+            with self.stage(name) as record:
+                output = stage(*args, **kwargs)
+                record.output_bytes, record.output_shapes = output_size(output)
+            return output
+        return profiled
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        | Records the block of code run inside the context as a stage.
+        :param name: The name the stage is recorded under.
+        :return: Yields the StageProfile of the stage, which the output size may be set on.
+        """
+        record = StageProfile(name, time.perf_counter() - self.__origin, self.__depth)
+        self.stages.append(record)
+        tracing = self.trace_memory and self.__start_tracing()
+        start_memory = tracemalloc.get_traced_memory()[0] if tracing else 0
+        self.__depth += 1
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            self.__depth -= 1
+            record.wall_time = time.perf_counter() - wall
+            record.cpu_time = time.process_time() - cpu
+            if tracing:
+                record.peak_memory = max(self.__stop_tracing() - start_memory, 0)
+
+    def total(self) -> Dict[str, float]:
+        """
+        :return: Returns the wall and CPU time of the top level stages combined.
+        """
+        top = [stage for stage in self.stages if stage.depth == 0]
+        return {'wall_time': sum(stage.wall_time for stage in top), 'cpu_time': sum(stage.cpu_time for stage in top)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'stages': [stage.to_dict() for stage in self.stages], 'total': self.total()}
+
+    def save(self, path: str):
+        """
+        Writes the profile as JSON.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def save_chrome_trace(self, path: str):
+        """
+        Writes the profile in the Chrome trace event format, which can be opened in chrome://tracing or Perfetto.
+        """
+        events = []
+        for stage in self.stages:
+            events.append({
+                'name': stage.name,
+                'ph': 'X',
+                'ts': stage.start * 1e6,
+                'dur': stage.wall_time * 1e6,
+                'pid': os.getpid(),
+                'tid': stage.thread,
+                'args': {
+                    'cpu_time_ms': stage.cpu_time * 1e3,
+                    'peak_memory': stage.peak_memory,
+                    'output_bytes': stage.output_bytes
+                }
+            })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def __str__(self):
+        lines = [f'{"Stage":<36}{"Wall (s)":>10}{"CPU (s)":>10}{"Peak (MB)":>11}{"Output (MB)":>13}']
+        for stage in self.stages:
+            peak = '' if stage.peak_memory is None else f'{stage.peak_memory / 2 ** 20:.1f}'
+            lines.append(f'{"  " * stage.depth + stage.name:<36}{stage.wall_time:>10.3f}{stage.cpu_time:>10.3f}'
+                         f'{peak:>11}{stage.output_bytes / 2 ** 20:>13.1f}')
+        total = self.total()
+        lines.append(f'{"Total":<36}{total["wall_time"]:>10.3f}{total["cpu_time"]:>10.3f}')
+        return '\n'.join(lines)
+
+    def __start_tracing(self) -> bool:
+        if not tracemalloc.is_tracing():
+            if len(self.__peaks) > 0:
+                # Tracing was stopped by someone else while an outer stage was running.
+                return False
+            tracemalloc.start()
+            self.__started_tracing = True
+        elif len(self.__peaks) > 0:
+            # The outer stage's peak so far is kept before the peak is reset for this stage.
+            self.__peaks[-1] = max(self.__peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.__peaks.append(0)
+        return True
+
+    def __stop_tracing(self) -> int:
+        peak = max(self.__peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if len(self.__peaks) > 0:
+            self.__peaks[-1] = max(self.__peaks[-1], peak)
+        elif self.__started_tracing:
+            tracemalloc.stop()
+            self.__started_tracing = False
+        return peak
+
+
+def output_size(output) -> Tuple[int, List[tuple]]:
+    """
+    | Measures the arrays a pipeline stage returned. Data frames, NumPy arrays, splits, sample sets, and Keras models
+      are measured, including inside lists, tuples, and dicts. A data frame shared by several splits is counted once.
+    :return: Returns the total size in bytes and the shapes of the measured arrays.
+    """
+    seen = set()
+    shapes = []
+
+    def measure(value) -> int:
+        if value is None or id(value) in seen:
+            return 0
+        seen.add(id(value))
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            shapes.append(value.shape)
+            return int(value.memory_usage(index=False).sum()) if isinstance(value, pd.DataFrame) \
+                else int(value.memory_usage(index=False))
+        if isinstance(value, np.ndarray):
+            shapes.append(value.shape)
+            return value.nbytes
+        if isinstance(value, DataSplit):
+            return sum(measure(split) for split in (value.train_split, value.validation_split, value.test_split))
+        if isinstance(value, TimeseriesData):
+            return sum(measure(samples)
+                       for samples in (value.training_samples, value.validation_samples, value.test_samples))
+        if isinstance(value, SampleSet):
+            return measure(value.samples) + measure(value.labels)
+        if isinstance(value, tf.keras.Model):
+            shapes.extend(tuple(weight.shape) for weight in value.weights)
+            return sum(int(np.prod(weight.shape)) * weight.dtype.size for weight in value.weights)
+        if isinstance(value, dict):
+            return sum(measure(item) for item in value.values())
+        if isinstance(value, (list, tuple)):
+            return sum(measure(item) for item in value)
+        return 0
+    return measure(output), shapes
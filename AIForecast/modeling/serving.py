@@ -0,0 +1,314 @@
+"""
+| A local HTTP inference service for saved forecast models.
+|
+| Requests are coalesced into micro-batches: a request waits at most the latency budget for other requests to arrive,
+  and every window that arrived in that time is predicted with a single call to the model.
+|
+| Endpoints:
+| POST /predict - input windows as JSON, {"windows": [[[...]]]}, or as a .npy array with the content type
+  application/x-npy. Answers in the same format, {"predictions": [...]} or a .npy array.
+| GET /metrics - request count, p50 and p99 latency in milliseconds, and the histogram of batch sizes.
+| GET /health - answers {"status": "ok"} once the model is loaded.
+|
+| Run with: python -m AIForecast.modeling.serving <model.h5> [--port 8080] [--max-batch-size 64] [--max-latency-ms 5]
+"""
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path as filesys
+from typing import Callable, Dict, List
+
+import numpy as np
+import tensorflow as tf
+
+from AIForecast import sysutils
+from AIForecast.modeling.dataprocessing import DTYPE, FeatureScaler, compile_inference
+from AIForecast.sysutils.logconfig import configure_logging
+
+NPY_CONTENT_TYPE = 'application/x-npy'
+JSON_CONTENT_TYPE = 'application/json'
+LATENCY_WINDOW = 10000
+"""
+Number of most recent requests the latency percentiles are computed over.
+"""
+
+
+class ServingMetrics:
+    """
+    Thread safe request latency and batch size statistics of a server.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.__lock = threading.Lock()
+        self.__latencies: deque = deque(maxlen=window)
+        self.__batch_sizes: Counter = Counter()
+        self.__requests: int = 0
+        self.__errors: int = 0
+
+    def record_request(self, latency: float, failed: bool = False):
+        with self.__lock:
+            self.__requests += 1
+            self.__errors += int(failed)
+            self.__latencies.append(latency)
+
+    def record_batch(self, size: int):
+        with self.__lock:
+            self.__batch_sizes[size] += 1
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            latencies = np.array(self.__latencies) * 1000
+            batch_sizes = dict(sorted(self.__batch_sizes.items()))
+            requests, errors = self.__requests, self.__errors
+        percentiles = np.percentile(latencies, [50, 99]) if len(latencies) > 0 else [None, None]
+        return {
+            'requests': requests,
+            'errors': errors,
+            'latency_ms': {'p50': percentiles[0], 'p99': percentiles[1]},
+            'batch_sizes': {str(size): count for size, count in batch_sizes.items()}
+        }
+
+
+class _Request:
+    def __init__(self, windows: np.ndarray):
+        self.windows: np.ndarray = windows
+        self.done = threading.Event()
+        self.result: np.ndarray = None
+        self.error: Exception = None
+
+
+class MicroBatcher:
+    """
+    | Coalesces concurrent prediction requests into batches. A single worker thread takes the first waiting request,
+      collects further requests until **max_batch_size** windows are collected or **max_latency** seconds have passed
+      since the first request was taken, and predicts all of them with one call.
+    """
+
+    def __init__(self,
+                 predict: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = 64,
+                 max_latency: float = 0.005,
+                 metrics: ServingMetrics = None):
+        self.predict: Callable[[np.ndarray], np.ndarray] = predict
+        self.max_batch_size: int = max_batch_size
+        self.max_latency: float = max_latency
+        self.metrics: ServingMetrics = ServingMetrics() if metrics is None else metrics
+        self.__queue: queue.Queue = queue.Queue()
+        self.__worker = threading.Thread(target=self.__run, daemon=True)
+        self.__running: bool = True
+        self.__worker.start()
+
+    def submit(self, windows: np.ndarray) -> np.ndarray:
+        """
+        Predicts a batch of windows together with any other windows submitted at the same time.
+        :param windows: One or more input windows, batched along the first axis.
+        :return: Returns the predictions of the windows.
+        """
+        request = _Request(windows)
+        self.__queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def close(self):
+        self.__running = False
+        self.__queue.put(None)
+        self.__worker.join()
+
+    def __run(self):
+        while self.__running:
+            request = self.__queue.get()
+            if request is None:
+                break
+            batch = [request]
+            size = len(request.windows)
+            deadline = time.perf_counter() + self.max_latency
+            while size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.__queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self.__running = False
+                    break
+                batch.append(request)
+                size += len(request.windows)
+            self.__predict(batch)
+
+    def __predict(self, batch: List[_Request]):
+        try:
+            windows = np.concatenate([request.windows for request in batch]) if len(batch) > 1 else batch[0].windows
+            self.metrics.record_batch(len(windows))
+            predictions = self.predict(windows)
+            offset = 0
+            for request in batch:
+                request.result = predictions[offset:offset + len(request.windows)]
+                offset += len(request.windows)
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        for request in batch:
+            request.done.set()
+
+
+class ForecastServer:
+    """
+    | Serves a saved model over HTTP on localhost. If a scaler was saved next to the model, as <model>_scaler.json,
+      requests take raw input windows and get predictions in the scale of the data. Otherwise windows must already be
+      normalized the way the model was trained.
+    """
+
+    def __init__(self,
+                 model_path: str,
+                 scaler_path: str = None,
+                 host: str = '127.0.0.1',
+                 port: int = 8080,
+                 max_batch_size: int = 64,
+                 max_latency: float = 0.005):
+        """
+        :param model_path: Path to a saved .h5 model.
+        :param scaler_path: default = None<br/>
+                            Path to the scaler statistics of the model. Defaults to <model>_scaler.json if it exists.
+        :param host: The address the server listens on.
+        :param port: The port the server listens on. 0 picks a free port.
+        :param max_batch_size: The most windows predicted in a single call to the model.
+        :param max_latency: The most seconds a request waits for other requests to batch with.
+        """
+        self.model: tf.keras.Model = tf.keras.models.load_model(model_path)
+        if scaler_path is None:
+            default_scaler = filesys.splitext(model_path)[0] + '_scaler.json'
+            scaler_path = default_scaler if filesys.isfile(default_scaler) else None
+        self.scaler: FeatureScaler = None if scaler_path is None else FeatureScaler.load(scaler_path)
+        self.window_shape = tuple(self.model.input_shape[1:])
+        self.metrics = ServingMetrics()
+        self.__forward: Callable[[np.ndarray], np.ndarray] = None
+        self.batcher = MicroBatcher(self.__predict, max_batch_size, max_latency, self.metrics)
+        self.httpd = ThreadingHTTPServer((host, port), self.__handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def address(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def serve_forever(self):
+        sysutils.log(__name__).info('Serving %s windows at %s', self.window_shape, self.address)
+        self.httpd.serve_forever()
+
+    def start(self) -> threading.Thread:
+        """
+        Serves requests on a background thread.
+        """
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.batcher.close()
+
+    def predict(self, windows: np.ndarray) -> np.ndarray:
+        """
+        Predicts windows through the micro-batcher, the same way an HTTP request is predicted.
+        """
+        windows = np.asarray(windows, dtype=DTYPE)
+        if windows.shape == self.window_shape:
+            windows = windows[np.newaxis]
+        if windows.shape[1:] != self.window_shape:
+            raise ValueError(f'Expected windows of shape {self.window_shape}, got {windows.shape[1:]}.')
+        return self.batcher.submit(windows)
+
+    def __predict(self, windows: np.ndarray) -> np.ndarray:
+        if self.__forward is None:
+            # Compiled on first use, by the batching thread, so the server starts listening without waiting for it.
+            self.__forward = compile_inference(self.model)
+        if self.scaler is not None:
+            windows = self.scaler.scale_inputs(windows)
+        predictions = np.asarray(self.__forward(windows))
+        return predictions if self.scaler is None else self.scaler.unscale_outputs(predictions)
+
+    def __handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    self.__send_json(200, server.metrics.snapshot())
+                elif self.path == '/health':
+                    self.__send_json(200, {'status': 'ok'})
+                else:
+                    self.__send_json(404, {'error': f'{self.path} not found'})
+
+            def do_POST(self):
+                if self.path != '/predict':
+                    self.__send_json(404, {'error': f'{self.path} not found'})
+                    return
+                start = time.perf_counter()
+                failed = True
+                try:
+                    body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                    is_npy = self.headers.get('Content-Type', '').startswith(NPY_CONTENT_TYPE)
+                    windows = np.load(io.BytesIO(body), allow_pickle=False) if is_npy \
+                        else np.array(json.loads(body)['windows'], dtype=DTYPE)
+                    predictions = server.predict(windows)
+                    failed = False
+                except (ValueError, KeyError, TypeError) as e:
+                    self.__send_json(400, {'error': str(e)})
+                    return
+                except Exception as e:
+                    self.__send_json(500, {'error': str(e)})
+                    return
+                finally:
+                    server.metrics.record_request(time.perf_counter() - start, failed)
+                if is_npy:
+                    out = io.BytesIO()
+                    np.save(out, predictions)
+                    self.__send(200, out.getvalue(), NPY_CONTENT_TYPE)
+                else:
+                    self.__send_json(200, {'predictions': predictions.tolist()})
+
+            def log_message(self, format, *args):
+                sysutils.log(__name__).debug(format, *args)
+
+            def __send_json(self, status: int, content: Dict):
+                self.__send(status, json.dumps(content).encode(), JSON_CONTENT_TYPE)
+
+            def __send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serves a saved forecast model on localhost.')
+    parser.add_argument('model_path')
+    parser.add_argument('--scaler', default=None, help='Defaults to <model>_scaler.json next to the model.')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-latency-ms', type=float, default=5.0)
+    parser.add_argument('--log-level', default='INFO', help='DEBUG also logs every request.')
+    args = parser.parse_args()
+    configure_logging(args.log_level.upper(), console_level=args.log_level.upper())
+    server = ForecastServer(args.model_path, args.scaler, port=args.port, max_batch_size=args.max_batch_size,
+                            max_latency=args.max_latency_ms / 1000)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+| Exports saved models to TensorFlow Lite, and forecasts with the TFLite interpreter instead of the full TensorFlow
+  runtime. An exported model loads faster and has far less overhead per call, which is what single window forecasts
+  are dominated by.
+|
+| The converter only fuses LSTM layers into a TFLite LSTM op for a fixed batch size, so models are exported with a
+  fixed batch size, 1 by default. Larger inputs are predicted in batches of that size.
+|
+| Export with: python -m AIForecast.modeling.tflite <model.h5> [--quantize] [--batch-size 1] [--windows test.npy]
+"""
+import argparse
+import threading
+from os import path as filesys
+from typing import Union
+
+import numpy as np
+import tensorflow as tf
+
+from AIForecast import sysutils
+from AIForecast.modeling.dataprocessing import DTYPE
+
+TFLITE_EXTENSION = '.tflite'
+PARITY_TOLERANCE = 1e-3
+"""
+Largest absolute difference from the Keras model's predictions that an export without quantization is expected to
+have. Dynamic range quantization stores the weights as 8 bit integers, so its difference depends on the weights.
+"""
+
+
+def tflite_path(model_path: str, quantize: bool = False) -> str:
+    """
+    :return: Returns the path a saved model is exported to, <model>.tflite or <model>_quantized.tflite.
+    """
+    return filesys.splitext(model_path)[0] + ('_quantized' if quantize else '') + TFLITE_EXTENSION
+
+
+def export_tflite(model: Union[tf.keras.Model, str],
+                  path: str = None,
+                  quantize: bool = False,
+                  batch_size: int = 1) -> str:
+    """
+    | Converts a Keras model to a TFLite model.
+    :param model: A Keras model, or the path to a saved one.
+    :param path: default = None<br/>
+                 The path the TFLite model is written to. Defaults to tflite_path of the saved model.
+    :param quantize: If True, the weights are quantized to 8 bit integers with dynamic range quantization, which makes
+                     the model about four times smaller. Activations stay in floating point. Weight tensors of at
+                     most 1024 elements are not quantized, which includes every gate of the schema's 32 unit LSTM.
+    :param batch_size: The number of windows the exported model takes per call.
+    :return: Returns the path of the TFLite model.
+    """
+    if isinstance(model, str):
+        path = tflite_path(model, quantize) if path is None else path
+        model = tf.keras.models.load_model(model)
+    if path is None:
+        raise ValueError('A path is required to export a model that was not loaded from a file.')
+    signature = [tf.TensorSpec(shape=[batch_size, *model.input_shape[1:]], dtype=DTYPE)]
+    forward = tf.function(lambda x: model(x, training=False), input_signature=signature)
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([forward.get_concrete_function()], model)
+    if quantize:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+    sysutils.log(__name__).info('Exported a %sTFLite model to %s', 'quantized ' if quantize else '', path)
+    return path
+
+
+class TFLiteForecaster:
+    """
+    | Forecasts with an exported TFLite model. Has the same interface as ModelForecaster.
+    """
+
+    def __init__(self, model_path: str, test_csv: str = None, num_threads: int = None):
+        """
+        :param model_path: Path to an exported .tflite model.
+        :param test_csv: default = None<br/>
+                         Path to the saved input windows to forecast from.
+        :param num_threads: default = None<br/>
+                            The number of threads the interpreter runs on. Defaults to the interpreter's default.
+        """
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.test_np = None if test_csv is None else np.load(test_csv).astype(DTYPE, copy=False)
+        input_details = self.interpreter.get_input_details()[0]
+        self.__input: int = input_details['index']
+        self.__output: int = self.interpreter.get_output_details()[0]['index']
+        self.batch_size: int = int(input_details['shape'][0])
+        self.input_shape: tuple = (None, *input_details['shape'][1:])
+        # The interpreter's tensors are shared, so calls from different threads are serialized.
+        self.__lock = threading.Lock()
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """
+        :param x: A batch of input windows, or a single window.
+        :return: Returns the model's predictions for the windows.
+        """
+        x = np.asarray(x, dtype=DTYPE)
+        if x.ndim == len(self.input_shape) - 1:
+            x = x[np.newaxis]
+        predictions = []
+        with self.__lock:
+            for start in range(0, len(x), self.batch_size):
+                batch = x[start:start + self.batch_size]
+                size = len(batch)
+                if size < self.batch_size:
+                    batch = np.concatenate([batch, np.zeros((self.batch_size - size, *batch.shape[1:]), DTYPE)])
+                # The LSTM op keeps its state in variable tensors, which carry over between calls unless reset.
+                self.interpreter.reset_all_variables()
+                self.interpreter.set_tensor(self.__input, batch)
+                self.interpreter.invoke()
+                predictions.append(self.interpreter.get_tensor(self.__output)[:size])
+        return np.concatenate(predictions)
+
+    def forecast(self, time_horizon: int):
+        # Mirrors ModelForecaster.forecast, which still needs to be implemented.
+        curr = self.predict(self.test_np)
+        for _ in range(time_horizon):
+            curr = np.atleast_3d(curr[-1]) if curr.ndim < len(self.input_shape) else np.expand_dims(curr[-1], 1)
+            print(self.predict(curr))
+
+
+def parity(model: tf.keras.Model, forecaster: TFLiteForecaster, windows: np.ndarray) -> float:
+    """
+    :return: Returns the largest absolute difference between the predictions of a Keras model and its TFLite export
+             on **windows**.
+    """
+    windows = np.asarray(windows, dtype=DTYPE)
+    if len(windows) == 0:
+        return 0.0
+    return float(np.max(np.abs(forecaster.predict(windows) - model.predict(windows, verbose=0))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exports a saved model to TensorFlow Lite.')
+    parser.add_argument('model_path')
+    parser.add_argument('--output', default=None, help='Defaults to <model>.tflite next to the model.')
+    parser.add_argument('--quantize', action='store_true', help='Apply dynamic range quantization to the weights.')
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--windows', default=None, help='A .npy file of windows to check the export against.')
+    args = parser.parse_args()
+    path = export_tflite(args.model_path, args.output, args.quantize, args.batch_size)
+    print(f'Wrote {path} ({filesys.getsize(path):,} bytes)')
+    if args.windows is not None:
+        difference = parity(tf.keras.models.load_model(args.model_path), TFLiteForecaster(path), np.load(args.windows))
+        print(f'Largest difference from the Keras model: {difference:.3g}')
+
+
+if __name__ == '__main__':
+    main()
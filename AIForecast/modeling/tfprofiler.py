@@ -0,0 +1,176 @@
+"""
+| Captures TensorFlow profiler traces of a range of training or prediction batches, and summarizes them without
+  TensorBoard.
+|
+| Print the top ops of a captured trace with: python -m AIForecast.modeling.tfprofiler <log_dir> [--by type|op|thread]
+"""
+import argparse
+import glob
+import os
+from collections import defaultdict
+from datetime import datetime
+from os.path import join as mkpath
+
+import pandas as pd
+import tensorflow as tf
+from tensorflow.core.profiler.protobuf import xplane_pb2
+
+from AIForecast import sysutils
+from AIForecast.sysutils.pathing import FolderStructure
+
+PROFILE_DIR = 'profile'
+"""
+Directory under FolderStructure.LOGS_DIR that profiler traces are written to, one sub-directory per capture.
+"""
+SUMMARY_COLUMNS = ['self_time_ms', 'count', 'percent']
+
+
+def profile_log_dir(name: str) -> str:
+    """
+    :return: Returns a new directory under FolderStructure.LOGS_DIR for a capture, named after **name** and the time.
+    """
+    return mkpath(FolderStructure.LOGS_DIR.get_path(), PROFILE_DIR, f'{name}_{datetime.now():%Y%m%d-%H%M%S}')
+
+
+class ProfilerCapture(tf.keras.callbacks.Callback):
+    """
+    | Captures a tf.profiler trace of a range of batches. As a Keras callback it captures training batches
+      **start_batch** up to **stop_batch** of epoch **epoch**. ModelForecaster calls **begin_step** and **end_step**
+      around every prediction instead, so there the range counts calls to the model.
+    |
+    | Only the batches inside the range are traced, so the trace is small enough to summarize and is not skewed by
+      tracing and warm up in the first batches.
+    """
+
+    def __init__(self, log_dir: str = None, epoch: int = 1, start_batch: int = 0, stop_batch: int = 20):
+        """
+        :param log_dir: default = None<br/>
+                        The directory the trace is written to. Defaults to a new directory from profile_log_dir.
+        :param epoch: The epoch the batches are captured in, counting from 1.
+        :param start_batch: The first batch of the epoch that is captured, counting from 0.
+        :param stop_batch: The batch the capture stops before.
+        """
+        super().__init__()
+        if stop_batch <= start_batch:
+            raise ValueError(f'The batch range [{start_batch}, {stop_batch}) does not contain any batches.')
+        self.log_dir: str = profile_log_dir('capture') if log_dir is None else log_dir
+        self.epoch: int = epoch
+        self.start_batch: int = start_batch
+        self.stop_batch: int = stop_batch
+        self.captured: bool = False
+        self.__active: bool = False
+        self.__current_epoch: int = 0
+
+    def begin_step(self, step: int):
+        if not self.captured and not self.__active and step == self.start_batch:
+            os.makedirs(self.log_dir, exist_ok=True)
+            tf.profiler.experimental.start(self.log_dir)
+            self.__active = True
+
+    def end_step(self, step: int):
+        if self.__active and step >= self.stop_batch - 1:
+            self.stop()
+
+    def stop(self):
+        """
+        Ends the capture and writes the trace, if a capture is running.
+        """
+        if self.__active:
+            tf.profiler.experimental.stop()
+            self.__active = False
+            self.captured = True
+            sysutils.log(__name__).info('Wrote a profiler trace to %s', self.log_dir)
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.__current_epoch = epoch + 1
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.__current_epoch == self.epoch:
+            self.begin_step(batch)
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.end_step(batch)
+
+    def on_epoch_end(self, epoch, logs=None):
+        # The epoch had fewer batches than the range.
+        self.stop()
+
+    def on_train_end(self, logs=None):
+        self.stop()
+
+
+def summarize_trace(log_dir: str, top: int = 20, by: str = 'type') -> pd.DataFrame:
+    """
+    | Summarizes the most recent trace in a capture directory by self time, the time an event ran minus the time of
+      the events nested inside it on the same thread.
+    :param log_dir: The directory a trace was captured to.
+    :param top: The number of rows to return.
+    :param by: default = 'type'<br/>
+               'type' - TensorFlow ops are grouped by op type, such as MatMul.<br/>
+               'op' - TensorFlow ops are grouped by their name in the graph.<br/>
+               'thread' - the self time of every event is grouped by the thread it ran on, which shows how busy each
+               thread pool was.
+    :return: Returns the self time in milliseconds, number of events, and percent of the total self time of every
+             group, in descending order of self time.
+    :raises FileNotFoundError: raised if the directory does not contain a trace.
+    """
+    if by not in ('type', 'op', 'thread'):
+        raise ValueError(f'Cannot group a trace by {by}.')
+    traces = glob.glob(mkpath(log_dir, '**', '*.xplane.pb'), recursive=True)
+    if len(traces) == 0:
+        raise FileNotFoundError(f'No profiler trace found in {log_dir}.')
+    space = xplane_pb2.XSpace()
+    with open(max(traces, key=os.path.getmtime), 'rb') as f:
+        space.ParseFromString(f.read())
+    self_times = defaultdict(int)
+    counts = defaultdict(int)
+    for plane in space.planes:
+        for line in plane.lines:
+            for name, self_time in _self_times(plane, line):
+                if by == 'thread':
+                    key = line.display_name or line.name
+                elif ':' in name and '::' not in name:
+                    # TensorFlow op events are named '<op name>:<op type>'.
+                    op_name, op_type = name.rsplit(':', 1)
+                    key = op_type if by == 'type' else op_name
+                else:
+                    continue
+                self_times[key] += self_time
+                counts[key] += 1
+    summary = pd.DataFrame({'self_time_ms': pd.Series(self_times, dtype=float) / 1e9,
+                            'count': pd.Series(counts, dtype=int)}, columns=SUMMARY_COLUMNS[:2])
+    summary['percent'] = summary['self_time_ms'] / max(summary['self_time_ms'].sum(), 1e-12) * 100
+    return summary.sort_values('self_time_ms', ascending=False).head(top)
+
+
+def _self_times(plane, line):
+    """
+    Yields the name and self time in picoseconds of every event of a line. Events of a line are nested by time.
+    """
+    events = sorted(line.events, key=lambda event: (event.offset_ps, -event.duration_ps))
+    # Each entry is [name, end, self time] of an event that has not ended yet.
+    stack = []
+    for event in events:
+        while len(stack) > 0 and stack[-1][1] <= event.offset_ps:
+            name, _, self_time = stack.pop()
+            yield name, max(self_time, 0)
+        if len(stack) > 0:
+            stack[-1][2] -= event.duration_ps
+        stack.append([plane.event_metadata[event.metadata_id].name, event.offset_ps + event.duration_ps,
+                      event.duration_ps])
+    for name, _, self_time in stack:
+        yield name, max(self_time, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prints the top ops of a captured TensorFlow profiler trace.')
+    parser.add_argument('log_dir')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--by', choices=['type', 'op', 'thread'], default='type')
+    args = parser.parse_args()
+    with pd.option_context('display.max_colwidth', 80, 'display.width', 160):
+        print(summarize_trace(args.log_dir, args.top, args.by).to_string(float_format='{:.3f}'.format))
+
+
+if __name__ == '__main__':
+    main()
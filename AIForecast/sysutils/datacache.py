@@ -0,0 +1,263 @@
+import io
+import json
+import os
+import shutil
+from os import path as filesys
+from os.path import join as mkpath
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from AIForecast import sysutils
+
+CACHE_SUFFIX = '.cache'
+"""
+Suffix of the cache directory created next to a cached CSV file. 'data/mlo_full.csv' is cached to
+'data/mlo_full.csv.cache'.
+"""
+NUMERIC_CACHE_SUFFIX = '.numeric.cache'
+"""
+Suffix of the cache directory of the numeric columns of a CSV file, written by load_numeric_csv.
+'data/upload.csv' is cached to 'data/upload.csv.numeric.cache'.
+"""
+SNIFF_ROWS = 1000
+"""
+Number of rows read from the head of a CSV file to infer its columns and their types.
+"""
+CHUNK_ROWS = 100000
+"""
+Number of rows parsed at a time when a CSV file is read in chunks.
+"""
+_MANIFEST = 'manifest.json'
+_INDEX_FILE = '__index__.npy'
+_DATE_UNITS = ('year', 'month', 'day', 'hour', 'minute', 'second')
+
+
+def cache_path(csv_path: str) -> str:
+    """
+    :return: Returns the path to the cache directory of a CSV file.
+    """
+    return filesys.abspath(csv_path) + CACHE_SUFFIX
+
+
+def numeric_cache_path(csv_path: str) -> str:
+    """
+    :return: Returns the path to the cache directory of the numeric columns of a CSV file.
+    """
+    return filesys.abspath(csv_path) + NUMERIC_CACHE_SUFFIX
+
+
+def load_csv(csv_path: str, columns: List[str] = None, date_parts: List[str] = None,
+             dtype: np.dtype = np.float32) -> pd.DataFrame:
+    """
+    | Loads a CSV file through a typed binary cache. The first call converts the CSV into one .npy file per column;
+      later calls only read the .npy files of the requested columns. The cache is rebuilt whenever the modification
+      time or size of the CSV file changes.
+    |
+    | Numeric columns are stored as **dtype**. Non-numeric columns are stored as fixed width strings.
+    :param csv_path: Path to the CSV file.
+    :param columns: default = None<br/>
+                    None - every column is loaded.<br/>
+                    List of column names - only the listed columns are loaded, in the order given.
+    :param date_parts: Names of date unit columns (year, month, day, hour, minute, second) to assemble into a
+                       datetime64 index named 'date'. The unit columns are dropped from the cached columns. Missing
+                       month or day units default to 1.
+    :param dtype: The floating point type numeric columns are stored as.
+    :return: Returns the loaded data frame.
+    :raises FileNotFoundError: raised if the CSV file does not exist.
+    :raises KeyError: raised if a requested column is not in the CSV file.
+    """
+    manifest = _valid_manifest(csv_path, date_parts, dtype)
+    if manifest is None:
+        manifest = build_cache(csv_path, date_parts, dtype)
+    columns = manifest['columns'] if columns is None else list(columns)
+    missing = [col for col in columns if col not in manifest['files']]
+    if len(missing) > 0:
+        raise KeyError(f'Columns {missing} do not exist in {csv_path}.')
+    return _read_cache(cache_path(csv_path), manifest, columns)
+
+
+def cached_columns(csv_path: str, date_parts: List[str] = None, dtype: np.dtype = np.float32) -> List[str]:
+    """
+    :return: Returns the column names of a cached CSV file without loading any of the column data.
+    """
+    manifest = _valid_manifest(csv_path, date_parts, dtype)
+    if manifest is None:
+        manifest = build_cache(csv_path, date_parts, dtype)
+    return list(manifest['columns'])
+
+
+def sniff_csv(csv_path: str, sample_rows: int = SNIFF_ROWS) -> pd.DataFrame:
+    """
+    :return: Returns the first **sample_rows** rows of a CSV file, parsed with inferred column types.
+    """
+    with open(csv_path, 'rb') as f:
+        head = b''.join(f.readline() for _ in range(sample_rows + 1))
+    return pd.read_csv(io.BytesIO(head))
+
+
+def load_numeric_csv(csv_path: str, date_column: str = None, progress: Callable[[float], None] = None,
+                     chunk_rows: int = CHUNK_ROWS, dtype: np.dtype = np.float32) -> pd.DataFrame:
+    """
+    | Loads only the numeric columns of a CSV file as **dtype**.
+    |
+    | The header and column types are sniffed from the head of the file first, so non-numeric columns are never
+      parsed. The numeric columns are then parsed in chunks of **chunk_rows** rows straight into one preallocated
+      array, so the whole file is never held as float64 or as a second copy.
+|
+| The loaded columns are written to a binary cache next to the file (see numeric_cache_path). Loading the same file
+  again, while its modification time and size are unchanged, reads the cache instead of parsing the CSV file.
+    :param csv_path: Path to the CSV file.
+    :param date_column: default = None<br/>
+                        If given and present in the file, the column is parsed as the DatetimeIndex of the result.
+    :param progress: Called after every chunk with the fraction of the file that has been read.
+    :param chunk_rows: The number of rows parsed at a time.
+    :param dtype: The floating point type of the loaded columns.
+    :return: Returns the numeric columns of the CSV file.
+    """
+    location = numeric_cache_path(csv_path)
+    manifest = _valid_manifest(csv_path, None, dtype, location)
+    if manifest is not None and manifest.get('date_column') == date_column:
+        data = _read_cache(location, manifest, manifest['columns'])
+        if progress is not None:
+            progress(1.0)
+        return data
+    requested_date_column = date_column
+    sample = sniff_csv(csv_path)
+    numeric = [col for col in sample.select_dtypes(include=[np.number]).columns if col != date_column]
+    date_column = date_column if date_column in sample.columns else None
+    file_size = max(os.path.getsize(csv_path), 1)
+    with open(csv_path, 'rb') as f:
+        f.readline()
+        sample_bytes = sum(len(f.readline()) for _ in range(len(sample)))
+    capacity = int(file_size / max(sample_bytes / max(len(sample), 1), 1) * 1.05) + 1
+    values = np.empty((capacity, len(numeric)), dtype=dtype)
+    dates = []
+    rows = 0
+    with open(csv_path, 'rb') as f:
+        chunks = pd.read_csv(f,
+                             usecols=numeric + ([date_column] if date_column is not None else []),
+                             dtype={col: dtype for col in numeric},
+                             chunksize=chunk_rows)
+        for chunk in chunks:
+            if rows + len(chunk) > len(values):
+                values.resize((max(int(len(values) * 1.5), rows + len(chunk)), len(numeric)), refcheck=False)
+            values[rows:rows + len(chunk)] = chunk[numeric].to_numpy(dtype=dtype)
+            if date_column is not None:
+                dates.append(pd.to_datetime(chunk[date_column]).to_numpy(dtype='datetime64[ns]'))
+            rows += len(chunk)
+            if progress is not None:
+                progress(min(f.tell() / file_size, 1.0))
+    values.resize((rows, len(numeric)), refcheck=False)
+    index = None
+    if date_column is not None:
+        index = pd.DatetimeIndex(np.concatenate(dates) if len(dates) > 0 else [], name=date_column)
+    data = pd.DataFrame(values, index=index, columns=numeric, copy=False)
+    try:
+        _write_numeric_cache(csv_path, data, requested_date_column, dtype)
+    except OSError as e:
+        # The data is loaded either way, it is only parsed again next time.
+        sysutils.log(__name__).warning('Could not cache %s: %s', csv_path, e)
+    return data
+
+
+def _write_numeric_cache(csv_path: str, data: pd.DataFrame, date_column: Optional[str], dtype: np.dtype):
+    """
+    | Writes the numeric columns loaded by load_numeric_csv to their cache, in the format of build_cache. The cache is
+      keyed by the date column load_numeric_csv was asked for, so a load with another date column parses the file.
+    """
+    stat = os.stat(csv_path)
+    location = numeric_cache_path(csv_path)
+    if filesys.exists(location):
+        shutil.rmtree(location)
+    os.makedirs(location)
+    has_index = data.index.name is not None
+    if has_index:
+        np.save(mkpath(location, _INDEX_FILE), data.index.to_numpy(dtype='datetime64[ns]'))
+    files = {}
+    for i, col in enumerate(data.columns):
+        files[col] = f'{i}.npy'
+        np.save(mkpath(location, files[col]), data[col].to_numpy(dtype=dtype))
+    manifest = {
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_size': stat.st_size,
+        'date_parts': None,
+        'date_column': date_column,
+        'index_name': data.index.name,
+        'dtype': np.dtype(dtype).name,
+        'has_index': has_index,
+        'columns': list(data.columns),
+        'files': files
+    }
+    # The manifest is written last so an interrupted write never leaves a cache that looks valid.
+    with open(mkpath(location, _MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+
+
+def build_cache(csv_path: str, date_parts: List[str] = None, dtype: np.dtype = np.float32) -> dict:
+    """
+    | Converts a CSV file to its binary cache, replacing any existing cache.
+    :return: Returns the manifest of the new cache.
+    """
+    stat = os.stat(csv_path)
+    frame = pd.read_csv(csv_path)
+    location = cache_path(csv_path)
+    if filesys.exists(location):
+        shutil.rmtree(location)
+    os.makedirs(location)
+    has_index = date_parts is not None and len(date_parts) > 0
+    if has_index:
+        units = {unit: frame[col] for unit, col in zip(_DATE_UNITS, date_parts)}
+        units.setdefault('month', 1)
+        units.setdefault('day', 1)
+        dates = pd.to_datetime(pd.DataFrame(units, index=frame.index))
+        np.save(mkpath(location, _INDEX_FILE), dates.to_numpy(dtype='datetime64[ns]'))
+        frame = frame.drop(columns=date_parts)
+    files = {}
+    for i, col in enumerate(frame.columns):
+        values = frame[col]
+        if pd.api.types.is_numeric_dtype(values):
+            values = values.to_numpy(dtype=dtype)
+        else:
+            values = values.fillna('').astype(str).to_numpy(dtype=str)
+        files[col] = f'{i}.npy'
+        np.save(mkpath(location, files[col]), values)
+    manifest = {
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_size': stat.st_size,
+        'date_parts': date_parts if has_index else None,
+        'dtype': np.dtype(dtype).name,
+        'has_index': has_index,
+        'columns': list(frame.columns),
+        'files': files
+    }
+    # The manifest is written last so an interrupted conversion never leaves a cache that looks valid.
+    with open(mkpath(location, _MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def _read_cache(location: str, manifest: dict, columns: List[str]) -> pd.DataFrame:
+    data = {col: np.load(mkpath(location, manifest['files'][col])) for col in columns}
+    index = None
+    if manifest['has_index']:
+        index = pd.DatetimeIndex(np.load(mkpath(location, _INDEX_FILE)), name=manifest.get('index_name', 'date'))
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def _valid_manifest(csv_path: str, date_parts: Optional[List[str]], dtype: np.dtype,
+                    location: str = None) -> Optional[dict]:
+    stat = os.stat(csv_path)
+    manifest_path = mkpath(cache_path(csv_path) if location is None else location, _MANIFEST)
+    if not filesys.isfile(manifest_path):
+        return None
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    date_parts = date_parts if date_parts is not None and len(date_parts) > 0 else None
+    is_valid = manifest['source_mtime_ns'] == stat.st_mtime_ns \
+        and manifest['source_size'] == stat.st_size \
+        and manifest['date_parts'] == date_parts \
+        and manifest['dtype'] == np.dtype(dtype).name
+    return manifest if is_valid else None
+
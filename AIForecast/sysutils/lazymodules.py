@@ -0,0 +1,44 @@
+"""
+| Defers the import of heavy modules until they are first used. TensorFlow, scikit-learn, and matplotlib each take
+  hundreds of milliseconds to seconds to import, which the application would otherwise spend before its window shows.
+|
+| **Developer Notes:**
+| A lazy module is imported the first time one of its attributes is read, so only import modules lazily that are not
+  needed to draw the main menu, and read their attributes where they are used rather than at module level. Type
+  annotations of function parameters are evaluated when the function is defined, so annotate with strings there.
+"""
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    A stand in for a module that imports the module on the first attribute access and forwards every access to it.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+
+    def __getattr__(self, attribute: str):
+        # Only called for attributes the stand in does not have itself. import_module holds the import lock and returns
+        # the module from sys.modules once it is imported, so this is safe from any thread and cheap after the first
+        # access.
+        return getattr(importlib.import_module(self.__name__), attribute)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+    def __repr__(self):
+        return f'<lazy module {self.__name__!r}{"" if self.is_loaded() else " (not loaded)"}>'
+
+    def is_loaded(self) -> bool:
+        return self.__name__ in sys.modules
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    :param name: The absolute name of the module.
+    :return: Returns the module if it is already imported, otherwise a LazyModule that imports it on first use.
+    """
+    return sys.modules.get(name) or LazyModule(name)
@@ -0,0 +1,89 @@
+"""
+| Logging of the application. The logging threads only put records on a queue through a QueueHandler, and a
+  QueueListener thread writes them to a rotating log file in FolderStructure.LOGS_DIR, so a thread never waits on the
+  disk to log.
+|
+| Importing the package configures nothing. The application calls configure_logging at startup. Library users keep
+  Python's default of warnings and errors on stderr, and records below the configured level are dropped before their
+  messages are formatted, so log with %-style arguments rather than f-strings.
+"""
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from os import path as filesys
+from typing import Optional, Union
+
+from AIForecast.sysutils.pathing import FolderStructure
+
+LOG_FILE = 'aiforecast.log'
+"""
+Name of the log file in FolderStructure.LOGS_DIR.
+"""
+DEFAULT_LEVEL = logging.INFO
+MAX_BYTES = 5 * 1024 * 1024
+"""
+Size the log file is rotated at.
+"""
+BACKUP_COUNT = 3
+"""
+Number of rotated log files that are kept, as aiforecast.log.1 to aiforecast.log.3.
+"""
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s'
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+def configure_logging(level: Union[int, str] = DEFAULT_LEVEL,
+                      directory: str = None,
+                      console_level: Union[int, str, None] = logging.WARNING) -> str:
+    """
+    | Routes the records of every logger through a queue to a rotating log file. Configuring again replaces the previous
+      configuration.
+    :param level: The lowest level that is logged, as a number or a name such as 'DEBUG'.
+    :param directory: default = None<br/>
+                      The directory the log file is written to. Defaults to FolderStructure.LOGS_DIR.
+    :param console_level: The lowest level that is also written to stderr. None writes nothing to stderr.
+    :return: Returns the path of the log file.
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+    directory = FolderStructure.LOGS_DIR.get_path() if directory is None else directory
+    os.makedirs(directory, exist_ok=True)
+    path = filesys.join(directory, LOG_FILE)
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8')]
+    if console_level is not None:
+        console = logging.StreamHandler()
+        console.setLevel(console_level)
+        handlers.append(console)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records = queue.Queue()
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _queue_handler = QueueHandler(records)
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    _listener.start()
+    return path
+
+
+def shutdown_logging():
+    """
+    | Writes the queued records, stops the listener thread, and closes the log file. Called when the interpreter exits.
+    """
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -1,10 +1,10 @@
 import os
-import shutil
 from enum import Enum, unique
 from os import path as filesys
 from os.path import join as mkpath
-from typing import List, Union
+from typing import List, Optional, Union
 
+from AIForecast.sysutils.relocation import RelocationReport, relocate_tree
 from AIForecast.sysutils.sysexceptions import ModificationError
 
 DEFAULT_ROOT_NAME = 'AIClimateChange'
@@ -58,7 +58,7 @@ class FolderStructure(Enum):
     def __init__(self, parent, directory):
         if parent != '' and parent not in self._member_map_:
             raise AttributeError(f'Enumeration {parent} has either not been initialized yet, or does not exist.')
-        self.__parent = parent if parent == '' else self._member_map_[parent].get_path()
+        self.__parent = parent
         self.__location = directory
 
     def set_path(self, location):
@@ -76,7 +76,9 @@ class FolderStructure(Enum):
         """
         :return: Returns the absolute path the directory location.
         """
-        return filesys.abspath(mkpath(self.__parent, self.__location))
+        # The parent's path is looked up on every call, so sub-directories follow the root directory when it is moved.
+        parent = '' if self.__parent == '' else FolderStructure[self.__parent].get_path()
+        return filesys.abspath(mkpath(parent, self.__location))
 
 
 FStruct = FolderStructure   # Alias assignment for FolderStructure.
@@ -134,7 +136,7 @@ class SysFiles(Enum):
         return self.__path
 
 
-def make_root_directory(root_dir: str = None):
+def make_root_directory(root_dir: str = None, keep_old_root: bool = True) -> Optional[RelocationReport]:
     """
     | Constructs the system's working root environment if the root environment has been changed, or if the root
       environment does not exist.
@@ -142,7 +144,12 @@ def make_root_directory(root_dir: str = None):
     | **Different cases:**
     | - if **root_dir** is None, then the root environment is created at the default location.
     | - if the root directory is being changed and a current root already exists, the location is changed and the old
-      file tree is copied over.
+      file tree is relocated with relocation.relocate_tree. A moved root is renamed when the new location is on the
+      same file system and is missing or empty. When the new location already holds files, the moved root's files
+      are hard linked into it instead, which also requires the same file system. A kept root has its files cloned
+      with reflinks where the file system supports them. Files are copied when they can be neither renamed, linked,
+      nor cloned, such as across file systems, and an interrupted relocation is resumed by making the root directory
+      at the new location again.
     | - if the root directory is not change, then the file structure of the current root directory is ensured to match
     | with the defined directory tree structure defined in the FolderStructure Enum.
     |
@@ -150,9 +157,16 @@ def make_root_directory(root_dir: str = None):
     | If a new location for the root directory is being set, the new directory should be empty. Otherwise, the
       directory structure will be made within an additional sub-directory contained in **root_dir**.
     :param root_dir: A path to the new working root directory.
+    :param keep_old_root: default = True<br/>
+                          True - the old root directory is kept, sharing no files with the new one.<br/>
+                          False - the old root directory is moved, and removed once its files are relocated.
+    :return: Returns how the old file tree was relocated, or None if the root directory was not changed or did not
+             exist.
     :raises NotADirectoryError: raised if root_dir does not lead to an existing directory location or is a file.
+    :raises IOError: raised if a relocated file differs from the file in the old root directory.
     """
     root = FStruct.ROOT_DIR.get_path()
+    report = None
     location = root if root_dir is None else filesys.abspath(root_dir)
     location_exists = filesys.exists(location)
     if root_dir is None and not location_exists:
@@ -162,10 +176,11 @@ def make_root_directory(root_dir: str = None):
     if location != root:
         location = location if len(os.listdir(location)) == 0 else mkpath(location, DEFAULT_ROOT_NAME)
         if filesys.exists(root):
-            shutil.copytree(root, location, dirs_exist_ok=True)
+            report = relocate_tree(root, location, keep_source=keep_old_root)
         FStruct.ROOT_DIR.set_path(location)
     for dir_path in FStruct.__members__.values():
         os.makedirs(dir_path.get_path(), exist_ok=True)
+    return report
 
 
 def get_files(directory_location: FolderStructure, file_names: Union[List[str], str] = None, match_all: bool = True):
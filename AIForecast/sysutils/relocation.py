@@ -0,0 +1,243 @@
+"""
+| Relocation of a directory tree, such as the system's root directory, without copying its content where the file
+  system can avoid it.
+|
+| A tree that is moved within one file system is renamed, which is atomic and takes the same time for any size. Files
+  that cannot be renamed are hard linked when the source is discarded, or cloned with a reflink on file systems that
+  support them, such as Btrfs and XFS. Only files that cannot be linked or cloned are copied, by several threads, to
+  temporary files that are renamed once complete, so an interrupted relocation is resumed by relocating again. Files
+  that were cloned or copied are verified by their SHA-256 hash before the source is removed.
+"""
+import errno
+import hashlib
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from os import path as filesys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from AIForecast import sysutils
+
+COPY_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+"""
+Number of threads that copy files at a time. Copies are bound by the disk rather than the interpreter.
+"""
+PART_SUFFIX = '.relocating'
+"""
+Suffix of a file that is still being copied. Renamed to the file's name once its copy is complete.
+"""
+HASH_BLOCK = 1024 * 1024
+_FICLONE = 0x40049409
+"""
+The Linux ioctl that clones a file's extents into another file, which is how cp --reflink clones files.
+"""
+
+RENAMED, LINKED, CLONED, COPIED, SKIPPED = 'renamed', 'linked', 'cloned', 'copied', 'skipped'
+
+
+class RelocationReport:
+    """
+    The outcome of a relocation, counting the files by how they were relocated.
+    """
+
+    def __init__(self, source: str, destination: str):
+        self.source: str = source
+        self.destination: str = destination
+        self.files: Dict[str, int] = {RENAMED: 0, LINKED: 0, CLONED: 0, COPIED: 0, SKIPPED: 0}
+        self.bytes_copied: int = 0
+        self.verified: int = 0
+
+    def __str__(self):
+        counts = ', '.join(f'{count} {method}' for method, count in self.files.items() if count > 0)
+        return f'Relocated {self.source} to {self.destination}: {counts or "no files"}, ' \
+               f'{self.bytes_copied} bytes copied, {self.verified} files verified.'
+
+
+def log_progress(done: int, total: int):
+    """
+    | The default progress report of relocate_tree, which logs every tenth of the bytes that are relocated.
+    """
+    step = max(total // 10, 1)
+    if done == total or done // step != (done - 1) // step:
+        sysutils.log(__name__).info('Relocated %d of %d bytes (%.0f%%)', done, total, 100 * done / max(total, 1))
+
+
+def relocate_tree(source: str,
+                  destination: str,
+                  keep_source: bool = True,
+                  verify: bool = True,
+                  workers: int = COPY_WORKERS,
+                  progress: Optional[Callable[[int, int], None]] = log_progress) -> RelocationReport:
+    """
+    | Relocates the content of a directory into another directory, merging it with files already there.
+    :param source: The directory that is relocated.
+    :param destination: The directory the content is relocated to. Created if it does not exist.
+    :param keep_source: True keeps the source, which then shares no files with the destination, so changing a file in
+                        one of them never changes the other. False removes the source once it is relocated, which
+                        allows renaming the whole tree and hard linking its files.
+    :param verify: If True, every file that was cloned or copied is compared with its source by its SHA-256 hash.
+    :param workers: The number of threads that copy files.
+    :param progress: default = log_progress<br/>
+                     Called with the number of bytes relocated so far and the total, as files are relocated. A
+                     renamed tree is not reported. None reports nothing.
+    :return: Returns the report of how the files were relocated.
+    :raises NotADirectoryError: raised if the source is not a directory.
+    :raises ValueError: raised if the destination is inside the source.
+    :raises IOError: raised if a relocated file differs from its source. The source is kept.
+    """
+    source, destination = filesys.abspath(source), filesys.abspath(destination)
+    if not filesys.isdir(source):
+        raise NotADirectoryError(f"'{source}' - path is not a directory. ")
+    if destination == source or destination.startswith(source + os.sep):
+        raise ValueError(f"'{destination}' is inside '{source}', which cannot be relocated into itself.")
+    report = RelocationReport(source, destination)
+    if not keep_source and _rename_tree(source, destination):
+        report.files[RENAMED] = sum(len(files) for _, _, files in os.walk(destination))
+        sysutils.log(__name__).info('%s', report)
+        return report
+    directories, files = _scan(source)
+    for directory in directories:
+        os.makedirs(filesys.join(destination, directory), exist_ok=True)
+    total = sum(size for _, size in files)
+    done, lock = [0], threading.Lock()
+
+    def relocate(relative: str, size: int) -> Tuple[str, str]:
+        method = _relocate_file(filesys.join(source, relative), filesys.join(destination, relative), keep_source)
+        with lock:
+            report.files[method] += 1
+            report.bytes_copied += size if method == COPIED else 0
+            done[0] += size
+            if progress is not None:
+                progress(done[0], total)
+        return relative, method
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='relocate') as pool:
+        relocated = list(pool.map(lambda file: relocate(*file), files))
+        if verify:
+            # A linked file is the source file itself. Files skipped as complete by an earlier relocation are compared
+            # as well, since that relocation may have been interrupted before it verified them.
+            checked = [relative for relative, method in relocated if method != LINKED]
+            for relative, same in zip(checked, pool.map(lambda r: _same_content(filesys.join(source, r),
+                                                                                filesys.join(destination, r)),
+                                                        checked)):
+                if not same:
+                    raise IOError(f"'{filesys.join(destination, relative)}' differs from its source after relocation.")
+            report.verified = len(checked)
+    if not keep_source:
+        shutil.rmtree(source)
+    sysutils.log(__name__).info('%s', report)
+    return report
+
+
+def _rename_tree(source: str, destination: str) -> bool:
+    """
+    :return: Returns True if the source was renamed to the destination, which requires them to be on the same file
+             system and the destination to be missing or empty.
+    """
+    parent = filesys.dirname(destination)
+    if not filesys.isdir(parent) or os.stat(source).st_dev != os.stat(parent).st_dev:
+        return False
+    if filesys.isdir(destination):
+        if len(os.listdir(destination)) > 0:
+            return False
+        os.rmdir(destination)
+    try:
+        os.rename(source, destination)
+        return True
+    except OSError:
+        os.makedirs(destination, exist_ok=True)
+        return False
+
+
+def _scan(source: str) -> Tuple[List[str], List[Tuple[str, int]]]:
+    """
+    :return: Returns the directories and the (path, size) of the files in the source, relative to it.
+    """
+    directories, files, pending = [], [], ['']
+    while len(pending) > 0:
+        relative = pending.pop()
+        with os.scandir(filesys.join(source, relative)) as entries:
+            for entry in entries:
+                path = filesys.join(relative, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(path)
+                    pending.append(path)
+                elif entry.name.endswith(PART_SUFFIX):
+                    continue
+                else:
+                    files.append((path, entry.stat(follow_symlinks=False).st_size))
+    return directories, files
+
+
+def _relocate_file(source: str, destination: str, keep_source: bool) -> str:
+    """
+    :return: Returns how the file was relocated: linked, cloned, copied, or skipped if the destination is already a
+             complete copy. A destination that is a hard link of a kept source is copied again, so the two share no
+             content.
+    """
+    if filesys.islink(source):
+        if filesys.lexists(destination):
+            os.remove(destination)
+        os.symlink(os.readlink(source), destination)
+        return COPIED
+    if filesys.exists(destination) and filesys.samefile(source, destination):
+        if not keep_source:
+            return SKIPPED
+        # A hard link, such as one left by an interrupted move, would share its content with the kept source.
+        os.remove(destination)
+    elif filesys.exists(destination):
+        src, dst = os.stat(source), os.stat(destination)
+        # Copies keep the modification time of their source, so a completed copy has the same size and time.
+        if src.st_size == dst.st_size and src.st_mtime_ns == dst.st_mtime_ns:
+            return SKIPPED
+    if not keep_source:
+        try:
+            if filesys.exists(destination):
+                os.remove(destination)
+            os.link(source, destination)
+            return LINKED
+        except OSError:
+            pass
+    part = destination + PART_SUFFIX
+    method = CLONED if _clone(source, part) else COPIED
+    if method == COPIED:
+        shutil.copyfile(source, part)
+    shutil.copystat(source, part)
+    os.replace(part, destination)
+    return method
+
+
+def _clone(source: str, destination: str) -> bool:
+    """
+    :return: Returns True if the file was cloned with a reflink, which shares the source's blocks until either file is
+             changed. Only Linux file systems that support reflinks can clone files.
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            return True
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.EBADF, errno.ENOSYS):
+                raise
+            return False
+
+
+def _same_content(first: str, second: str) -> bool:
+    if filesys.islink(first):
+        return os.readlink(first) == os.readlink(second)
+    if os.stat(first).st_size != os.stat(second).st_size:
+        return False
+    return _sha256(first) == _sha256(second)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,170 @@
+import tkinter as tk
+import warnings
+from tkinter import ttk
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from AIForecast.ui import uiconsts as ui
+
+
+class TableModel:
+    """
+    | A read only, NumPy backed view of a data frame for VirtualTable. Column values are held as the data frame's own
+      arrays, and cells are only formatted as text for the rows that are requested.
+    |
+    | Column statistics are computed once, on first access, and cached on the model. Keep one model per dataset to
+      reuse them.
+    """
+
+    STATS_COLUMNS = ['column', 'min', 'max', 'mean', 'nulls']
+
+    def __init__(self, data: pd.DataFrame):
+        self.index: pd.Index = data.index
+        self.columns: List[str] = [str(col) for col in data.columns]
+        self.values: List[np.ndarray] = [data[col].to_numpy() for col in data.columns]
+        self.row_count: int = len(data)
+        self.__stats: pd.DataFrame = None
+
+    def rows(self, start: int, stop: int) -> List[List[str]]:
+        """
+        :return: Returns the formatted cells of rows start to stop, with the index as the first cell of each row.
+        """
+        start, stop = max(start, 0), min(stop, self.row_count)
+        cells = [self.index[start:stop].astype(str)] + [self.__format(values[start:stop]) for values in self.values]
+        return [list(row) for row in zip(*cells)]
+
+    @property
+    def stats(self) -> pd.DataFrame:
+        """
+        :return: Returns the min, max, mean, and null count of every column. Non-numeric columns only have a null count.
+        """
+        if self.__stats is None:
+            stats = []
+            with warnings.catch_warnings():
+                # All NaN columns reduce to NaN, which is the wanted result.
+                warnings.simplefilter('ignore', RuntimeWarning)
+                for col, values in zip(self.columns, self.values):
+                    if values.dtype.kind in 'fiub':
+                        nulls = np.count_nonzero(np.isnan(values)) if values.dtype.kind == 'f' else 0
+                        stats.append([col, np.nanmin(values), np.nanmax(values), np.nanmean(values), nulls])
+                    else:
+                        stats.append([col, np.nan, np.nan, np.nan, int(pd.isnull(values).sum())])
+            self.__stats = pd.DataFrame(stats, columns=self.STATS_COLUMNS)
+        return self.__stats
+
+    @staticmethod
+    def __format(values: np.ndarray) -> np.ndarray:
+        if values.dtype.kind == 'f':
+            cells = np.char.mod('%g', values)
+            cells[np.isnan(values)] = ''
+            return cells
+        return np.where(pd.isnull(values), '', values.astype(str))
+
+
+class VirtualTable:
+    """
+    | A table that only renders the rows that fit on screen. A fixed pool of Treeview rows is created for the visible
+      window, and scrolling or paging rewrites those rows from the TableModel instead of inserting every row of the
+      dataset into the Treeview.
+    """
+
+    ROW_HEIGHT = 20
+    HEADER_HEIGHT = 25
+    COLUMN_WIDTH = 90
+
+    def __init__(self, master: tk.Frame, model: TableModel):
+        self.model: TableModel = model
+        self.offset: int = 0
+        self.visible_rows: int = 0
+        self.frame = tk.Frame(master, bg=ui.BACKGROUND_COLOR)
+        ttk.Style(self.frame).configure('Treeview', rowheight=self.ROW_HEIGHT)
+        columns = ['index'] + model.columns
+        self.table_frame = tk.Frame(self.frame, bg=ui.BACKGROUND_COLOR)
+        self.tree = ttk.Treeview(self.table_frame, columns=columns, show='headings', selectmode='browse')
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=self.COLUMN_WIDTH, stretch=False)
+        self.scrollbar = tk.Scrollbar(self.table_frame, orient=tk.VERTICAL, command=self.__on_scroll)
+        self.x_scrollbar = tk.Scrollbar(self.table_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.x_scrollbar.set)
+        self.nav_frame = tk.Frame(self.frame, bg=ui.BACKGROUND_COLOR)
+        self.prev_page_button = tk.Button(self.nav_frame, text='Previous Page', bg=ui.BUTTON_BACKGROUND,
+                                          fg=ui.BUTTON_FOREGROUND, command=lambda: self.scroll_pages(-1))
+        self.next_page_button = tk.Button(self.nav_frame, text='Next Page', bg=ui.BUTTON_BACKGROUND,
+                                          fg=ui.BUTTON_FOREGROUND, command=lambda: self.scroll_pages(1))
+        self.status_label = tk.Label(self.nav_frame, bg=ui.BACKGROUND_COLOR, fg=ui.FOREGROUND_COLOR, anchor='w')
+        self.stats_tree = ttk.Treeview(self.frame, columns=TableModel.STATS_COLUMNS, show='headings',
+                                       height=min(len(model.columns), 6))
+        for col in TableModel.STATS_COLUMNS:
+            self.stats_tree.heading(col, text=col)
+            self.stats_tree.column(col, width=self.COLUMN_WIDTH)
+        for stat in model.stats.itertuples(index=False):
+            self.stats_tree.insert('', tk.END, values=[stat[0]] + [self.__format_stat(val) for val in stat[1:]])
+        self.tree.bind('<Configure>', self.__on_resize)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self.__on_mouse_wheel)
+
+    def show(self):
+        self.frame.pack(fill=tk.BOTH, expand=True)
+        self.stats_tree.pack(side=tk.BOTTOM, fill=tk.X)
+        self.nav_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        self.prev_page_button.pack(side=tk.LEFT, padx=ui.LABEL_OFFSET, pady=ui.LABEL_OFFSET)
+        self.next_page_button.pack(side=tk.LEFT, padx=ui.LABEL_OFFSET, pady=ui.LABEL_OFFSET)
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=ui.LABEL_OFFSET)
+        self.table_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.render()
+
+    def scroll_to(self, offset: int):
+        """
+        Moves the first visible row to the given row of the model and re-renders the visible window.
+        """
+        self.offset = int(min(max(offset, 0), max(self.model.row_count - self.visible_rows, 0)))
+        self.render()
+
+    def scroll_pages(self, pages: int):
+        self.scroll_to(self.offset + pages * max(self.visible_rows, 1))
+
+    def render(self):
+        rows = self.model.rows(self.offset, self.offset + self.visible_rows)
+        blank = [''] * (len(self.model.columns) + 1)
+        for i, item in enumerate(self.tree.get_children()):
+            self.tree.item(item, values=rows[i] if i < len(rows) else blank)
+        total = max(self.model.row_count, 1)
+        self.scrollbar.set(self.offset / total, min((self.offset + self.visible_rows) / total, 1))
+        last_row = min(self.offset + self.visible_rows, self.model.row_count)
+        self.status_label.config(text=f'Rows {min(self.offset + 1, last_row)} - {last_row} '
+                                      f'of {self.model.row_count}')
+
+    def __on_resize(self, event):
+        visible_rows = max((event.height - self.HEADER_HEIGHT) // self.ROW_HEIGHT, 1)
+        if visible_rows == self.visible_rows:
+            return
+        items = self.tree.get_children()
+        for item in items[visible_rows:]:
+            self.tree.delete(item)
+        for _ in range(len(items), visible_rows):
+            self.tree.insert('', tk.END)
+        self.visible_rows = visible_rows
+        self.scroll_to(self.offset)
+
+    def __on_scroll(self, action, amount, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(round(float(amount) * self.model.row_count))
+        elif unit == tk.PAGES:
+            self.scroll_pages(int(amount))
+        else:
+            self.scroll_to(self.offset + int(amount))
+
+    def __on_mouse_wheel(self, event):
+        step = -1 if event.num == 4 or getattr(event, 'delta', 0) > 0 else 1
+        self.scroll_to(self.offset + step * 3)
+        return 'break'
+
+    @staticmethod
+    def __format_stat(value) -> str:
+        return '' if pd.isnull(value) else f'{value:g}'
@@ -1,20 +1,30 @@
 import tkinter as tk
 from tkinter import filedialog as fdiag
+from tkinter import messagebox
+from typing import List
 import os
 
-import numpy as np
-import pandas as pd
-from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
-from matplotlib.figure import Figure
-from pandastable import Table
-from tensorflow import keras
-
-from AIForecast.modeling import dataprocessing as pipeline
-from AIForecast.modeling.dataprocessing import ModelEvaluationReporter
-from AIForecast.modeling.tfcallbacks import OutputEpoch, CancelModelTraining
-from AIForecast.ui.widgets import MenuWindow, OutputWindow
+from AIForecast.sysutils.lazymodules import lazy_import
+from AIForecast.ui.widgets import BackgroundTask, MenuWindow, OutputWindow
 from AIForecast.ui import uiconsts as ui
-from AIForecast.weather import ClimateAccess
+
+# The modeling and plotting modules import TensorFlow, scikit-learn, pandas, and matplotlib, which take seconds. They
+# are imported when a menu first uses them, so the main menu shows without waiting for them.
+pd = lazy_import('pandas')
+pipeline = lazy_import('AIForecast.modeling.dataprocessing')
+checkpoints = lazy_import('AIForecast.modeling.checkpoints')
+catalog = lazy_import('AIForecast.modeling.catalog')
+modelpipeline = lazy_import('AIForecast.modeling.pipeline')
+profiling = lazy_import('AIForecast.modeling.profiling')
+tflite = lazy_import('AIForecast.modeling.tflite')
+bundle = lazy_import('AIForecast.modeling.bundle')
+boosting = lazy_import('AIForecast.modeling.boosting')
+models = lazy_import('AIForecast.modeling.models')
+tfcallbacks = lazy_import('AIForecast.modeling.tfcallbacks')
+datacache = lazy_import('AIForecast.sysutils.datacache')
+datatable = lazy_import('AIForecast.ui.datatable')
+plotting = lazy_import('AIForecast.ui.plotting')
+ClimateAccess = lazy_import('AIForecast.weather.ClimateAccess')
 
 
 class MainMenu(MenuWindow):
@@ -120,12 +130,17 @@ class TestMenu(MenuWindow):
         Purpose: This function is used to upload an already trained model that would be used to test
         :return:
         """
-        model_path = fdiag.askopenfilename(filetypes=[(ui.MODEL_FILE_LABEL, ui.MODEL_FILE_TYPE)])
+        model_path = fdiag.askopenfilename(filetypes=[(ui.MODEL_FILE_LABEL, ui.MODEL_FILE_TYPE),
+                                                      (ui.TFLITE_FILE_LABEL, ui.TFLITE_FILE_TYPE),
+                                                      (ui.BUNDLE_FILE_LABEL, ui.BUNDLE_FILE_TYPE),
+                                                      (ui.BOOSTED_FILE_LABEL, ui.BOOSTED_FILE_TYPE)])
         if model_path != '':
             self.path_to_trained_model = model_path
 
     def upload_test_csv(self):
-        test_csv_path = fdiag.askopenfilename(filetypes=[(ui.NPY_FILE_LABEL, ui.NPY_FILE_TYPE)])
+        # Bundles normalize their inputs, so they forecast from raw data as well as from saved raw windows.
+        test_csv_path = fdiag.askopenfilename(filetypes=[(ui.NPY_FILE_LABEL, ui.NPY_FILE_TYPE),
+                                                         (ui.CSV_FILE_LABEL, ui.CSV_FILE_TYPE)])
         if test_csv_path != '':
             self.path_to_test_csv = test_csv_path
 
@@ -139,7 +154,18 @@ class TestMenu(MenuWindow):
             self.output_text.output('Time horizon is not a valid non-zero positive integer.')
         if self.path_to_test_csv != '' and self.path_to_trained_model != '' and horizon > 0:
             self.output_text.output('')
-            forcaster = pipeline.ModelForecaster(self.path_to_trained_model, self.path_to_test_csv)
+            if self.path_to_trained_model.endswith(bundle.BUNDLE_EXTENSION):
+                forecaster = bundle.BundleForecaster(self.path_to_trained_model, self.path_to_test_csv)
+                self.output_text.output(forecaster.forecast(horizon).to_string())
+                return
+            if self.path_to_trained_model.endswith(boosting.BOOSTED_EXTENSION):
+                forecaster = boosting.BoostedForecaster(self.path_to_trained_model, self.path_to_test_csv)
+                self.output_text.output(forecaster.forecast(horizon).to_string())
+                return
+            is_tflite = self.path_to_trained_model.endswith(tflite.TFLITE_EXTENSION)
+            forecaster_type = tflite.TFLiteForecaster if is_tflite \
+                else pipeline.ModelForecaster
+            forcaster = forecaster_type(self.path_to_trained_model, self.path_to_test_csv)
             forcaster.forecast(horizon)
 
 
@@ -169,6 +195,8 @@ class TrainMenu(MenuWindow):
         self.expanding_testing_size = None
         self.expanding_gap_size = None
         self.expanding_expansion_rate = None
+        self.expanding_warm_start = tk.BooleanVar()
+        self.expanding_warm_start_button = None
         self.normalization_selector = None
         self.training_features = None
         self.output_features = None
@@ -180,6 +208,8 @@ class TrainMenu(MenuWindow):
         self.train_model_button = None
         self.output_text: OutputWindow = None
         self.save_model_button = None
+        self.export_tflite = tk.BooleanVar()
+        self.export_tflite_button = None
         self.input_frame = None
         self.output_frame = None
         self.training_csv = None
@@ -208,15 +238,26 @@ class TrainMenu(MenuWindow):
         self.output_text_label = None
         self.learning_rate = None
         self.learning_rate_label = None
+        self.early_stopping = None
+        self.early_stopping_label = None
+        self.lr_patience = None
+        self.lr_patience_label = None
         self.trained_model = None
+        self.trained_epochs: int = 0
+        self.trained_with: str = None
         self.csv_selection_label = None
         self.schema_selection_label = None
         self.path_to_csv = None
-        self.model_fit_reporter: ModelEvaluationReporter = None
+        self.model_fit_reporter: pipeline.ModelEvaluationReporter = None
+        self.run_profile: profiling.RunProfile = None
+        # Made on the first display of the menu, since the pipeline imports TensorFlow.
+        self.pipeline: modelpipeline.Pipeline = None
         self.cancel_button = None
 
     def init_ui(self):
         super().init_ui()
+        if self.pipeline is None:
+            self.pipeline = modelpipeline.Pipeline()
         self.input_frame = tk.Frame(master=self.body, bg=ui.BACKGROUND_COLOR)
         self.output_frame = tk.Frame(master=self.body, bg=ui.BACKGROUND_COLOR)
         self.csv_selector = tk.Button(
@@ -308,6 +349,10 @@ class TrainMenu(MenuWindow):
         self.expanding_expansion_rate.insert(tk.END, '1')
         self.expanding_expansion_rate_label = tk.Label(self.input_frame, text="Expansion Rate:", bg=ui.BACKGROUND_COLOR,
                                                        fg=ui.FOREGROUND_COLOR, anchor="e")
+        self.expanding_warm_start_button = tk.Checkbutton(self.input_frame, text="Warm Start",
+                                                          variable=self.expanding_warm_start,
+                                                          bg=ui.BACKGROUND_COLOR, fg=ui.FOREGROUND_COLOR,
+                                                          selectcolor=ui.BACKGROUND_COLOR, anchor="w")
         self.normalization_selection.set(self.normalization_options[0])
         self.normalization_selector = tk.OptionMenu(
             self.input_frame,
@@ -346,6 +391,14 @@ class TrainMenu(MenuWindow):
         self.learning_rate.insert(tk.END, '0.0001')
         self.learning_rate_label = tk.Label(self.input_frame, text="Learning Rate:", bg=ui.BACKGROUND_COLOR,
                                             fg=ui.FOREGROUND_COLOR, anchor="e")
+        self.early_stopping = tk.Text(self.input_frame)
+        self.early_stopping.insert(tk.END, '5')
+        self.early_stopping_label = tk.Label(self.input_frame, text="Early Stop Patience:", bg=ui.BACKGROUND_COLOR,
+                                             fg=ui.FOREGROUND_COLOR, anchor="e")
+        self.lr_patience = tk.Text(self.input_frame)
+        self.lr_patience.insert(tk.END, '3')
+        self.lr_patience_label = tk.Label(self.input_frame, text="LR Patience:", bg=ui.BACKGROUND_COLOR,
+                                          fg=ui.FOREGROUND_COLOR, anchor="e")
         self.train_model_button = tk.Button(
             self.input_frame,
             text="Train Model",
@@ -370,6 +423,10 @@ class TrainMenu(MenuWindow):
             fg=ui.BUTTON_FOREGROUND,
             command=lambda: self.save_model()
         )
+        self.export_tflite_button = tk.Checkbutton(self.input_frame, text="Export TFLite",
+                                                   variable=self.export_tflite,
+                                                   bg=ui.BACKGROUND_COLOR, fg=ui.FOREGROUND_COLOR,
+                                                   selectcolor=ui.BACKGROUND_COLOR, anchor="w")
 
     def draw(self):
         MenuWindow.draw(self)
@@ -499,9 +556,27 @@ class TrainMenu(MenuWindow):
         self.save_model_button.place(x=ui.ALIGN_X + ui.RIGHT_BUTTON_ALIGNMENT_OFFSET,
                                      y=ui.ALIGN_Y + (ui.Y_ELEMENT_OFFSET * 8),
                                      width=150)
+        self.export_tflite_button.place(x=ui.ALIGN_X + ui.RIGHT_BUTTON_ALIGNMENT_OFFSET + ui.X_150_UNIT_WIDTH_OFFSET
+                                          + ui.LABEL_OFFSET,
+                                        y=ui.ALIGN_Y + (ui.Y_ELEMENT_OFFSET * 8),
+                                        width=120, height=25)
         self.cancel_button.place(x=ui.ALIGN_X + ui.LEFT_BUTTON_ALIGNMENT_OFFSET,
                                  y=ui.ALIGN_Y + (ui.Y_ELEMENT_OFFSET * 9),
                                  width=150)
+        self.early_stopping_label.place(x=ui.ALIGN_X + ui.RIGHT_BUTTON_ALIGNMENT_OFFSET - ui.X_30_UNIT_WIDTH_OFFSET,
+                                        y=ui.ALIGN_Y + (ui.Y_ELEMENT_OFFSET * 9),
+                                        width=130)
+        self.early_stopping.place(x=ui.ALIGN_X + ui.RIGHT_BUTTON_ALIGNMENT_OFFSET + ui.X_100_UNIT_WIDTH_OFFSET
+                                    + ui.LABEL_OFFSET,
+                                  y=ui.ALIGN_Y + (ui.Y_ELEMENT_OFFSET * 9),
+                                  height=25, width=30)
+        self.lr_patience_label.place(x=ui.ALIGN_X + ui.RIGHT_BUTTON_ALIGNMENT_OFFSET + ui.X_150_UNIT_WIDTH_OFFSET,
+                                     y=ui.ALIGN_Y + (ui.Y_ELEMENT_OFFSET * 9),
+                                     width=100)
+        self.lr_patience.place(x=ui.ALIGN_X + ui.RIGHT_BUTTON_ALIGNMENT_OFFSET + ui.X_150_UNIT_WIDTH_OFFSET
+                                 + ui.X_100_UNIT_WIDTH_OFFSET + ui.LABEL_OFFSET,
+                               y=ui.ALIGN_Y + (ui.Y_ELEMENT_OFFSET * 9),
+                               height=25, width=30)
         self.output_text_label.place(x=ui.ALIGN_X + 5)
         self.output_text.draw(x=ui.ALIGN_X + 10, relx=.05, rely=.05, relwidth=.9, relheight=.9)
         self.draw_split_type_inputs(self.split_type_options[0])
@@ -526,6 +601,10 @@ class TrainMenu(MenuWindow):
         self.epoch.destroy()
         self.learning_rate_label.destroy()
         self.learning_rate.destroy()
+        self.early_stopping_label.destroy()
+        self.early_stopping.destroy()
+        self.lr_patience_label.destroy()
+        self.lr_patience.destroy()
         self.input_width_label.destroy()
         self.input_width.destroy()
         self.output_width_label.destroy()
@@ -536,6 +615,7 @@ class TrainMenu(MenuWindow):
         self.time_offset.destroy()
         self.train_model_button.destroy()
         self.save_model_button.destroy()
+        self.export_tflite_button.destroy()
         self.output_text_label.destroy()
         self.output_text.hide()
         self.straight_validation_slider.destroy()
@@ -562,6 +642,7 @@ class TrainMenu(MenuWindow):
         self.expanding_validation_size_label.destroy()
         self.expanding_testing_size_label.destroy()
         self.expanding_expansion_rate_label.destroy()
+        self.expanding_warm_start_button.destroy()
         self.cancel_button.destroy()
 
     def draw_split_type_inputs(self, selection):
@@ -597,6 +678,7 @@ class TrainMenu(MenuWindow):
         self.expanding_validation_size_label.place_forget()
         self.expanding_testing_size_label.place_forget()
         self.expanding_expansion_rate_label.place_forget()
+        self.expanding_warm_start_button.place_forget()
         if selection == self.split_type_options[0]:
             self.straight_training_slider_label.place(x=ui.ALIGN_X,
                                                       y=ui.ALIGN_Y + (ui.Y_ELEMENT_OFFSET * 2),
@@ -701,6 +783,11 @@ class TrainMenu(MenuWindow):
                                                   + (ui.X_200_UNIT_WIDTH_OFFSET * 2),
                                                 y=ui.ALIGN_Y + (ui.Y_ELEMENT_OFFSET * 3),
                                                 width=200, height=25)
+            self.expanding_warm_start_button.place(x=ui.ALIGN_X + (ui.LABEL_OFFSET * 3) + (ui.X_ELEMENT_OFFSET * 2)
+                                                     + (ui.X_100_UNIT_WIDTH_OFFSET * 3)
+                                                     + (ui.X_200_UNIT_WIDTH_OFFSET * 2),
+                                                   y=ui.ALIGN_Y + (ui.Y_ELEMENT_OFFSET * 2),
+                                                   width=200, height=25)
 
     def save_model(self):
         """
@@ -716,10 +803,59 @@ class TrainMenu(MenuWindow):
                                            filetypes=[(ui.MODEL_FILE_LABEL, ui.MODEL_FILE_TYPE)])
         if save_loc != '':
             save_loc = save_loc if save_loc.endswith('.h5') else save_loc + '.h5'
-            self.trained_model.save(save_loc)
+            boosted = self.trained_with != models.KERAS_TRAINER
+            model_loc = save_loc[:-3] + boosting.BOOSTED_EXTENSION if boosted else save_loc
+            self.trained_model.save(model_loc)
             self.model_fit_reporter.save(save_loc[:-3])
+            self.run_profile.save(save_loc[:-3] + '_profile.json')
+            self.run_profile.save_chrome_trace(save_loc[:-3] + '_trace.json')
+            scaler = self.pipeline.scaler()
+            state = self.pipeline.training_state(self.trained_epochs)
+            if scaler is not None:
+                scaler.save(save_loc[:-3] + '_scaler.json')
+            # Bundles and TFLite exports hold Keras models.
+            if scaler is not None and not boosted:
+                bundle.save_bundle(self.trained_model, bundle.bundle_path(save_loc), scaler, state.transformer,
+                                   {'epochs': state.epoch, 'training_cutoff': state.to_dict()['training_cutoff'],
+                                    'data_fingerprint': self.pipeline.data_fingerprint()}, state.features)
+            state.save(checkpoints.state_path(save_loc))
+            schema_path = self.path_to_model_schema if str(self.path_to_model_schema).endswith('.json') else None
+            artifacts = catalog.ArtifactCatalog()
+            try:
+                artifacts.record(model_loc, schema_path, self.pipeline.data_fingerprint(), state.transformer,
+                                 self.model_fit_reporter.train_evaluation, self.model_fit_reporter.test_evaluation,
+                                 self.trained_epochs)
+            finally:
+                artifacts.close()
+            if self.export_tflite.get() and not boosted:
+                self.export_tflite_model(self.trained_model, save_loc,
+                                         self.pipeline.timeseries()[-1].test_samples.samples)
             self.trained_model = None
 
+    def export_tflite_model(self, model: 'tf.keras.Model', save_loc: str, test_windows: 'np.ndarray'):
+        """
+        Purpose: Converts a saved model to TFLite in the background, and reports how far its forecasts on the test
+        windows are from the Keras model's. The model is saved and catalogued before, so a failed conversion only
+        loses the TFLite file.
+        :return:
+        """
+        self.output_text.append_output('Exporting a TFLite model...')
+
+        def export(progress):
+            forecaster = tflite.TFLiteForecaster(tflite.export_tflite(model, tflite.tflite_path(save_loc)))
+            return tflite.parity(model, forecaster, test_windows)
+
+        def exported(difference: float):
+            if self.body.winfo_exists():
+                self.output_text.append_output(f'Exported a TFLite model, which differs from the Keras model by at '
+                                               f'most {difference:.3g} on the test set.')
+
+        def failed(error: Exception):
+            if self.body.winfo_exists():
+                self.output_text.append_output(f'- Unable to export a TFLite model:\n{error}')
+
+        BackgroundTask(self.container, export, on_done=exported, on_error=failed).start()
+
     def train_model(self):
         """
         Author: Alexander Cherry
@@ -727,84 +863,137 @@ class TrainMenu(MenuWindow):
         :return:
         """
         exit_out = False
+        model_path = self.path_to_model_schema
+        # A saved model that finished training is fine tuned on the new rows of the data, with the columns, windows,
+        # and normalization it was trained with. A checkpoint of an unfinished run is resumed with the selected options.
+        saved_state = None
+        if model_path and checkpoints.is_saved_model(model_path) and os.path.isfile(checkpoints.state_path(model_path)):
+            saved_state = checkpoints.TrainingState.load(checkpoints.state_path(model_path))
+        fine_tune = saved_state is not None and saved_state.complete
         if self.training_csv is None:
             self.output_text.output('- No CSV file has been selected as training data.')
             exit_out = True
-        if self.path_to_model_schema is None:
+        if not model_path:
             self.output_text.append_output('- Could not train model. No model JSON selected.')
             exit_out = True
-        if len(self.training_features.curselection()) == 0:
+        if not fine_tune and len(self.training_features.curselection()) == 0:
             self.output_text.append_output('- No training features selected.')
             exit_out = True
-        if len(self.output_features.curselection()) == 0:
+        if not fine_tune and len(self.output_features.curselection()) == 0:
             self.output_text.append_output('- No output features selected.')
             exit_out = True
+        if fine_tune and not os.path.isfile(model_path[:-3] + '_scaler.json'):
+            self.output_text.append_output('- The model was saved without its scaler, so it cannot be fine tuned.')
+            exit_out = True
         if exit_out:
             self.output_text.append_output('----------------------------------\n\n')
             return
 
-        self.output_text.output('Training has started...')
-        model_path = self.path_to_model_schema
-        imputer = self.imputer_selection.get()
-        imputed_data = pipeline.DataImputer(imputer)(self.training_csv)
+        # Wall time, CPU time, and output sizes are always recorded. Tracing memory slows training down, so it is only
+        # done when asked for.
+        profile = profiling.RunProfile(trace_memory=profiling.memory_profiling_enabled())
+        self.pipeline.impute(self.imputer_selection.get())
+        if fine_tune:
+            self.output_text.output(f'Fine tuning {os.path.basename(model_path)} on the data after '
+                                    f'{saved_state.training_cutoff}...')
+            try:
+                self.pipeline.fine_tune(saved_state, pipeline.FeatureScaler.load(model_path[:-3] + '_scaler.json'))
+                if len(self.pipeline.timeseries(profile)[0].training_samples.samples) == 0:
+                    raise ValueError('There are not enough rows after the training cutoff to fine tune on.')
+            except (ValueError, IndexError) as e:
+                self.output_text.append_output(f'- {e}')
+                return
+        else:
+            self.__set_training_stages()
+            if saved_state is not None:
+                self.output_text.output(f'Resuming training at split {saved_state.split + 1}, epoch '
+                                        f'{saved_state.epoch + 1}...')
+            else:
+                self.output_text.output('Training has started...')
+        epochs = int(self.epoch.get("1.0", "end-1c"))
+        learning_rate = float(self.learning_rate.get("1.0", "end-1c"))
+        # A blank patience turns early stopping or the learning rate reduction off.
+        early_stopping = self.early_stopping.get("1.0", "end-1c").strip()
+        lr_patience = self.lr_patience.get("1.0", "end-1c").strip()
+        interrupt_running = tfcallbacks.CancelModelTraining(self.output_text)
+        self.cancel_button.configure(command=interrupt_running.cancel_training)
+        warm_start = self.split_type_selection.get() == 'Expanding Split' and self.expanding_warm_start.get()
+        self.trained_with = models.schema_trainer(model_path) if model_path.endswith('.json') \
+            else models.KERAS_TRAINER
+        if self.trained_with != models.KERAS_TRAINER:
+            # Trees are trained with the rounds and parameters of their schema, the epoch options do not apply.
+            trainer = boosting.BoostedForecastTrainer.from_schema(model_path)
+        else:
+            trainer = pipeline.ForecastModelTrainer(model_path,
+                                                    warm_start=warm_start,
+                                                    checkpoint=checkpoints.resume_checkpoint_path(),
+                                                    early_stopping=int(early_stopping) if early_stopping else None,
+                                                    reduce_lr=int(lr_patience) if lr_patience else None,
+                                                    best_checkpoint=checkpoints.best_checkpoint_path())
+        self.trained_model, history, report = self.pipeline.train(
+            trainer,
+            epochs,
+            learning_rate,
+            callbacks=[tfcallbacks.OutputEpoch(self.output_text, epochs), interrupt_running],
+            profile=profile
+        )
+        self.trained_epochs = trainer.state.epoch
+        # The splits before a resumed split are not trained again, so only the trained splits are reported.
+        timeseries_data = self.pipeline.timeseries()[-len(trainer.predictions):]
+        if not interrupt_running.canceled:
+            self.model_fit_reporter = pipeline.ModelEvaluationReporter(self.trained_model,
+                                                                       history,
+                                                                       trainer.predictions,
+                                                                       trainer.train_evaluation,
+                                                                       trainer.test_evaluation)
+            profile.wrap(self.model_fit_reporter)(timeseries_data)
+            self.run_profile = profile
+            self.output_text.append_output(f'Your model has finished training!\n'
+                                           f'Press the "Save Model" button to save it as a file.\n'
+                                           f'---------------------------------------------------\n'
+                                           f'Model Performance:\n'
+                                           f'{report}\n'
+                                           f'---------------------------------------------------\n'
+                                           f'Run Profile:\n'
+                                           f'{profile}')
+        else:
+            self.trained_model = None
+
+    def __set_training_stages(self):
+        """
+        Sets the split, normalizer, and transformer stages of the pipeline from the options of the menu.
+        """
         split = self.split_type_selection.get()
-        splits = None
         if split == 'Straight Split':
             train_size = self.straight_training_slider.get() / 100
             val_size = self.straight_validation_slider.get() / 100
-            splits = pipeline.StraightSplit(train_size, val_size)(imputed_data)
+            self.pipeline.split(pipeline.StraightSplit, train_size, val_size)
         elif split == 'Rolling Split':
             train_size = int(self.rolling_training_size.get("1.0", "end-1c"))
             test_size = int(self.rolling_testing_size.get("1.0", "end-1c"))
             val_size = int(self.rolling_validation_size.get("1.0", "end-1c"))
             stride = int(self.rolling_stride_size.get("1.0", "end-1c"))
             gap = int(self.rolling_gap_size.get("1.0", "end-1c"))
-            splits = pipeline.RollingSplit(train_size, test_size, val_size, stride, gap)(imputed_data)
+            self.pipeline.split(pipeline.RollingSplit, train_size, test_size, val_size, stride, gap)
         elif split == 'Expanding Split':
             train_size = int(self.expanding_training_size.get("1.0", "end-1c"))
             test_size = int(self.expanding_testing_size.get("1.0", "end-1c"))
             val_size = int(self.expanding_validation_size.get("1.0", "end-1c"))
             expansion_rate = int(self.expanding_expansion_rate.get("1.0", "end-1c"))
             gap = int(self.expanding_gap_size.get("1.0", "end-1c"))
-            splits = pipeline.ExpandingSplit(train_size, test_size, val_size, expansion_rate, gap)(imputed_data)
+            self.pipeline.split(pipeline.ExpandingSplit, train_size, test_size, val_size, expansion_rate, gap)
         normalizer = self.normalization_selection.get()
-        normalized_splits = None
         if normalizer == 'Min-Max':
-            normalized_splits = pipeline.MinMaxNormalizer(splits)()
+            self.pipeline.normalize(pipeline.MinMaxNormalizer)
         elif normalizer == 'Z Standardization':
-            normalized_splits = pipeline.ZStandardizer(splits)()
+            self.pipeline.normalize(pipeline.ZStandardizer)
         features_in = [self.training_features.get(i) for i in self.training_features.curselection()]
         features_out = [self.output_features.get(i) for i in self.output_features.curselection()]
         width_in = int(self.input_width.get("1.0", "end-1c"))
         width_out = int(self.output_width.get("1.0", "end-1c"))
         transformer_stride = int(self.stride.get("1.0", "end-1c"))
         time_offset = int(self.time_offset.get("1.0", "end-1c"))
-        timeseries_data = pipeline.SupervisedTimeseriesTransformer(features_in,
-                                                                   features_out,
-                                                                   width_in,
-                                                                   width_out,
-                                                                   transformer_stride,
-                                                                   time_offset)(normalized_splits)
-        epochs = int(self.epoch.get("1.0", "end-1c"))
-        learning_rate = float(self.learning_rate.get("1.0", "end-1c"))
-        interrupt_running = CancelModelTraining(self.output_text)
-        self.cancel_button.configure(command=interrupt_running.cancel_training)
-        self.trained_model, history, report = pipeline.ForecastModelTrainer(model_path)(
-            timeseries_data,
-            epochs,
-            learning_rate,
-            callbacks=[OutputEpoch(self.output_text, epochs), interrupt_running]
-        )
-        if not interrupt_running.canceled:
-            self.model_fit_reporter = ModelEvaluationReporter(self.trained_model, history)
-            self.model_fit_reporter(timeseries_data)
-            self.output_text.append_output(f'Your model has finished training!\n'
-                                           f'Press the "Save Model" button to save it as a file.\n'
-                                           f'---------------------------------------------------\n'
-                                           f'Model Performance:\n'
-                                           f'{report}')
-        else:
-            self.trained_model = None
+        self.pipeline.transform(features_in, features_out, width_in, width_out, transformer_stride, time_offset)
 
     def cancel_training_model(self):
         self.output_text.output('No model is currently being trained.')
@@ -831,12 +1020,42 @@ class TrainMenu(MenuWindow):
         output_features ListBoxes
         :return:
         """
-        self.path_to_csv = fdiag.askopenfilename(filetypes=[(ui.CSV_FILE_LABEL, ui.CSV_FILE_TYPE)])
-        if self.path_to_csv != '':
-            df = pd.read_csv(self.path_to_csv, parse_dates=True)
-            self.training_csv = df.select_dtypes(include=[np.number])
+        path_to_csv = fdiag.askopenfilename(filetypes=[(ui.CSV_FILE_LABEL, ui.CSV_FILE_TYPE)])
+        if path_to_csv != '':
+            file_name = os.path.basename(path_to_csv)
+            self.csv_selector.config(state=tk.DISABLED)
+            self.output_text.output(f'Loading {file_name}...')
+            BackgroundTask(
+                self.container,
+                lambda progress: datacache.load_numeric_csv(path_to_csv, progress=progress),
+                on_done=lambda data: self.csv_loaded(path_to_csv, data),
+                on_progress=lambda fraction: self.csv_load_progress(file_name, fraction),
+                on_error=lambda e: self.csv_load_failed(file_name, e)
+            ).start()
+
+    def csv_loaded(self, path_to_csv: str, data: 'pd.DataFrame'):
+        """
+        Purpose: Receives the numeric columns of an uploaded csv once they have been loaded in the background.
+        :return:
+        """
+        self.path_to_csv = path_to_csv
+        self.training_csv = data
+        self.pipeline.set_data(data)
+        if self.body.winfo_exists():
+            self.csv_selector.config(state=tk.NORMAL)
             self.generate_training_and_output_features()
             self.csv_selection_label.config(text=os.path.basename(self.path_to_csv))
+            self.output_text.output(f'Loaded {len(data)} rows of {len(data.columns)} numeric columns from '
+                                    f'{os.path.basename(self.path_to_csv)}.')
+
+    def csv_load_progress(self, file_name: str, fraction: float):
+        if self.body.winfo_exists():
+            self.output_text.output(f'Loading {file_name}... {int(fraction * 100)}%')
+
+    def csv_load_failed(self, file_name: str, error: Exception):
+        if self.body.winfo_exists():
+            self.csv_selector.config(state=tk.NORMAL)
+            self.output_text.output(f'Unable to load {file_name}:\n{error}')
 
     def upload_schema(self):
         """
@@ -845,14 +1064,14 @@ class TrainMenu(MenuWindow):
         train_model function
         :return: 
         """
-        self.path_to_model_schema = fdiag.askopenfilename(filetypes=[(ui.JSON_FILE_LABEL, ui.JSON_FILE_TYPE)])
+        self.path_to_model_schema = fdiag.askopenfilename(filetypes=[(ui.JSON_FILE_LABEL, ui.JSON_FILE_TYPE),
+                                                                     (ui.MODEL_FILE_LABEL, ui.MODEL_FILE_TYPE)])
         self.schema_selection_label.config(text=os.path.basename(self.path_to_model_schema))
 
 
 class ClimateChangeMenu(MenuWindow):
     def __init__(self, app_frame: tk.Frame):
         MenuWindow.__init__(self, app_frame)
-        self.dates = []
         self.generate_plot_button = None  # Type: tk.Button
         self.data_source_table_button = None  # Type: tk.Button
         self.upload_new_data = None  # Type: tk.Button
@@ -860,11 +1079,16 @@ class ClimateChangeMenu(MenuWindow):
         self.tool_frame = None  # Type: tk.Frame
         self.data_selection_box = None  # Type: tk.Listbox
         self.source_data = None  # Type: pd.DataFrame
+        self.source_columns = []  # Type: List[str]
+        self.series_plot = None  # Type: plotting.SeriesPlot
+        self.table_model = None  # Type: datatable.TableModel
 
     def init_ui(self):
         MenuWindow.init_ui(self)
+        self.series_plot = None
         try:
-            self.source_data = ClimateAccess.get_source_data()
+            if self.source_data is None:
+                self.source_columns = ClimateAccess.get_source_columns()
         except FileNotFoundError:
             print('Unable to load Default Data')
         self.graph_frame = tk.Frame(master=self.body, bg=ui.BACKGROUND_COLOR)
@@ -922,27 +1146,12 @@ class ClimateChangeMenu(MenuWindow):
                     and is included in \\WeatherAI\\data\\mlo_full.csv
         :return:
         """
-        for widget in self.graph_frame.winfo_children():
-            widget.destroy()
-        figure = Figure(figsize=(7, 5), dpi=100, constrained_layout=True)
-        source_data_plot = figure.add_subplot(111)
-        source_data_plot.grid()
+        if self.series_plot is None:
+            for widget in self.graph_frame.winfo_children():
+                widget.destroy()
+            self.series_plot = plotting.SeriesPlot(self.graph_frame)
         selected_data = [self.data_selection_box.get(i) for i in self.data_selection_box.curselection()]
-        source_data_plot.set_ylabel(','.join(map(str, selected_data)))
-        if self.dates is not None:
-            source_data_plot.set_xlabel('Dates')
-            for field in selected_data:
-                source_data_plot.plot(self.dates, self.source_data[field], marker='o', markersize=2)
-        else:
-            source_data_plot.set_xlabel('Index')
-            for field in selected_data:
-                source_data_plot.plot(self.source_data.index, self.source_data[field], marker='o', markersize=2)
-        source_data_plot.legend(selected_data, loc='upper right')
-        canvas = FigureCanvasTkAgg(figure, master=self.graph_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack()
-        toolbar = NavigationToolbar2Tk(canvas, self.graph_frame)
-        toolbar.update()
+        self.series_plot.plot(self.select_data(selected_data), selected_data)
 
     def populate_data_picker(self):
         """
@@ -951,12 +1160,19 @@ class ClimateChangeMenu(MenuWindow):
         :return:
         """
         self.data_selection_box.delete(0, tk.END)
-        self.dates = None
-        if 'date' in self.source_data.columns:
-            self.dates = self.source_data[['date']]
-        for i in self.source_data:
-            self.data_selection_box.insert(tk.END, self.source_data[i].name)
-        self.data_selection_box.delete(0)
+        for column in self.source_columns:
+            self.data_selection_box.insert(tk.END, column)
+
+    def select_data(self, columns: List[str] = None) -> 'pd.DataFrame':
+        """
+        Purpose: Returns the given columns of the uploaded data. If no data is uploaded then the columns are loaded
+                 from the default data instead. Only the requested columns of the default data are read from disk.
+        :param columns: The columns to select. Every column is selected if None.
+        :return: Returns the selected data indexed by date if the data has dates, otherwise by row number.
+        """
+        if self.source_data is None:
+            return ClimateAccess.get_source_data(columns)
+        return self.source_data if columns is None else self.source_data[columns]
 
     def generate_table(self):
         """
@@ -968,9 +1184,10 @@ class ClimateChangeMenu(MenuWindow):
         """
         for widget in self.graph_frame.winfo_children():
             widget.destroy()
-        table = Table(self.graph_frame, dataframe=self.source_data, showtoolbar=True, showstatusbar=True)
-        table.show()
-        table.redraw()
+        self.series_plot = None
+        if self.table_model is None:
+            self.table_model = datatable.TableModel(self.select_data())
+        datatable.VirtualTable(self.graph_frame, self.table_model).show()
 
     def upload_data(self):
         """
@@ -979,7 +1196,47 @@ class ClimateChangeMenu(MenuWindow):
         table, and populating the data_viewer listbox
         :return: 
         """
-        new_data = fdiag.askopenfile(mode='r', filetypes=[(ui.CSV_FILE_LABEL, ui.CSV_FILE_TYPE)])
-        if new_data is not None:
-            self.source_data = pd.read_csv(new_data, parse_dates=True)
+        path_to_csv = fdiag.askopenfilename(filetypes=[(ui.CSV_FILE_LABEL, ui.CSV_FILE_TYPE)])
+        if path_to_csv != '':
+            self.upload_new_data.config(state=tk.DISABLED)
+            BackgroundTask(
+                self.container,
+                lambda progress: datacache.load_numeric_csv(path_to_csv, 'date', progress),
+                on_done=self.data_loaded,
+                on_progress=self.data_load_progress,
+                on_error=lambda e: self.data_load_failed(os.path.basename(path_to_csv), e)
+            ).start()
+
+    def data_loaded(self, data: 'pd.DataFrame'):
+        """
+        Purpose: Receives uploaded data once it has been loaded in the background and shows its columns.
+        :return:
+        """
+        self.source_data = data
+        self.source_columns = list(self.source_data.columns)
+        self.table_model = None
+        if self.body.winfo_exists():
+            self.data_load_progress(None)
             self.populate_data_picker()
+
+    def data_load_failed(self, file_name: str, error: Exception):
+        """
+        Purpose: Resets the upload button and shows why uploaded data could not be loaded.
+        :return:
+        """
+        if self.body.winfo_exists():
+            self.data_load_progress(None)
+            messagebox.showerror('Upload New Data', f'Unable to load {file_name}:\n{error}', parent=self.body)
+
+    def data_load_progress(self, fraction: float = None):
+        """
+        Purpose: Shows the loading progress of uploaded data on the upload button. The button is reset if fraction is
+        None.
+        :return:
+        """
+        if not self.body.winfo_exists():
+            return
+        if fraction is None:
+            self.upload_new_data.config(text='Upload New Data', state=tk.NORMAL)
+        else:
+            self.upload_new_data.config(text=f'Loading... {int(fraction * 100)}%')
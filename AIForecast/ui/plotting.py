@@ -0,0 +1,124 @@
+import tkinter as tk
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib import dates as mdates
+from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.ticker import AutoLocator, ScalarFormatter
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    | Reduces a series to at most two points per bucket by keeping the minimum and the maximum point of each bucket in
+      their original order. With one bucket per horizontal pixel the decimated line is drawn identically to the full
+      line, since every vertical extent within a pixel column is preserved.
+    |
+    | NaN values are ignored when looking for the extremes of a bucket. A bucket of only NaN values keeps a NaN point so
+      the line still shows a gap there.
+    :param x: The x values of the series, sorted in ascending order.
+    :param y: The y values of the series.
+    :param buckets: The number of buckets to reduce the series to.
+    :return: Returns the decimated x and y values. The series is returned unchanged if it is already small enough.
+    """
+    n = len(y)
+    buckets = max(int(buckets), 1)
+    if n <= 2 * buckets:
+        return x, y
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    pad = buckets * size - n
+    nan = np.isnan(y)
+    y_min = np.pad(np.where(nan, np.inf, y), (0, pad), constant_values=np.inf).reshape(buckets, size)
+    y_max = np.pad(np.where(nan, -np.inf, y), (0, pad), constant_values=-np.inf).reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    idx = np.stack([offsets + y_min.argmin(axis=1), offsets + y_max.argmax(axis=1)], axis=1)
+    idx = np.minimum(np.sort(idx, axis=1).ravel(), n - 1)
+    return x[idx], y[idx]
+
+
+class SeriesPlot:
+    """
+    | A line plot that keeps a single figure, canvas, and toolbar alive for the lifetime of its frame. Plotting new
+      series updates the existing lines in place instead of rebuilding the figure.
+    |
+    | Series are decimated to the pixel width of the axes before they are drawn. Zooming or panning with the navigation
+      toolbar re-decimates the visible range from the full resolution series, so detail appears as the view narrows.
+    """
+
+    MARKER_DENSITY = 4
+    """
+    Markers are only drawn once there are at least this many horizontal pixels per visible point.
+    """
+
+    def __init__(self, master: tk.Frame):
+        self.figure = Figure(figsize=(7, 5), dpi=100, constrained_layout=True)
+        self.axes = self.figure.add_subplot(111)
+        self.axes.grid()
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.canvas.get_tk_widget().pack()
+        self.toolbar = NavigationToolbar2Tk(self.canvas, master)
+        self.toolbar.update()
+        self.x: np.ndarray = np.array([])
+        self.series: Dict[str, np.ndarray] = {}
+        self.lines: Dict[str, Line2D] = {}
+        self.axes.callbacks.connect('xlim_changed', self.__on_xlim_changed)
+
+    def plot(self, data: pd.DataFrame, columns: List[str]):
+        """
+        Replaces the plotted series with the given columns of the data. The x axis is the index of the data.
+        :param data: The data to plot. A DatetimeIndex is shown as dates.
+        :param columns: The columns of the data to plot.
+        """
+        is_dated = isinstance(data.index, pd.DatetimeIndex)
+        x = mdates.date2num(data.index.to_numpy()) if is_dated else data.index.to_numpy(dtype=np.float64)
+        order = None if np.all(x[1:] >= x[:-1]) else np.argsort(x, kind='stable')
+        self.x = x if order is None else x[order]
+        self.series = {}
+        for col in columns:
+            y = data[col].to_numpy(dtype=np.float64)
+            self.series[col] = y if order is None else y[order]
+        for col in [col for col in self.lines if col not in self.series]:
+            self.lines.pop(col).remove()
+        for col in self.series:
+            if col not in self.lines:
+                self.lines[col], = self.axes.plot([], [], markersize=2)
+        if is_dated:
+            self.axes.xaxis_date()
+        else:
+            self.axes.xaxis.set_major_locator(AutoLocator())
+            self.axes.xaxis.set_major_formatter(ScalarFormatter())
+        self.axes.set_xlabel('Dates' if is_dated else 'Index')
+        self.axes.set_ylabel(','.join(map(str, columns)))
+        self.axes.legend([self.lines[col] for col in columns], columns, loc='upper right')
+        self.__autoscale()
+
+    def __autoscale(self):
+        if len(self.x) == 0 or len(self.series) == 0:
+            self.canvas.draw_idle()
+            return
+        y_ranges = [(np.nanmin(y), np.nanmax(y)) for y in self.series.values() if not np.all(np.isnan(y))]
+        if len(y_ranges) > 0:
+            y_min, y_max = min(r[0] for r in y_ranges), max(r[1] for r in y_ranges)
+            margin = (y_max - y_min) * 0.05 or 1
+            self.axes.set_ylim(y_min - margin, y_max + margin)
+        x_min, x_max = self.x[0], self.x[-1]
+        if x_min == x_max:
+            x_min, x_max = x_min - 1, x_max + 1
+        # Setting the x limits triggers __on_xlim_changed which decimates and draws the series.
+        self.axes.set_xlim(x_min, x_max)
+        self.toolbar.update()
+
+    def __on_xlim_changed(self, axes):
+        x_min, x_max = axes.get_xlim()
+        start = max(np.searchsorted(self.x, x_min, side='left') - 1, 0)
+        end = np.searchsorted(self.x, x_max, side='right') + 1
+        x = self.x[start:end]
+        width = max(int(axes.get_window_extent().width), 1)
+        for col, line in self.lines.items():
+            line_x, line_y = minmax_decimate(x, self.series[col][start:end], width)
+            line.set_data(line_x, line_y)
+            line.set_marker('o' if len(line_x) * self.MARKER_DENSITY <= width else '')
+        self.canvas.draw_idle()
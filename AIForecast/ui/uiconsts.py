@@ -46,3 +46,9 @@ JSON_FILE_TYPE = '*.json'
 JSON_FILE_LABEL = 'JSON Files'
 MODEL_FILE_TYPE = '*.h5'
 MODEL_FILE_LABEL = 'Keras Model Files'
+TFLITE_FILE_TYPE = '*.tflite'
+TFLITE_FILE_LABEL = 'TFLite Model Files'
+BUNDLE_FILE_TYPE = '*.aifb'
+BUNDLE_FILE_LABEL = 'Model Bundles'
+BOOSTED_FILE_TYPE = '*.xgb'
+BOOSTED_FILE_LABEL = 'Boosted Tree Models'
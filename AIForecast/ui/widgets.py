@@ -1,6 +1,8 @@
+import queue
+import threading
 import tkinter as tk
 from enum import Enum
-from typing import List, Dict
+from typing import Any, Callable, List, Dict
 
 from AIForecast import utils
 from AIForecast.ui import uiconsts as ui
@@ -143,6 +145,68 @@ class OutputWindow(Drawable):
         self.output_window.update()
 
 
+class BackgroundTask:
+    """
+    Runs a task on a worker thread so the UI stays responsive. Tk widgets may only be touched from the main thread, so
+    progress updates and the result are queued by the worker and handed to the callbacks from the Tk event loop.
+    """
+
+    POLL_INTERVAL = 50
+    """
+    Milliseconds between checks of the worker's queue.
+    """
+
+    def __init__(self,
+                 widget: tk.Widget,
+                 task: Callable[[Callable[[float], None]], Any],
+                 on_done: Callable[[Any], None],
+                 on_progress: Callable[[float], None] = None,
+                 on_error: Callable[[Exception], None] = None):
+        """
+        :param widget: Any widget of the window. Used to schedule polling on the Tk event loop.
+        :param task: The function to run on the worker thread. It is passed a progress function that accepts the
+                     fraction of the task that is done.
+        :param on_done: Called with the return value of the task.
+        :param on_progress: Called with every progress update of the task.
+        :param on_error: Called with the exception if the task raised one.
+        """
+        self.widget: tk.Widget = widget
+        self.task = task
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.__events: queue.Queue = queue.Queue()
+
+    def start(self):
+        threading.Thread(target=self.__run, daemon=True).start()
+        self.widget.after(self.POLL_INTERVAL, self.__poll)
+
+    def __run(self):
+        try:
+            self.__events.put(('done', self.task(lambda fraction: self.__events.put(('progress', fraction)))))
+        except Exception as e:
+            self.__events.put(('error', e))
+
+    def __poll(self):
+        while True:
+            try:
+                event, value = self.__events.get_nowait()
+            except queue.Empty:
+                break
+            if event == 'progress' and self.on_progress is not None:
+                self.on_progress(value)
+            elif event == 'done':
+                self.on_done(value)
+                return
+            elif event == 'error':
+                if self.on_error is None:
+                    raise value
+                self.on_error(value)
+                return
+        if self.widget.winfo_exists():
+            self.widget.after(self.POLL_INTERVAL, self.__poll)
+
+
 class MenuWindow(Drawable):
     """
     A standard Menu has a Nav bar and a body.
@@ -232,7 +296,7 @@ class AppWindow:
 
     @staticmethod
     def display_screen(screen: Menus):
-        utils.log(__name__).debug("Opening " + str(screen) + "!")
+        utils.log(__name__).debug("Opening %s!", screen)
         if AppWindow.current_menu is not None:
             AppWindow.current_menu.hide()
         AppWindow.current_menu = AppWindow.menu_list[screen]
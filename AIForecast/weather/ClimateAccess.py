@@ -1,7 +1,28 @@
+from os import path as osp
+from typing import List
+
 from AIForecast import utils
+from AIForecast.sysutils import datacache
 import pandas as pd
-import os
+
+SOURCE_DATA_FILE = 'mlo_full.csv'
+SOURCE_DATE_PARTS = ['year', 'month']
+
+
+def get_source_path() -> str:
+    return osp.join(utils.PathUtils.get_data_path(), SOURCE_DATA_FILE)
+
+
+def get_source_columns() -> List[str]:
+    """
+    Returns the names of the measurement columns of the source data without loading the measurements.
+    """
+    return datacache.cached_columns(get_source_path(), SOURCE_DATE_PARTS)
 
 
-def get_source_data():
-    return pd.read_csv(utils.PathUtils.get_data_path() + '\\mlo_full.csv', parse_dates={'date': ['year', 'month']})
+def get_source_data(columns: List[str] = None) -> pd.DataFrame:
+    """
+    Returns the source data indexed by date. Measurement columns are float32. Pass columns to only load the listed
+    columns.
+    """
+    return datacache.load_csv(get_source_path(), columns, SOURCE_DATE_PARTS)
@@ -1,4 +1,5 @@
 import json
+import logging
 
 import numpy as np
 import pandas as pd
@@ -6,11 +7,13 @@ import tensorflow as tf
 
 from sklearn.preprocessing import StandardScaler
 from tensorflow.keras.preprocessing import timeseries_dataset_from_array
-from tensorflow.python.keras.callbacks import ModelCheckpoint, History
+from tensorflow.python.keras.callbacks import EarlyStopping, History, ReduceLROnPlateau
 from tensorflow.python.keras.layers import LSTM, Dense
 from tensorflow.python.keras.models import Sequential, load_model
 
 from AIForecast import sysutils
+from AIForecast.modeling.checkpoints import BestCheckpoint, clear_checkpoints, latest_checkpoint
+from AIForecast.modeling.tfprofiler import ProfilerCapture
 from AIForecast.sysutils import datautils
 from AIForecast.utils import PathUtils
 
@@ -107,7 +110,18 @@ class ForecastingNetwork:
 
     _MAX_EPOCHS = 50
     """
-    The number of times the neural network is fed back.
+    The most times the neural network is fed back. Training usually stops early, once the validation loss stops
+    improving.
+    """
+
+    _PATIENCE = 5
+    """
+    The epochs without an improvement of the validation loss after which training stops.
+    """
+
+    _LR_PATIENCE = 3
+    """
+    The epochs without an improvement of the validation loss after which the learning rate is halved.
     """
 
     def __init__(self, data, batch_size=32):
@@ -123,7 +137,17 @@ class ForecastingNetwork:
         self.history: History = None
         self.generator = None
 
-    def train_network(self, hours_into_the_future, features=None):
+    def train_network(self, hours_into_the_future, features=None, profiler: ProfilerCapture = None, resume=False,
+                      patience=_PATIENCE, lr_patience=_LR_PATIENCE):
+        """
+        profiler - if given, a profiler trace is captured of its batch range while the network is trained.
+        resume - if True and an earlier run left checkpoints, training continues from the latest checkpoint's model
+        and epoch instead of starting over. The checkpoints have no optimizer state, so the optimizer of a resumed run
+        starts over, with newly initialized moment estimates. If False, the checkpoints of earlier runs are removed.
+        patience - the epochs without improvement after which training stops and the best weights are restored. None
+        trains for all _MAX_EPOCHS.
+        lr_patience - the epochs without improvement after which the learning rate is halved. None keeps it.
+        """
         if features is None:
             features = ['temperature']
 
@@ -137,18 +161,39 @@ class ForecastingNetwork:
             features
         )
         self.generator = batch_generator
-        self.history = self._compile_and_fit(batch_generator)
-        sysutils.log(__name__).debug(self.model.summary())
+        self.history = self._compile_and_fit(batch_generator, profiler, resume, patience, lr_patience)
+        logger = sysutils.log(__name__)
+        if logger.isEnabledFor(logging.DEBUG):
+            # summary prints the table and returns None, so its lines are handed to the logger instead.
+            self.model.summary(print_fn=lambda line, **kwargs: logger.debug(line))
 
     def get_example_predictions(self):
         return [self.unscale(pred, self.train_mean['temperature'], self.train_std['temperature'])
                 for pred in np.array(self.model.predict(self.generator.example[0])).flatten()]
 
-    def _compile_and_fit(self, generator: TimestepBatchGenerator):
-        checkpoint = ModelCheckpoint(
-            filepath=PathUtils.get_file(PathUtils.get_model_path(), 'model-{epoch:02d}.hdf5'),
-            verbose=1
-        )
+    def _compile_and_fit(self, generator: TimestepBatchGenerator, profiler: ProfilerCapture = None, resume=False,
+                         patience=_PATIENCE, lr_patience=_LR_PATIENCE):
+        # Only improving models are saved, on a background thread, so the latest checkpoint of a run is its best one.
+        # Earlier runs may have ended at later epochs, so a new run removes their checkpoints. The latest checkpoint is
+        # then always from the same run as the saved mean and standard deviation.
+        model_path = PathUtils.get_model_path()
+        if not resume:
+            clear_checkpoints(model_path)
+        callbacks = [BestCheckpoint(PathUtils.get_file(model_path, 'model-{epoch:02d}.hdf5'))]
+        if patience is not None:
+            callbacks.append(EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True))
+        if lr_patience is not None:
+            callbacks.append(ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=lr_patience))
+        if profiler is not None:
+            callbacks.append(profiler)
+        latest = latest_checkpoint(model_path) if resume else None
+        initial_epoch = 0
+        if latest is not None:
+            path, initial_epoch = latest
+            sysutils.log(__name__).info('Resuming training from %s', path)
+            self.model = load_model(path, compile=False)
+        # The checkpoints are saved without an optimizer, so a resumed model is compiled like a new one. Adam's moment
+        # estimates start over, which makes the first resumed epochs take larger steps than the interrupted run would.
         self.model.compile(
             loss=tf.losses.MeanSquaredError(),
             optimizer=tf.optimizers.Adam(),
@@ -158,8 +203,9 @@ class ForecastingNetwork:
         return self.model.fit(
             generator.train,
             epochs=ForecastingNetwork._MAX_EPOCHS,
+            initial_epoch=initial_epoch,
             validation_data=generator.validate,
-            callbacks=[checkpoint]
+            callbacks=callbacks
         )
 
     def _save_mean_std(self):
@@ -181,7 +227,10 @@ class ForecastingNetwork:
         Returns a saved predictive model along with a Series containing the mean for each feature and another
         Series containing the standard deviation of each feature.
         """
-        model = load_model(PathUtils.get_file(PathUtils.get_model_path(), 'model-50.hdf5'))
+        latest = latest_checkpoint(PathUtils.get_model_path())
+        if latest is None:
+            raise FileNotFoundError(f'No saved model found in {PathUtils.get_model_path()}.')
+        model = load_model(latest[0], compile=False)
         with open(PathUtils.get_file(PathUtils.get_model_path(), 'mean_std.json'), 'r') as f:
             mean_std = json.load(f)
         model_mean = pd.Series(mean_std['mean'])
@@ -0,0 +1,69 @@
+"""
+| Compares the training time, prediction time, and test error of the schema LSTM and of gradient boosted trees on the
+  monthly MLO CO2 series, run through the same pipeline and evaluated by the same metrics.
+|
+| Run from the repository root with: python -m benchmarks.bench_boosting [--epochs 50] [--splits 3]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+
+import pandas as pd
+
+from AIForecast.modeling.boosting import BoostedForecastTrainer
+from AIForecast.modeling.dataprocessing import ExpandingSplit, ForecastModelTrainer, ZStandardizer
+from AIForecast.modeling.pipeline import Pipeline
+from benchmarks.bench_xla import MODEL_SCHEMA
+
+MLO_DATA = os.path.join(os.path.dirname(__file__), '..', 'AIClimateChange', 'data', 'mlo_full.csv')
+FEATURE = 'co2_mean'
+WINDOW_IN, WINDOW_OUT = 24, 3
+
+
+def make_pipeline(splits: int) -> Pipeline:
+    """
+    :return: Returns the pipeline of the benchmark: every split is validated and tested on four years each, and the
+             training data of the **splits** splits grows by a year at a time up to the end of the series.
+    """
+    data = pd.read_csv(MLO_DATA, usecols=[FEATURE])
+    held_out, step = 48, 12
+    training_size = len(data) - 2 * held_out - step * (splits - 1) - 1
+    return Pipeline(data).impute('Simple') \
+        .split(ExpandingSplit, training_size, held_out, validation_size=held_out, expansion_rate=step) \
+        .normalize(ZStandardizer) \
+        .transform([FEATURE], [FEATURE], WINDOW_IN, WINDOW_OUT, label_offset=WINDOW_IN)
+
+
+def bench(name: str, trainer, pipeline: Pipeline, epochs: int) -> dict:
+    start = time.perf_counter()
+    model, _, _ = pipeline.train(trainer, epochs)
+    train_time = time.perf_counter() - start
+    windows = pipeline.timeseries()[-1].test_samples.samples
+    model.predict(windows)
+    start = time.perf_counter()
+    model.predict(windows)
+    predict_time = time.perf_counter() - start
+    test_mae = trainer.test_evaluation['mae'].mean()
+    return {'name': name, 'train': train_time, 'predict': predict_time * 1000, 'mae': test_mae}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip('| \n').splitlines()[0])
+    parser.add_argument('--epochs', type=int, default=50, help='Epochs the LSTM is trained for on every split.')
+    parser.add_argument('--splits', type=int, default=3)
+    args = parser.parse_args()
+    pipeline = make_pipeline(args.splits)
+    pipeline.timeseries()
+    results = [bench('lstm', ForecastModelTrainer(MODEL_SCHEMA), pipeline, args.epochs),
+               bench('xgboost hist', BoostedForecastTrainer(), pipeline, args.epochs)]
+    print(f'{args.splits} splits of {FEATURE}, {WINDOW_IN} months in, {WINDOW_OUT} months out')
+    print(f'{"":<16}{"train (s)":>12}{"predict (ms)":>14}{"test mae":>12}')
+    for result in results:
+        print(f'{result["name"]:<16}{result["train"]:>12.2f}{result["predict"]:>14.2f}{result["mae"]:>12.4f}')
+    print(f'Trees trained {results[0]["train"] / results[1]["train"]:.1f}x faster.')
+
+
+if __name__ == '__main__':
+    main()
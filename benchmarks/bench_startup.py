@@ -0,0 +1,103 @@
+"""
+| Measures how long the application takes to import, with python -X importtime, and checks it against a budget so the
+  main menu keeps showing in well under a second. The slowest imports are listed, and modules that should only be
+  imported once a menu uses them are reported if they were imported at startup.
+|
+| If a display is available, the time until the main menu is drawn is measured as well.
+|
+| Exits with status 1 if the import time is over budget or a heavy module was imported.
+|
+| Run from the repository root with: python -m benchmarks.bench_startup [--budget 0.3] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ENTRY_MODULE = 'AIForecast.main'
+IMPORT_BUDGET = 0.3
+"""
+Seconds the entry module may take to import, which leaves the rest of a second for Tk to draw the main menu.
+"""
+HEAVY_MODULES = ('tensorflow', 'sklearn', 'matplotlib', 'pyowm', 'pandastable', 'scipy', 'pandas')
+"""
+Modules that take hundreds of milliseconds or more to import and are not needed to draw the main menu.
+"""
+
+DRAW_MAIN_MENU = '''
+import time
+start = time.perf_counter()
+import tkinter as tk
+from AIForecast.ui.widgets import AppWindow, Menus
+from AIForecast.ui.menus import MainMenu, TestMenu, TrainMenu, ClimateChangeMenu
+root = tk.Tk()
+app = AppWindow(root)
+app.register_menu(MainMenu(app.frame), Menus.MAIN_MENU)
+app.register_menu(TestMenu(app.frame), Menus.TEST_MENU)
+app.register_menu(TrainMenu(app.frame), Menus.TRAIN_MENU)
+app.register_menu(ClimateChangeMenu(app.frame), Menus.DATA_VIEWER_MENU)
+app.display_screen(Menus.MAIN_MENU)
+root.update()
+print(time.perf_counter() - start)
+root.destroy()
+'''
+
+
+def import_times(module: str) -> Tuple[float, List[Tuple[str, float, float]], List[str]]:
+    """
+    | Imports the module in a fresh interpreter.
+    :return: Returns the cumulative import time of the module in seconds, the (module, self seconds, cumulative seconds)
+             of every imported module, and the heavy modules that were imported.
+    """
+    check = f'import sys, {module}; print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', check],
+                            capture_output=True, text=True, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times.append((name.strip(), int(own) / 1e6, int(cumulative) / 1e6))
+    total = next(cumulative for name, _, cumulative in times if name == module)
+    return total, times, [name for name in result.stdout.strip().split(',') if name]
+
+
+def draw_time() -> float:
+    """
+    :return: Returns the seconds from starting the interpreter's import of the UI until the main menu is drawn.
+    """
+    result = subprocess.run([sys.executable, '-c', DRAW_MAIN_MENU], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip('| \n').splitlines()[0])
+    parser.add_argument('--module', default=ENTRY_MODULE)
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET, help='Seconds the import may take.')
+    parser.add_argument('--runs', type=int, default=5, help='The median of this many fresh imports is reported.')
+    parser.add_argument('--top', type=int, default=10, help='Number of the slowest imports that are listed.')
+    args = parser.parse_args()
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    total = statistics.median(run[0] for run in runs)
+    _, times, heavy = runs[-1]
+    slowest: Dict[str, float] = {name: own for name, own, _ in times}
+    print(f'Import of {args.module}: {total * 1000:.1f} ms (median of {args.runs}, budget {args.budget * 1000:.0f} ms)')
+    print(f'{"slowest imports":<50}{"self (ms)":>12}')
+    for name, own in sorted(slowest.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'{name:<50}{own * 1000:>12.1f}')
+    if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin'):
+        print(f'Main menu drawn after {draw_time() * 1000:.1f} ms')
+    failed = False
+    if len(heavy) > 0:
+        print(f'Imported at startup, but should only be imported on first use: {", ".join(heavy)}')
+        failed = True
+    if total > args.budget:
+        print(f'Over budget by {(total - args.budget) * 1000:.1f} ms')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+| Compares the cold load time and single window latency of a saved model forecasted with the TensorFlow runtime and
+  with its TFLite exports.
+|
+| Run from the repository root with: python -m benchmarks.bench_tflite
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+
+import numpy as np
+
+from AIForecast.modeling.dataprocessing import ForecastModelTrainer, ModelForecaster
+from AIForecast.modeling.tflite import TFLiteForecaster, export_tflite, parity
+from benchmarks.bench_xla import MODEL_SCHEMA, make_timeseries
+
+
+def bench_latency(predict, windows: np.ndarray, repeats: int) -> dict:
+    """
+    :return: Returns the p50 and p99 latency in milliseconds of predicting one window at a time.
+    """
+    predict(windows[:1])
+    latencies = []
+    for _ in range(repeats):
+        for i in range(len(windows)):
+            start = time.perf_counter()
+            predict(windows[i:i + 1])
+            latencies.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {'p50': p50, 'p99': p99}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip('| \n').splitlines()[0])
+    parser.add_argument('--samples', type=int, default=512)
+    parser.add_argument('--steps-in', type=int, default=12)
+    parser.add_argument('--features', type=int, default=4)
+    parser.add_argument('--windows', type=int, default=200, help='Number of single windows the latency is timed on.')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    data = make_timeseries(args.samples, args.steps_in, args.features, 1)
+    model, _, _ = ForecastModelTrainer(MODEL_SCHEMA)([data], epochs=1)
+    windows = data.training_samples.samples[:args.windows]
+    location = tempfile.mkdtemp()
+    try:
+        model_path = os.path.join(location, 'model.h5')
+        test_path = os.path.join(location, 'test.npy')
+        model.save(model_path)
+        np.save(test_path, windows)
+        paths = {
+            'keras': model_path,
+            'tflite': export_tflite(model_path),
+            'tflite quantized': export_tflite(model_path, quantize=True)
+        }
+        print(f'{"":<18}{"size (KB)":>12}{"load (ms)":>12}{"p50 (ms)":>12}{"p99 (ms)":>12}{"max diff":>12}')
+        for name, path in paths.items():
+            forecaster_type = ModelForecaster if name == 'keras' else TFLiteForecaster
+            start = time.perf_counter()
+            forecaster = forecaster_type(path, test_path)
+            load_time = (time.perf_counter() - start) * 1000
+            latency = bench_latency(forecaster.predict, windows, args.repeats)
+            difference = 0.0 if name == 'keras' else parity(model, forecaster, windows)
+            print(f'{name:<18}{os.path.getsize(path) / 1024:>12.1f}{load_time:>12.1f}{latency["p50"]:>12.3f}'
+                  f'{latency["p99"]:>12.3f}{difference:>12.2g}')
+    finally:
+        shutil.rmtree(location)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+| Compares CPU training and inference throughput of the schema LSTM with and without XLA JIT compilation.
+|
+| Run from the repository root with: python -m benchmarks.bench_xla
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from AIForecast.modeling.dataprocessing import DTYPE, ForecastModelTrainer, StraightSplit, \
+    SupervisedTimeseriesTransformer, TimeseriesData, compile_inference
+
+MODEL_SCHEMA = os.path.join(os.path.dirname(__file__), '..', 'AIClimateChange', 'models', 'schema', 'model.json')
+
+
+def make_timeseries(num_samples: int, steps_in: int, features: int, steps_out: int, seed: int = 0) -> TimeseriesData:
+    """
+    :return: Returns training windows over a random walk, made by the same transformer the training menu uses.
+    """
+    rng = np.random.default_rng(seed)
+    columns = [f'col{i}' for i in range(features)]
+    walk = rng.normal(size=(num_samples + steps_in + steps_out, features)).cumsum(axis=0)
+    data = pd.DataFrame(walk, columns=columns).astype(DTYPE)
+    transformer = SupervisedTimeseriesTransformer(columns, columns, steps_in, steps_out)
+    return transformer(StraightSplit(train_split=1.0)(data))[0]
+
+
+def bench_training(data: TimeseriesData, epochs: int, jit_compile: bool) -> float:
+    """
+    :return: Returns the training samples per second, excluding the first epoch which includes tracing and compiling.
+    """
+    trainer = ForecastModelTrainer(MODEL_SCHEMA, jit_compile=jit_compile)
+    epoch_times = []
+
+    class EpochTimer(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            epoch_times.append(time.perf_counter() - self.start)
+
+    trainer([data], epochs=epochs + 1, callbacks=[EpochTimer()])
+    if jit_compile and not trainer.jit_compile:
+        print('  XLA training fell back to the default compiler')
+    return len(data.training_samples.samples) * epochs / sum(epoch_times[1:])
+
+
+def bench_inference(model: tf.keras.Model, samples: np.ndarray, batch_size: int, repeats: int) -> dict:
+    """
+    :return: Returns the samples per second of Model.predict and of compile_inference with and without XLA.
+    """
+    batches = [samples[i:i + batch_size] for i in range(0, len(samples), batch_size)]
+    runners = {
+        'predict': lambda x: model.predict(x, verbose=0),
+        'tf.function': compile_inference(model, jit_compile=False),
+        'tf.function+xla': compile_inference(model, jit_compile=True)
+    }
+    results = {}
+    for name, run in runners.items():
+        run(batches[0])
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for batch in batches:
+                run(batch)
+        results[name] = len(samples) * repeats / (time.perf_counter() - start)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip('| \n').splitlines()[0])
+    parser.add_argument('--samples', type=int, default=2048)
+    parser.add_argument('--steps-in', type=int, default=12)
+    parser.add_argument('--steps-out', type=int, default=1)
+    parser.add_argument('--features', type=int, default=4)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=1, help='Batch size of the inference benchmark.')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    data = make_timeseries(args.samples, args.steps_in, args.features, args.steps_out)
+
+    print(f'Training ({args.samples} samples, {args.epochs} epochs):')
+    for jit_compile in (False, True):
+        rate = bench_training(data, args.epochs, jit_compile)
+        print(f'  {"xla" if jit_compile else "default":<16}{rate:>12,.0f} samples/sec')
+
+    trainer = ForecastModelTrainer(MODEL_SCHEMA)
+    model, _, _ = trainer([data], epochs=1)
+    samples = data.training_samples.samples[:max(args.batch_size * 256, 256)]
+    print(f'Inference ({len(samples)} samples, batch size {args.batch_size}):')
+    for name, rate in bench_inference(model, samples, args.batch_size, args.repeats).items():
+        print(f'  {name:<16}{rate:>12,.0f} samples/sec')
+
+
+if __name__ == '__main__':
+    main()
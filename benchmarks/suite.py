@@ -0,0 +1,318 @@
+"""
+| Benchmarks of the data processing and forecasting hot paths on synthetic data.
+|
+| Every run is stored as JSON in benchmarks/results, named after the time of the run and the commit it ran on, and is
+  compared against the previous stored run of the same machine. Cases that ran more than --threshold times slower
+  than before are reported as regressions, and the run exits with status 1.
+|
+| Run from the repository root with: python -m benchmarks.suite [--sizes 1e3 1e4 ...] [--nan-density 0.05]
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from os.path import join as mkpath
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+
+import numpy as np
+
+from AIForecast.modeling import dataprocessing as pipeline
+from AIForecast.utils import PathUtils
+from AIForecast.weather import dataaccess
+from benchmarks import synthetic
+
+RESULTS_DIR = mkpath(os.path.dirname(os.path.abspath(__file__)), 'results')
+"""
+Directory the results of every run are stored in.
+"""
+MODEL_SCHEMA = mkpath(os.path.dirname(__file__), '..', 'AIClimateChange', 'models', 'schema', 'model.json')
+NOISE_FLOOR = 0.005
+"""
+Slowdowns of fewer seconds than this are never reported as regressions, since timings of a few milliseconds vary by
+more than the regression threshold between runs.
+"""
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5]
+WINDOW_IN, WINDOW_OUT = 12, 3
+
+
+class Case:
+    """
+    | A benchmarked operation. **setup** prepares the input for a given row count and NaN density, and returns the
+      function that is timed. Setup is never timed.
+    """
+
+    def __init__(self, name: str, setup: Callable[[int, float], Callable[[], object]], max_rows: int):
+        self.name = name
+        self.setup = setup
+        self.max_rows = max_rows
+
+
+CASES: Dict[str, Case] = {}
+
+
+def case(max_rows: int = 10 ** 7):
+    """
+    Registers a setup function as a benchmark case.
+    :param max_rows: The largest row count the case is run with. Cases whose cost grows faster than linearly are capped
+                     so a full sweep finishes in reasonable time.
+    """
+    def register(setup: Callable[[int, float], Callable[[], object]]):
+        CASES[setup.__name__] = Case(setup.__name__, setup, max_rows)
+        return setup
+    return register
+
+
+def _imputed(rows: int, nan_density: float):
+    return pipeline.DataImputer('Simple')(synthetic.make_timeseries(rows, nan_density=nan_density))
+
+
+def _rolling_splits(rows: int, nan_density: float):
+    data = _imputed(rows, nan_density)
+    return pipeline.RollingSplit(rows // 10, rows // 40, rows // 40, stride=max(rows // 20, 1))(data)
+
+
+@case()
+def simple_imputer(rows, nan_density):
+    data = synthetic.make_timeseries(rows, nan_density=nan_density)
+    return lambda: pipeline.DataImputer('Simple')(data)
+
+
+@case(max_rows=10 ** 5)
+def iterative_imputer(rows, nan_density):
+    data = synthetic.make_timeseries(rows, nan_density=nan_density)
+    return lambda: pipeline.DataImputer('Iterative')(data)
+
+
+@case()
+def straight_split(rows, nan_density):
+    data = _imputed(rows, nan_density)
+    return lambda: pipeline.StraightSplit(0.7, 0.1)(data)
+
+
+@case()
+def rolling_split(rows, nan_density):
+    data = _imputed(rows, nan_density)
+    return lambda: pipeline.RollingSplit(rows // 10, rows // 40, rows // 40, stride=max(rows // 20, 1))(data)
+
+
+@case()
+def expanding_split(rows, nan_density):
+    data = _imputed(rows, nan_density)
+    return lambda: pipeline.ExpandingSplit(rows // 2, rows // 20, rows // 20, expansion_rate=max(rows // 20, 1))(data)
+
+
+@case()
+def z_standardizer(rows, nan_density):
+    splits = _rolling_splits(rows, nan_density)
+    return lambda: pipeline.ZStandardizer(splits)()
+
+
+@case()
+def min_max_normalizer(rows, nan_density):
+    splits = _rolling_splits(rows, nan_density)
+    return lambda: pipeline.MinMaxNormalizer(splits)()
+
+
+@case(max_rows=10 ** 4)
+def timeseries_transformer(rows, nan_density):
+    data = _imputed(rows, nan_density)
+    splits = pipeline.StraightSplit(0.8, 0.1)(data)
+    columns = list(data.columns)
+    transformer = pipeline.SupervisedTimeseriesTransformer(columns, columns, WINDOW_IN, WINDOW_OUT)
+    return lambda: transformer(splits)
+
+
+@case(max_rows=10 ** 4)
+def sample_set_append(rows, nan_density):
+    data = _imputed(rows, nan_density)
+    windows = [(data.iloc[i:i + WINDOW_IN], data.iloc[i + WINDOW_IN:i + WINDOW_IN + WINDOW_OUT])
+               for i in range(rows - WINDOW_IN - WINDOW_OUT)]
+
+    def append_all():
+        sample_set = pipeline.SampleSet()
+        for sample, labels in windows:
+            sample_set.append_sample(sample, labels)
+        return sample_set
+    return append_all
+
+
+@case(max_rows=10 ** 6)
+def timestep_batch_generator(rows, nan_density):
+    # Imported here, since the weather forecasting module needs the Keras API of the pinned TensorFlow version.
+    from AIForecast.weather.forecasting import TimestepBatchGenerator
+    data = _imputed(rows, nan_density)
+    generator = TimestepBatchGenerator(data, data, data, WINDOW_IN, WINDOW_OUT, WINDOW_OUT, ['col0'])
+
+    def iterate():
+        for _ in generator.train:
+            pass
+    return iterate
+
+
+@case(max_rows=10 ** 6)
+def load_historical_data(rows, nan_density):
+    location = tempfile.mkdtemp()
+    os.makedirs(mkpath(location, PathUtils.DATA_DIR))
+    synthetic.make_historical_weather(rows).to_csv(mkpath(location, PathUtils.DATA_DIR, 'historical_weather.csv'))
+
+    def load():
+        save_path, is_custom = PathUtils._save_path, PathUtils._is_custom_path
+        PathUtils.set_save_path(location)
+        try:
+            dataaccess.load_historical_data()
+        finally:
+            PathUtils._save_path, PathUtils._is_custom_path = save_path, is_custom
+    load.cleanup = lambda: shutil.rmtree(location)
+    return load
+
+
+@case(max_rows=10 ** 5)
+def model_forecaster(rows, nan_density):
+    location = tempfile.mkdtemp()
+    data = _imputed(rows, nan_density).to_numpy()
+    windows = np.lib.stride_tricks.sliding_window_view(data, (WINDOW_IN, data.shape[1]))[:, 0]
+    model = pipeline.SCHEMAS.model(MODEL_SCHEMA, data.shape[1], 1)
+    model.build((None, WINDOW_IN, data.shape[1]))
+    model.save(mkpath(location, 'model'))
+    np.save(mkpath(location, 'test.npy'), windows)
+    forecaster = pipeline.ModelForecaster(mkpath(location, 'model'), mkpath(location, 'test.npy'))
+    # ModelForecaster.forecast is not finished yet, so its prediction of the test windows is what is timed.
+    predict = lambda: forecaster.predict(forecaster.test_np)
+    predict.cleanup = lambda: shutil.rmtree(location)
+    return predict
+
+
+def measure(timed: Callable[[], object], repeats: int, budget: float) -> dict:
+    """
+    | Times a function at least once and at most **repeats** times, stopping early once **budget** seconds have been
+      spent. The first call is timed as well, since several cases only run once at large sizes.
+    :return: Returns the fastest and the median time in seconds, and the number of rounds.
+    """
+    times = []
+    while len(times) < repeats and sum(times) < budget:
+        start = time.perf_counter()
+        timed()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'rounds': len(times)}
+
+
+def run(names: List[str], sizes: List[int], nan_density: float, repeats: int, budget: float) -> List[dict]:
+    results = []
+    for name in names:
+        for rows in sizes:
+            if rows > CASES[name].max_rows:
+                print(f'{name:<26}{rows:>10,}  skipped, above the {CASES[name].max_rows:,} row cap')
+                continue
+            try:
+                timed = CASES[name].setup(rows, nan_density)
+            except ImportError as e:
+                print(f'{name:<26}{rows:>10,}  skipped, {e}')
+                continue
+            try:
+                result = {'case': name, 'rows': rows, 'nan_density': nan_density}
+                result.update(measure(timed, repeats, budget))
+            finally:
+                getattr(timed, 'cleanup', lambda: None)()
+            print(f'{name:<26}{rows:>10,}{result["min"] * 1000:>14,.2f} ms  ({result["rounds"]} rounds)')
+            results.append(result)
+    return results
+
+
+def machine() -> dict:
+    return {'node': platform.node(), 'processor': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count(), 'python': platform.python_version()}
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save(results: List[dict]) -> str:
+    """
+    Stores the results of a run in RESULTS_DIR.
+    :return: Returns the path of the stored run.
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    now = datetime.now(timezone.utc)
+    run_commit = commit()
+    path = mkpath(RESULTS_DIR, f'{now:%Y%m%dT%H%M%S}_{run_commit}.json')
+    with open(path, 'w') as f:
+        json.dump({'commit': run_commit, 'time': now.isoformat(), 'machine': machine(), 'results': results}, f,
+                  indent=2)
+    return path
+
+
+def previous_run(exclude: str) -> Optional[dict]:
+    """
+    :return: Returns the latest stored run of this machine, other than **exclude**.
+    """
+    this_machine = machine()
+    for path in sorted(glob.glob(mkpath(RESULTS_DIR, '*.json')), reverse=True):
+        if os.path.abspath(path) == os.path.abspath(exclude):
+            continue
+        with open(path, 'r') as f:
+            stored = json.load(f)
+        if stored['machine'] == this_machine:
+            return stored
+    return None
+
+
+def compare(results: List[dict], baseline: dict, threshold: float) -> List[str]:
+    """
+    Prints the change of every case against a baseline run.
+    :return: Returns the cases that got slower than **threshold** times their baseline time.
+    """
+    before = {(r['case'], r['rows'], r['nan_density']): r['min'] for r in baseline['results']}
+    regressions = []
+    print(f'\nCompared to {baseline["commit"]} ({baseline["time"]}):')
+    for result in results:
+        key = (result['case'], result['rows'], result['nan_density'])
+        if key not in before:
+            continue
+        ratio = result['min'] / before[key]
+        flag = ''
+        if ratio > threshold and result['min'] - before[key] > NOISE_FLOOR:
+            flag = '  REGRESSION'
+            regressions.append(f'{result["case"]}[{result["rows"]}]')
+        print(f'{result["case"]:<26}{result["rows"]:>10,}{ratio:>10.2f}x{flag}')
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks of the data processing and forecasting hot paths.')
+    parser.add_argument('cases', nargs='*', help=f'Cases to run, out of {", ".join(CASES)}. Runs every case if none.')
+    parser.add_argument('--sizes', nargs='+', type=lambda size: int(float(size)), default=DEFAULT_SIZES,
+                        help='Row counts of the synthetic data, from 1e3 to 1e7.')
+    parser.add_argument('--nan-density', type=float, default=0.01)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=2.0, help='Seconds a case may spend repeating at one size.')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('--no-save', action='store_true', help='Do not store the results of this run.')
+    args = parser.parse_args()
+    unknown = [name for name in args.cases if name not in CASES]
+    if len(unknown) > 0:
+        parser.error(f'unknown cases: {", ".join(unknown)}')
+    results = run(args.cases or list(CASES), args.sizes, args.nan_density, args.repeats, args.budget)
+    path = '' if args.no_save else save(results)
+    baseline = previous_run(path)
+    regressions = [] if baseline is None else compare(results, baseline, args.threshold)
+    if len(regressions) > 0:
+        print(f'\n{len(regressions)} regression(s): {", ".join(regressions)}')
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
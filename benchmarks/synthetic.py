@@ -0,0 +1,52 @@
+"""
+| Synthetic data for the benchmarks. Every generator is seeded, so a benchmark sees the same data on every run and
+  results are comparable across commits.
+"""
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from AIForecast.weather import dataaccess
+
+
+def make_timeseries(rows: int, features: int = 4, nan_density: float = 0.0, freq: str = '10min',
+                    seed: int = 0) -> pd.DataFrame:
+    """
+    | Creates a multi-feature time series with a daily and a yearly cycle, a random walk trend, and noise, in the shape
+      of the hourly weather and monthly climate data the application trains on.
+    :param rows: The number of rows of the series. Scales to at least 10^7 rows.
+    :param features: The number of feature columns, named col0, col1, ...
+    :param nan_density: The fraction of cells, between 0 and 1, that are replaced with NaN at random.
+    :param freq: The pandas frequency of the DatetimeIndex of the series. At the default of ten minutes, 10^7 rows span
+                 190 years, which stays within the range of datetime64[ns].
+    :param seed: Seed of the random number generator.
+    :return: Returns the float64 series, as it would be read from a CSV file.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2000-01-01', periods=rows, freq=freq, name='date')
+    hours = (index.asi8 - index.asi8[0]) / 3.6e12 if rows > 0 else np.array([])
+    data = np.empty((rows, features))
+    for i in range(features):
+        data[:, i] = (np.sin(hours * (2 * np.pi / 24) + i)
+                      + 3 * np.sin(hours * (2 * np.pi / (24 * 365.2425)) + i)
+                      + rng.standard_normal(rows).cumsum() * 0.01
+                      + rng.standard_normal(rows) * 0.1)
+    if nan_density > 0:
+        data[rng.random((rows, features)) < nan_density] = np.nan
+    return pd.DataFrame(data, index=index, columns=[f'col{i}' for i in range(features)])
+
+
+def make_historical_weather(rows: int, cities: List[str] = None, seed: int = 0) -> pd.DataFrame:
+    """
+    :return: Returns hourly weather records with the columns of data/historical_weather.csv, read by
+             dataaccess.load_historical_data.
+    """
+    cities = ['Fairbanks', 'Anchorage', 'Juneau'] if cities is None else cities
+    weather = make_timeseries(rows, features=len(dataaccess.csv_columns) - 3, freq='H', seed=seed)
+    weather.columns = dataaccess.csv_columns[3:]
+    city_ids = np.arange(rows) % len(cities)
+    weather.insert(0, 'city_id', city_ids + 5000000)
+    weather.insert(0, 'city_name', np.asarray(cities, dtype=object)[city_ids])
+    weather.insert(0, 'timestamp', weather.index.strftime('%Y-%m-%dT%H:%M:%S'))
+    return weather.reset_index(drop=True)
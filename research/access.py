@@ -96,23 +96,40 @@
 |  *WARNING:* This site is not limited to data of interest by this project. Additional searching through this
    site is required.
 """
+import hashlib
+import json
+import os
 from ftplib import FTP
+from typing import List, Tuple
 from urllib import request
+from urllib.error import HTTPError
 
 from bs4 import BeautifulSoup
 from pandas import DataFrame
 
+SITE_EXPLORER_URL = 'https://www.esrl.noaa.gov/gmd/dv/site/?program=all'
+"""
+Location of the ESRL research site explorer. The site table is scraped from this page.
+"""
 SITE_META_CSV = 'data/esrl_site_meta.csv'
 """
 Relative path from access.py to the save location of the ESRL research site information table.
 """
+SITE_META_VALIDATORS = 'data/esrl_site_meta.json'
+"""
+Relative path from access.py to the save location of the HTTP validators (ETag, Last-Modified) and content hash of the
+last fetched research site table.
+"""
 CACHED_DATASETS = 'data/cached_datasets.json'
 """
 Relative path from access.py to the save location of cached_datasets.json.
 """
 
 
-def update_research_sites():
+def update_research_sites(url: str = SITE_EXPLORER_URL,
+                          csv_path: str = SITE_META_CSV,
+                          validators_path: str = SITE_META_VALIDATORS,
+                          conditional: bool = True) -> bool:
     """
     | **Author:** Alexander Cherry
     | **Author Email:** Alexander.Pennstate@yahoo.com
@@ -133,17 +150,85 @@ def update_research_sites():
     |
     | Call this function to update site table. Calls to this function should be infrequent, and made only during periodic
       checks to the NOAA website for updated information.
+    |
+    | **Conditional Refresh:**
+    | When **conditional** is True, the ETag and Last-Modified headers of the previous fetch are sent back as
+      If-None-Match and If-Modified-Since. A 304 response skips parsing entirely. Otherwise the table is parsed and the
+      CSV is only rewritten when the hash of the table content differs from the hash of the last written table.
+    :param url: Location of the site explorer page. Override to point at a locally served copy of the page.
+    :param csv_path: Save location of the site table.
+    :param validators_path: Save location of the HTTP validators and content hash of the last fetch.
+    :param conditional: True - send the stored validators with the request.<br/>
+                        False - always download and parse the page. The CSV is still only rewritten on a change.
+    :return: True if the site table CSV was rewritten, False if it is already up to date.
     """
-    with request.urlopen('https://www.esrl.noaa.gov/gmd/dv/site/?program=all') as site_explorer:
-        soup = BeautifulSoup(site_explorer.read(), features='html.parser')
+    csv_exists = os.path.isfile(csv_path)
+    validators = _load_validators(validators_path) if csv_exists else {}
+    site_request = request.Request(url)
+    if conditional and validators.get('etag'):
+        site_request.add_header('If-None-Match', validators['etag'])
+    if conditional and validators.get('last_modified'):
+        site_request.add_header('If-Modified-Since', validators['last_modified'])
+    try:
+        with request.urlopen(site_request) as site_explorer:
+            html = site_explorer.read()
+            headers = site_explorer.headers
+    except HTTPError as e:
+        if e.code == 304:
+            return False
+        raise
+    columns, table_content = _parse_site_table(html)
+    content = DataFrame(table_content, columns=columns).to_csv()
+    content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    rewrite = content_hash != validators.get('content_hash')
+    if rewrite:
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            f.write(content)
+    _save_validators(validators_path, {
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'content_hash': content_hash
+    })
+    return rewrite
+
+
+def _parse_site_table(html: bytes) -> Tuple[List[str], List[List[str]]]:
+    """
+    | Parses the site table out of the site explorer page. lxml is used when it is installed since it parses the page an
+      order of magnitude faster than BeautifulSoup's pure python 'html.parser'. BeautifulSoup is used as the fallback.
+    :param html: The raw site explorer page.
+    :return: Returns the column names of the site table and a list of rows of cell values.
+    """
+    try:
+        from lxml import html as lxml_html
+    except ImportError:
+        lxml_html = None
+    if lxml_html is not None:
+        site_table = lxml_html.fromstring(html).get_element_by_id('table')
+        columns = [col_name.text_content().strip() for col_name in site_table.iterfind('thead//th')]
+        table_content = [[val.text_content().strip() for val in row.iterfind('td')]
+                         for row in site_table.iterfind('tbody/tr')]
+        return columns, table_content
+    soup = BeautifulSoup(html, features='html.parser')
     site_table = soup.find(id='table')
     columns = [col_name.text.strip() for col_name in site_table.thead.find_all('th')]
     table_content = []
     for row in site_table.tbody.find_all('tr'):
         col_vals = [val.text.strip() for val in row.find_all('td')]
         table_content.append(col_vals)
-    site_table = DataFrame(table_content, columns=columns)
-    site_table.to_csv(SITE_META_CSV)
+    return columns, table_content
+
+
+def _load_validators(validators_path: str) -> dict:
+    if not os.path.isfile(validators_path):
+        return {}
+    with open(validators_path, 'r') as f:
+        return json.load(f)
+
+
+def _save_validators(validators_path: str, validators: dict):
+    with open(validators_path, 'w') as f:
+        json.dump(validators, f)
 
 
 def fetch_dataset_from_ftp(ftp_path: str, file_name: str):
@@ -0,0 +1,97 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from AIForecast.modeling.dataprocessing import ExpandingSplit, ModelEvaluationReporter, \
+    SupervisedTimeseriesTransformer
+from AIForecast.modeling.models import KERAS_TRAINER, schema_trainer
+
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'AIClimateChange', 'models', 'schema')
+
+
+class TestSchemaBackend(unittest.TestCase):
+    def test_trainer(self):
+        self.assertEqual(schema_trainer(os.path.join(SCHEMA_DIR, 'model.json')), KERAS_TRAINER)
+        self.assertEqual(schema_trainer(os.path.join(SCHEMA_DIR, 'xgboost.json')), 'xgboost')
+
+
+@unittest.skipIf(importlib.util.find_spec('xgboost') is None, 'xgboost is not installed')
+class TestBoostedForecastTrainer(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(rng.normal(size=(240, 2)).cumsum(axis=0), columns=['a', 'b'])
+        splits = ExpandingSplit(160, 30, validation_size=20, expansion_rate=15)(data)
+        self.timeseries = SupervisedTimeseriesTransformer(['a', 'b'], ['a', 'b'], 8, 2, label_offset=8)(splits)
+        self.tmp_location = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_location)
+
+    def test_report(self):
+        from AIForecast.modeling.boosting import BoostedForecastModel, BoostedForecastTrainer
+        trainer = BoostedForecastTrainer.from_schema(os.path.join(SCHEMA_DIR, 'xgboost.json'))
+        trainer.num_boost_round = 50
+        model, history, report = trainer(self.timeseries)
+        self.assertEqual(len(trainer.split_fits), 3)
+        self.assertIn('Training Evaluation:', report)
+        self.assertIn('Testing Evaluation:', report)
+        self.assertEqual(list(trainer.test_evaluation.index.names), ['split', 'step', 'feature'])
+        self.assertEqual(list(history.columns), ['loss', 'val_loss'])
+        self.assertTrue(trainer.state.complete)
+        # Early stopping keeps the trees up to the best round of every model.
+        for fit in trainer.split_fits:
+            self.assertLessEqual(fit.epochs, 50)
+        self.assertTrue(all(len(booster.get_dump()) <= 50 for booster in model.boosters))
+        windows = self.timeseries[-1].test_samples.samples
+        predictions = model.predict(windows)
+        self.assertEqual(predictions.shape, (len(windows), 2, 2))
+        np.testing.assert_allclose(predictions, trainer.predictions[-1][1])
+        # Models trained on a random walk should at least beat forecasting zero.
+        self.assertLess(trainer.test_evaluation['mae'].mean(),
+                        np.abs(self.timeseries[-1].test_samples.labels).mean())
+        path = os.path.join(self.tmp_location, 'model.xgb')
+        model.save(path)
+        np.testing.assert_allclose(BoostedForecastModel.load(path).predict(windows), predictions)
+        reporter = ModelEvaluationReporter(model, history, trainer.predictions, trainer.train_evaluation,
+                                           trainer.test_evaluation)
+        reporter(self.timeseries)
+        reporter.save(os.path.join(self.tmp_location, 'model'))
+        metrics = pd.read_csv(os.path.join(self.tmp_location, 'model_metrics.csv'))
+        self.assertEqual(list(metrics.columns), ['set', 'split', 'step', 'feature', 'mae', 'rmse', 'mape', 'bias'])
+
+    def test_forecaster(self):
+        from AIForecast.modeling.boosting import BoostedForecaster, BoostedForecastTrainer
+        model, _, _ = BoostedForecastTrainer(num_boost_round=10)(self.timeseries[:1])
+        path, windows_path = os.path.join(self.tmp_location, 'model.xgb'), os.path.join(self.tmp_location, 'test.npy')
+        model.save(path)
+        windows = self.timeseries[0].test_samples.samples
+        np.save(windows_path, windows)
+        forecaster = BoostedForecaster(path, windows_path)
+        forecast = forecaster.forecast(5)
+        # The models forecast 2 steps, so a longer horizon is cut to 2 steps.
+        self.assertEqual(list(forecast.index), [1, 2])
+        self.assertEqual(list(forecast.columns), ['a', 'b'])
+        np.testing.assert_allclose(forecast.to_numpy(), model.predict(windows[-1:])[0], rtol=1e-6)
+        self.assertEqual(len(forecaster.forecast(1)), 1)
+
+    def test_without_validation(self):
+        from AIForecast.modeling.boosting import BoostedForecastTrainer
+        data = pd.DataFrame(np.random.default_rng(1).normal(size=(120, 1)).cumsum(axis=0), columns=['a'])
+        timeseries = SupervisedTimeseriesTransformer(['a'], ['a'], 6, 1, label_offset=6)(
+            ExpandingSplit(90, 20)(data))
+        trainer = BoostedForecastTrainer(num_boost_round=10)
+        model, history, _ = trainer(timeseries)
+        # Without a validation set every round is trained and only the training loss is reported.
+        self.assertEqual(trainer.split_fits[-1].epochs, 10)
+        self.assertEqual(list(history.columns), ['loss'])
+        windows = timeseries[-1].test_samples.samples
+        self.assertEqual(model.predict(windows).shape, (len(windows), 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from AIForecast.modeling.bundle import ALIGNMENT, BundleForecaster, bundle_path, read_header, read_weights, \
+    save_bundle
+from AIForecast.modeling.dataprocessing import FeatureGenerator, ForecastModelTrainer, StraightSplit, ZStandardizer
+from AIForecast.modeling.pipeline import Pipeline
+
+MODEL_SCHEMA = os.path.join(os.path.dirname(__file__), '..', '..', 'AIClimateChange', 'models', 'schema', 'model.json')
+
+
+class TestModelBundle(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        rng = np.random.default_rng(0)
+        # Far from zero mean and unit variance, so forecasts are wrong unless the inputs are normalized.
+        cls.data = pd.DataFrame(rng.normal(size=(200, 2)).cumsum(axis=0) * 10 + 500, columns=['a', 'b'])
+        cls.pipeline = Pipeline(cls.data).impute('None').split(StraightSplit, train_split=0.8, validate_split=0.1) \
+            .normalize(ZStandardizer).transform(['a', 'b'], ['a', 'b'], 6, 2, label_offset=6)
+        cls.model, _, _ = cls.pipeline.train(ForecastModelTrainer(MODEL_SCHEMA), epochs=1)
+        cls.tmp_location = tempfile.mkdtemp()
+        cls.path = save_bundle(cls.model, bundle_path(os.path.join(cls.tmp_location, 'model.h5')),
+                               cls.pipeline.scaler(), cls.pipeline.training_state(1).transformer, {'epochs': 1})
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.tmp_location)
+
+    def test_layout(self):
+        header = read_header(self.path)
+        self.assertEqual(header['metadata'], {'epochs': 1})
+        self.assertTrue(all(entry['offset'] % ALIGNMENT == 0 for entry in header['weights']))
+        weights = read_weights(self.path, header)
+        self.assertIsInstance(weights[0].base, np.memmap)
+        for loaded, trained in zip(weights, self.model.get_weights()):
+            np.testing.assert_array_equal(loaded, trained)
+        with self.assertRaises(ValueError):
+            read_header(os.path.join(os.path.dirname(__file__), 'test_bundle.py'))
+
+    def test_raw_forecasts(self):
+        forecaster = BundleForecaster(self.path)
+        timeseries = self.pipeline.timeseries()[0]
+        scaler = self.pipeline.scaler()
+        # The raw windows of the data are the transformer's normalized windows before normalization.
+        windows = forecaster.windows(self.data)
+        np.testing.assert_allclose(scaler.scale_inputs(windows)[:len(timeseries.training_samples.samples)],
+                                   timeseries.training_samples.samples, atol=1e-5)
+        expected = scaler.unscale_outputs(self.model.predict(scaler.scale_inputs(windows), verbose=0))
+        np.testing.assert_allclose(forecaster.predict(self.data), expected, rtol=1e-4)
+        np.testing.assert_allclose(forecaster.predict(windows[-1]), expected[-1:], rtol=1e-4)
+        # The outputs follow the inputs and cover every input column, so forecasts are fed back to go past 2 steps.
+        forecast = forecaster.forecast(5, self.data)
+        self.assertEqual(list(forecast.index), [1, 2, 3, 4, 5])
+        self.assertEqual(list(forecast.columns), ['a', 'b'])
+        np.testing.assert_allclose(forecast.iloc[:2].to_numpy(), expected[-1], rtol=1e-4)
+
+    def test_derived_features(self):
+        generator = FeatureGenerator(['a'], windows=[5], statistics=['mean'])
+        pipeline = Pipeline(self.data).impute('None').features(generator) \
+            .split(StraightSplit, train_split=0.8, validate_split=0.1) \
+            .normalize(ZStandardizer).transform(['a', 'b', 'a_mean5'], ['a', 'b'], 6, 2, label_offset=6)
+        model, _, _ = pipeline.train(ForecastModelTrainer(MODEL_SCHEMA), epochs=1)
+        state = pipeline.training_state(1)
+        path = save_bundle(model, bundle_path(os.path.join(self.tmp_location, 'features.h5')), pipeline.scaler(),
+                           state.transformer, features=state.features)
+        self.assertEqual(read_header(path)['features'], generator.to_dict())
+        forecaster = BundleForecaster(path)
+        self.assertEqual(forecaster.bundle.raw_columns(), ['a', 'b'])
+        # The features are derived from the raw data, dropping the rows they look back over, before windowing.
+        scaler = pipeline.scaler()
+        windows = forecaster.windows(self.data)
+        self.assertEqual(len(windows), len(self.data) - generator.lookback - 6 + 1)
+        training = pipeline.timeseries()[0].training_samples.samples
+        np.testing.assert_allclose(scaler.scale_inputs(windows)[:len(training)], training, atol=1e-5)
+        expected = scaler.unscale_outputs(model.predict(scaler.scale_inputs(windows), verbose=0))
+        np.testing.assert_allclose(forecaster.predict(self.data[['a', 'b']]), expected, rtol=1e-4)
+        # The features are derived again from the forecasts of a and b to go past 2 steps.
+        forecast = forecaster.forecast(5, self.data)
+        self.assertEqual(list(forecast.index), [1, 2, 3, 4, 5])
+        np.testing.assert_allclose(forecast.iloc[:2].to_numpy(), expected[-1], rtol=1e-4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from AIForecast.modeling.catalog import ArtifactCatalog, schema_hash
+
+TRANSFORMER = {'input_columns': ['temp', 'humidity'], 'output_columns': ['temp'], 'input_width': 24,
+               'output_width': 1, 'stride': 1, 'label_offset': 1}
+
+
+def make_evaluation(mae: float) -> pd.DataFrame:
+    index = pd.MultiIndex.from_product([[0, 1], [0], ['temp']], names=['split', 'step', 'feature'])
+    return pd.DataFrame({'mae': [mae, mae + 2], 'rmse': [mae * 2] * 2, 'mape': [1.0] * 2, 'bias': [-mae] * 2},
+                        index=index)
+
+
+class TestArtifactCatalog(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_location = tempfile.mkdtemp()
+        self.catalog = ArtifactCatalog(os.path.join(self.tmp_location, 'catalog.sqlite'))
+
+    def tearDown(self) -> None:
+        self.catalog.close()
+        shutil.rmtree(self.tmp_location)
+
+    def save_model(self, name: str, mae: float, transformer: dict = None) -> str:
+        """
+        Writes the files of a saved model, as TrainMenu.save_model does, without training one.
+        """
+        path = os.path.join(self.tmp_location, name + '.h5')
+        with open(path, 'wb') as f:
+            f.write(b'model')
+        with open(path[:-3] + '_state.json', 'w') as f:
+            json.dump({'epoch': 5, 'split': 1, 'complete': True, 'training_cutoff': None,
+                       'transformer': transformer or TRANSFORMER}, f)
+        pd.concat({'train': make_evaluation(mae / 2), 'test': make_evaluation(mae)}, names=['set']) \
+            .to_csv(path[:-3] + '_metrics.csv')
+        return path
+
+    def test_record_and_query(self):
+        schema = os.path.join(self.tmp_location, 'model.json')
+        with open(schema, 'w') as f:
+            f.write('{"layers": []}')
+        good = self.save_model('good', 1.0)
+        bad = self.save_model('bad', 3.0)
+        wide = self.save_model('wide', 0.5, dict(TRANSFORMER, input_width=48))
+        self.catalog.record(good, schema, 'data', TRANSFORMER, make_evaluation(0.5), make_evaluation(1.0), 5)
+        self.catalog.record(bad, schema, 'data', TRANSFORMER, make_evaluation(1.5), make_evaluation(3.0), 5)
+        self.catalog.record(wide, None, 'other', dict(TRANSFORMER, input_width=48), None, make_evaluation(0.5), 5)
+        best = self.catalog.best('temp', input_width=24, limit=2)
+        self.assertEqual([entry['path'] for entry in best], [good, bad])
+        # The metrics of the splits are averaged.
+        self.assertAlmostEqual(best[0]['score'], 2.0)
+        self.assertEqual(best[0]['schema_hash'], schema_hash(schema))
+        self.assertEqual(best[0]['artifacts']['metrics'], good[:-3] + '_metrics.csv')
+        self.assertEqual(self.catalog.best('temp')[0]['path'], wide)
+        self.assertEqual(self.catalog.best('temp', set_name='train', limit=5)[0]['path'], good)
+        self.assertEqual(len(self.catalog.find(feature='humidity')), 3)
+        self.assertEqual(len(self.catalog.find(feature='humidity', role='output')), 0)
+        self.assertEqual([entry['path'] for entry in self.catalog.find(data_fingerprint='other')], [wide])
+        with self.assertRaises(ValueError):
+            self.catalog.best('temp', metric='mae; DROP TABLE models')
+
+    def test_rescan(self):
+        first = self.save_model('first', 1.0)
+        os.makedirs(os.path.join(self.tmp_location, 'runs'))
+        second = self.save_model(os.path.join('runs', 'second'), 2.0)
+        self.catalog.record(first, None, 'data', TRANSFORMER, make_evaluation(0.5), make_evaluation(1.0))
+        # The recorded model did not change since it was saved, so only the other model is read.
+        self.assertEqual(self.catalog.rescan([self.tmp_location]), (1, 0, 0))
+        self.assertEqual([entry['path'] for entry in self.catalog.best('temp', limit=5)], [first, second])
+        self.assertEqual(self.catalog.rescan([self.tmp_location]), (0, 0, 0))
+        os.remove(second)
+        self.save_model('first', 4.0)
+        os.utime(first, ns=(0, 0))
+        self.assertEqual(self.catalog.rescan([self.tmp_location]), (0, 1, 1))
+        # The fingerprint recorded at save time is kept, and the rest is read from the side files.
+        entry = self.catalog.find(feature='temp')
+        self.assertEqual([(e['path'], e['data_fingerprint'], e['epochs']) for e in entry], [(first, 'data', 5)])
+        self.assertAlmostEqual(self.catalog.best('temp')[0]['score'], 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,204 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from AIForecast.modeling.checkpoints import BestCheckpoint, TrainingState, clear_checkpoints, latest_checkpoint, \
+    state_path
+from AIForecast.modeling.dataprocessing import CutoffSplit, ForecastModelTrainer, RollingSplit, StraightSplit, \
+    SupervisedTimeseriesTransformer, ZStandardizer
+from AIForecast.modeling.pipeline import Pipeline
+
+MODEL_SCHEMA = os.path.join(os.path.dirname(__file__), '..', '..', 'AIClimateChange', 'models', 'schema', 'model.json')
+
+
+class Interrupt(tf.keras.callbacks.Callback):
+    def __init__(self, epoch: int):
+        super().__init__()
+        self.epoch = epoch
+
+    def on_epoch_begin(self, epoch, logs=None):
+        if epoch == self.epoch:
+            raise KeyboardInterrupt
+
+
+class FixedLoss(tf.keras.callbacks.Callback):
+    """
+    Replaces the validation loss of every epoch, so the callbacks after it see a known learning curve.
+    """
+
+    def __init__(self, losses):
+        super().__init__()
+        self.losses = losses
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs['val_loss'] = self.losses[min(epoch, len(self.losses) - 1)]
+
+
+class Cancel(tf.keras.callbacks.Callback):
+    """
+    Stops training after an epoch, the way the train menu cancels a run, and records which files exist at every epoch.
+    """
+
+    def __init__(self, epoch: int, path: str):
+        super().__init__()
+        self.epoch = epoch
+        self.path = path
+        self.existed = []
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.existed.append(os.path.exists(self.path))
+        if epoch + 1 == self.epoch:
+            self.model.stop_training = True
+
+
+def make_data(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2000-01-01', periods=rows, freq='D')
+    return pd.DataFrame(rng.normal(size=(rows, 2)).cumsum(axis=0), index=index, columns=['a', 'b'])
+
+
+class TestCheckpoints(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_location = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.tmp_location, 'checkpoint.h5')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_location)
+
+    def test_state_round_trip(self):
+        state = TrainingState(3, 1, True, pd.Timestamp('2000-02-01'), {'label_offset': 1})
+        state.save(state_path(self.checkpoint))
+        loaded = TrainingState.load(os.path.join(self.tmp_location, 'checkpoint_state.json'))
+        self.assertEqual((loaded.epoch, loaded.split, loaded.complete), (3, 1, True))
+        self.assertEqual(loaded.cutoff_label(pd.date_range('2000-01-01', periods=2)), pd.Timestamp('2000-02-01'))
+        self.assertEqual(loaded.transformer, {'label_offset': 1})
+
+    def test_latest_checkpoint(self):
+        self.assertIsNone(latest_checkpoint(self.tmp_location))
+        for epoch in (2, 10, 9):
+            open(os.path.join(self.tmp_location, f'model-{epoch:02d}.hdf5'), 'w').close()
+        path, epoch = latest_checkpoint(self.tmp_location)
+        self.assertEqual(epoch, 10)
+        self.assertEqual(os.path.basename(path), 'model-10.hdf5')
+        open(os.path.join(self.tmp_location, 'mean_std.json'), 'w').close()
+        # A new run removes the earlier run's checkpoints, so a shorter run's checkpoints are the latest.
+        self.assertEqual(clear_checkpoints(self.tmp_location), 3)
+        self.assertIsNone(latest_checkpoint(self.tmp_location))
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp_location, 'mean_std.json')))
+
+    def test_resume_interrupted_run(self):
+        data = make_data(200)
+        splits = ZStandardizer(StraightSplit(train_split=0.7, validate_split=0.15)(data))()
+        timeseries = SupervisedTimeseriesTransformer(['a', 'b'], ['a'], 6, 1)(splits)
+        with self.assertRaises(KeyboardInterrupt):
+            ForecastModelTrainer(MODEL_SCHEMA, checkpoint=self.checkpoint)(timeseries, epochs=4,
+                                                                           callbacks=[Interrupt(2)])
+        state = TrainingState.load(state_path(self.checkpoint))
+        self.assertEqual((state.epoch, state.split, state.complete), (2, 0, False))
+
+        trainer = ForecastModelTrainer(self.checkpoint, checkpoint=self.checkpoint)
+        model, history, _ = trainer(timeseries, epochs=4)
+        self.assertEqual(len(history), 2)
+        batches = int(np.ceil(len(timeseries[0].training_samples.samples) / 32))
+        self.assertEqual(int(model.optimizer.iterations.numpy()), 4 * batches)
+        state = TrainingState.load(state_path(self.checkpoint))
+        self.assertEqual((state.epoch, state.complete), (4, True))
+
+    def test_resume_checkpoint_on_cancel(self):
+        splits = ZStandardizer(StraightSplit(train_split=0.7, validate_split=0.15)(make_data(200)))()
+        timeseries = SupervisedTimeseriesTransformer(['a', 'b'], ['a'], 6, 1)(splits)
+        cancel = Cancel(3, self.checkpoint)
+        trainer = ForecastModelTrainer(MODEL_SCHEMA, checkpoint=self.checkpoint)
+        trainer(timeseries, epochs=5, callbacks=[cancel])
+        # The checkpoint is only written once the fit ends, not after every epoch.
+        self.assertListEqual(cancel.existed, [False, False, False])
+        state = TrainingState.load(state_path(self.checkpoint))
+        self.assertEqual((state.epoch, state.split, state.complete), (3, 0, False))
+        saved = tf.keras.models.load_model(self.checkpoint)
+        self.assertEqual(int(saved.optimizer.iterations.numpy()), int(trainer.model.optimizer.iterations.numpy()))
+
+    def test_cancel_stops_later_splits(self):
+        splits = ZStandardizer(RollingSplit(100, 20, 20, stride=25)(make_data(220)))()
+        timeseries = SupervisedTimeseriesTransformer(['a', 'b'], ['a'], 6, 1)(splits)
+        self.assertEqual(len(timeseries), 4)
+        cancel = Cancel(2, self.checkpoint)
+        trainer = ForecastModelTrainer(MODEL_SCHEMA, checkpoint=self.checkpoint)
+        trainer(timeseries, epochs=4, callbacks=[cancel])
+        # The canceled split is the last one trained, and the state points back at it.
+        self.assertListEqual([fit.epochs for fit in trainer.split_fits], [2])
+        self.assertEqual(len(trainer.predictions), 1)
+        state = TrainingState.load(state_path(self.checkpoint))
+        self.assertEqual((state.epoch, state.split, state.complete), (2, 0, False))
+
+        trainer = ForecastModelTrainer(self.checkpoint, checkpoint=self.checkpoint)
+        trainer(timeseries, epochs=4)
+        self.assertListEqual([fit.epochs for fit in trainer.split_fits], [2, 4, 4, 4])
+        state = TrainingState.load(state_path(self.checkpoint))
+        self.assertEqual((state.epoch, state.split, state.complete), (4, 3, True))
+
+    def test_fine_tune_on_new_rows(self):
+        pipeline = Pipeline(make_data(150)).impute('Simple').split(StraightSplit, train_split=0.8, validate_split=0.1) \
+            .normalize(ZStandardizer).transform(['a', 'b'], ['a'], 6, 2, label_offset=6)
+        model, _, _ = ForecastModelTrainer(MODEL_SCHEMA)(pipeline.timeseries(), epochs=2)
+        model_path = os.path.join(self.tmp_location, 'model.h5')
+        model.save(model_path)
+        state = pipeline.training_state(2)
+        state.save(state_path(model_path))
+        cutoff = make_data(150).index[119]
+        self.assertEqual(state.training_cutoff, cutoff)
+
+        state = TrainingState.load(state_path(model_path))
+        tuning = Pipeline(make_data(200)).impute('Simple').fine_tune(state, pipeline.scaler())
+        training = tuning.timeseries()[0].training_samples
+        # Every window labels rows after the cutoff, up to the last row.
+        self.assertEqual(len(training.samples), 200 - 120 - 1)
+        trainer = ForecastModelTrainer(model_path)
+        _, history, _ = trainer(tuning.timeseries(), epochs=1)
+        self.assertEqual(len(history), 1)
+        self.assertEqual(trainer.state.epoch, 3)
+
+    def test_best_checkpoint_writes_improvements(self):
+        model = tf.keras.Sequential([tf.keras.layers.Dense(1, input_shape=(2,))])
+        best = BestCheckpoint(os.path.join(self.tmp_location, 'model-{epoch:02d}.h5'))
+        best.set_model(model)
+        best.on_train_begin()
+        expected = None
+        for epoch, loss in enumerate([1.0, 2.0, 0.5, 0.7]):
+            model.set_weights([w + 1 for w in model.get_weights()])
+            if loss == 0.5:
+                expected = model.get_weights()
+            best.on_epoch_end(epoch, {'val_loss': loss})
+        best.on_train_end()
+        self.assertEqual(best.best_epoch, 2)
+        self.assertEqual(os.path.basename(best.writer.written[-1]), 'model-03.h5')
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_location, 'model-02.h5')))
+        saved = tf.keras.models.load_model(best.writer.written[-1], compile=False)
+        for saved_weights, expected_weights in zip(saved.get_weights(), expected):
+            np.testing.assert_array_equal(saved_weights, expected_weights)
+        self.assertEqual(latest_checkpoint(self.tmp_location, r'model-(\d+)\.h5')[1], 3)
+
+    def test_early_stopping(self):
+        splits = ZStandardizer(StraightSplit(train_split=0.7, validate_split=0.15)(make_data(200)))()
+        timeseries = SupervisedTimeseriesTransformer(['a', 'b'], ['a'], 6, 1)(splits)
+        trainer = ForecastModelTrainer(MODEL_SCHEMA, checkpoint=self.checkpoint, early_stopping=2, reduce_lr=1)
+        _, history, report = trainer(timeseries, epochs=20, callbacks=[FixedLoss([5, 4, 3, 3.5, 3.6])])
+        fit = trainer.split_fits[0]
+        self.assertEqual((fit.epochs, fit.max_epochs, fit.best_epoch), (5, 20, 3))
+        self.assertLess(history['lr'].iloc[-1], history['lr'].iloc[0])
+        self.assertIn('Early Stopping: 15 epochs skipped.', report)
+        # Early stopping finishes the run, it is not left to be resumed.
+        self.assertTrue(TrainingState.load(state_path(self.checkpoint)).complete)
+
+    def test_cutoff_without_new_rows(self):
+        data = make_data(20)
+        with self.assertRaises(IndexError):
+            CutoffSplit(data.index[-1])(data)
+
+
+if __name__ == '__main__':
+    unittest.main()
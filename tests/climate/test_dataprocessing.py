@@ -1,9 +1,16 @@
+from AIForecast.modeling import dataprocessing
 from AIForecast.modeling.dataprocessing import SupervisedTimeseriesTransformer, RollingSplit, ExpandingSplit, \
-    StraightSplit, ZStandardizer
+    StraightSplit, ZStandardizer, forecast_metrics, DataImputer, MinMaxNormalizer, ForecastModelTrainer, \
+    ModelEvaluationReporter, compile_inference
 from pandas.util import testing as pdtest
 import numpy as np
 import pandas as pd
+import tensorflow as tf
+import os
 import unittest
+from unittest import mock
+
+MODEL_SCHEMA = os.path.join(os.path.dirname(__file__), '..', '..', 'AIClimateChange', 'models', 'schema', 'model.json')
 
 
 class TestTimeseriesSplitter(unittest.TestCase):
@@ -264,5 +271,160 @@ class TestTimeseriesSplitter(unittest.TestCase):
             pdtest.assert_frame_equal(test['data'].iloc[:training_end_idx], splits[-1].train_split)
 
 
+class TestForecastMetrics(unittest.TestCase):
+    def test_per_horizon_metrics(self):
+        labels = np.array([[[1., 10.], [2., 20.]],
+                           [[3., 30.], [4., 40.]]])
+        predictions = labels + np.array([[[1., -2.], [0., 4.]],
+                                         [[-1., 2.], [2., 4.]]])
+        metrics = forecast_metrics(labels, predictions, ['a', 'b'], 2)
+        self.assertListEqual(list(metrics.index), [(0, 'a'), (0, 'b'), (1, 'a'), (1, 'b')])
+        self.assertAlmostEqual(metrics.loc[(0, 'a'), 'mae'], 1.)
+        self.assertAlmostEqual(metrics.loc[(0, 'a'), 'bias'], 0.)
+        self.assertAlmostEqual(metrics.loc[(0, 'b'), 'rmse'], 2.)
+        self.assertAlmostEqual(metrics.loc[(1, 'a'), 'mape'], 25.)
+        self.assertAlmostEqual(metrics.loc[(1, 'b'), 'bias'], 4.)
+
+    def test_single_step_labels(self):
+        labels = np.array([0., 2., 4.])
+        metrics = forecast_metrics(labels, np.array([[1.], [2.], [2.]]), ['a'], 1)
+        self.assertAlmostEqual(metrics.loc[(0, 'a'), 'mae'], 1.)
+        self.assertAlmostEqual(metrics.loc[(0, 'a'), 'mape'], 25.)
+
+
+class TestDtypePolicy(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'col0': rng.integers(0, 100, 40), 'col1': rng.normal(size=40)})
+        self.df.iloc[3, 1] = np.nan
+
+    def test_no_float64_reaches_fit(self):
+        imputed = DataImputer('Simple')(self.df)
+        self.assertTrue(all(dtype == np.float32 for dtype in imputed.dtypes))
+        for normalizer in (ZStandardizer, MinMaxNormalizer):
+            splits = normalizer(RollingSplit(20, 5, 5, stride=10)(imputed))()
+            for split in splits:
+                for frame in (split.train_split, split.validation_split, split.test_split, split.parent_data):
+                    self.assertTrue(all(dtype == np.float32 for dtype in frame.dtypes))
+        timeseries = SupervisedTimeseriesTransformer(['col0', 'col1'], ['col0', 'col1'], 3, 2)(splits)
+        trainer = ForecastModelTrainer(MODEL_SCHEMA)
+        fit_arrays = []
+        fit = tf.keras.Model.fit
+
+        def recording_fit(model, x, y, validation_data=None, **kwargs):
+            fit_arrays.extend([x, y] + ([] if validation_data is None else list(validation_data)))
+            return fit(model, x, y, validation_data=validation_data, verbose=0, **kwargs)
+
+        with mock.patch.object(tf.keras.Model, 'fit', recording_fit):
+            model, history, _ = trainer(timeseries, epochs=1)
+        self.assertGreater(len(fit_arrays), 0)
+        for array in fit_arrays:
+            self.assertEqual(array.dtype, np.float32)
+        for train_pred, test_pred in trainer.predictions:
+            self.assertEqual(train_pred.dtype, np.float32)
+            self.assertEqual(test_pred.dtype, np.float32)
+        ModelEvaluationReporter(model, history, trainer.predictions)(timeseries)
+
+
+class TestWarmStart(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(rng.normal(size=(80, 2)).cumsum(axis=0), columns=['col0', 'col1']).astype(np.float32)
+        transformer = SupervisedTimeseriesTransformer(['col0', 'col1'], ['col0'], 3, 1)
+        self.expanding = transformer(ZStandardizer(ExpandingSplit(40, 5, expansion_rate=10)(data))())
+        self.rolling = transformer(ZStandardizer(RollingSplit(40, 5, stride=10)(data))())
+        self.fits = []
+        fit = tf.keras.Model.fit
+
+        def recording_fit(model, x, y, epochs=1, **kwargs):
+            self.fits.append((model, len(x), epochs))
+            return fit(model, x, y, epochs=epochs, verbose=0, **kwargs)
+        patcher = mock.patch.object(tf.keras.Model, 'fit', recording_fit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_expanding_splits_warm_started(self):
+        trainer = ForecastModelTrainer(MODEL_SCHEMA, warm_start=True, replay=0.5)
+        _, _, report = trainer(self.expanding, epochs=4)
+        self.assertEqual([fit.warm for fit in trainer.split_fits], [False] + [True] * (len(self.expanding) - 1))
+        self.assertEqual(len({id(model) for model, _, _ in self.fits}), 1)
+        previous = len(self.expanding[0].training_samples.samples)
+        for samples, (_, windows, epochs) in zip(self.expanding[1:], self.fits[1:]):
+            added = len(samples.training_samples.samples) - previous
+            self.assertEqual(windows, added + round(previous * 0.5))
+            self.assertEqual(epochs, 1)
+            previous += added
+        self.assertEqual(len(trainer.predictions), len(self.expanding))
+        self.assertIn('Warm Start', report)
+
+    def test_cold_training_starts_every_split_from_scratch(self):
+        trainer = ForecastModelTrainer(MODEL_SCHEMA, warm_start=True)
+        trainer(self.rolling, epochs=2)
+        self.assertFalse(any(fit.warm for fit in trainer.split_fits))
+        self.assertEqual(len({id(model) for model, _, _ in self.fits}), len(self.rolling))
+        self.assertTrue(all(epochs == 2 for _, _, epochs in self.fits))
+
+
+class TestCompiledInference(unittest.TestCase):
+    def setUp(self) -> None:
+        self.model = tf.keras.Sequential([tf.keras.layers.LSTM(4, input_shape=(3, 2)), tf.keras.layers.Dense(2)])
+        self.x = np.random.default_rng(0).normal(size=(5, 3, 2))
+
+    def test_matches_predict(self):
+        expected = self.model.predict(self.x.astype(np.float32), verbose=0)
+        for jit_compile in (False, True):
+            predict = compile_inference(self.model, jit_compile)
+            np.testing.assert_allclose(predict(self.x), expected, rtol=1e-4, atol=1e-5)
+            self.assertEqual(predict(self.x[:1]).shape, (1, 2))
+
+    def test_xla_fallback(self):
+        # numpy_function has no XLA kernel, so the jit compiled forward pass fails on its first call.
+        unsupported = tf.keras.layers.Lambda(
+            lambda x: tf.reshape(tf.numpy_function(np.negative, [x], tf.float32), tf.shape(x)))
+        model = tf.keras.Sequential([unsupported, self.model])
+        model.build((None, 3, 2))
+        expected = compile_inference(model)(self.x)
+        with self.assertLogs(level='WARNING'):
+            predict = compile_inference(model, jit_compile=True)
+            np.testing.assert_allclose(predict(self.x), expected, rtol=1e-5)
+        np.testing.assert_allclose(predict(self.x), expected, rtol=1e-5)
+
+    def test_without_xla_support(self):
+        expected = compile_inference(self.model)(self.x)
+        with mock.patch.object(dataprocessing, '_FUNCTION_JIT', None), self.assertLogs(level='WARNING'):
+            predict = compile_inference(self.model, jit_compile=True)
+        np.testing.assert_allclose(predict(self.x), expected, rtol=1e-5)
+
+
+class TestTrainingXlaFallback(unittest.TestCase):
+    def setUp(self) -> None:
+        data = pd.DataFrame(np.random.default_rng(0).normal(size=(60, 2)), columns=['col0', 'col1'])
+        self.timeseries = SupervisedTimeseriesTransformer(['col0', 'col1'], ['col0'], 3, 1)(
+            RollingSplit(40, 10, stride=10)(DataImputer('None')(data)))
+
+    def test_recompiles_without_xla(self):
+        # numpy_function has no XLA kernel, so the first jit compiled train step fails before any weights change.
+        unsupported = tf.keras.layers.Lambda(
+            lambda x: tf.reshape(tf.numpy_function(np.negative, [x], tf.float32), tf.shape(x)))
+        model = tf.keras.Sequential([unsupported, tf.keras.layers.LSTM(4), tf.keras.layers.Dense(1)])
+        model.build((None, 3, 2))
+        registry = mock.Mock()
+        registry.model.return_value = model
+        trainer = ForecastModelTrainer(MODEL_SCHEMA, jit_compile=True, registry=registry)
+        with self.assertLogs(level='WARNING') as logs:
+            _, history, _ = trainer(self.timeseries[:1], epochs=2)
+        self.assertTrue(any('training without XLA' in line for line in logs.output))
+        self.assertFalse(trainer.jit_compile)
+        self.assertEqual(len(history), 2)
+        self.assertTrue(np.isfinite(history['loss']).all())
+
+    def test_without_xla_support(self):
+        with mock.patch.object(dataprocessing, '_COMPILE_JIT', False), self.assertLogs(level='WARNING'):
+            trainer = ForecastModelTrainer(MODEL_SCHEMA, jit_compile=True)
+        self.assertFalse(trainer.jit_compile)
+        _, history, _ = trainer(self.timeseries[:1], epochs=1)
+        self.assertEqual(len(history), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
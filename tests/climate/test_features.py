@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from AIForecast.modeling.checkpoints import TrainingState
+from AIForecast.modeling.dataprocessing import DTYPE, FeatureGenerator, StraightSplit, ZStandardizer
+from AIForecast.modeling.pipeline import Pipeline
+from AIForecast.sysutils.sysexceptions import TimeseriesTransformationError
+
+
+class TestFeatureGenerator(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        # Far from zero, where rolling variances from plain sums of squares lose their precision.
+        self.df = pd.DataFrame(rng.normal(size=(100, 2)).cumsum(axis=0) + 400, columns=['a', 'b'],
+                               index=pd.RangeIndex(10, 110))
+        self.generator = FeatureGenerator(['a', 'b'], lags=[1, 3], windows=[2, 4, 7], differences=[1, 12])
+
+    def test_matches_pandas(self):
+        features = self.generator(self.df)
+        self.assertEqual(self.generator.lookback, 12)
+        self.assertEqual(list(features.index), list(self.df.index[12:]))
+        self.assertEqual(list(features.columns), ['a', 'b'] + self.generator.feature_names())
+        self.assertFalse(features.isna().any().any())
+        self.assertTrue((self.generator(self.df.astype(DTYPE)).dtypes == DTYPE).all())
+        expected = {}
+        for col in ['a', 'b']:
+            values = self.df[col]
+            for lag in [1, 3]:
+                expected[f'{col}_lag{lag}'] = values.shift(lag)
+            for window in [2, 4, 7]:
+                rolling = values.rolling(window)
+                expected[f'{col}_mean{window}'] = rolling.mean()
+                expected[f'{col}_std{window}'] = rolling.std()
+                expected[f'{col}_min{window}'] = rolling.min()
+                expected[f'{col}_max{window}'] = rolling.max()
+            for period in [1, 12]:
+                expected[f'{col}_diff{period}'] = values.diff(period)
+        for name, wanted in expected.items():
+            np.testing.assert_allclose(features[name], wanted.iloc[12:], rtol=1e-5, atol=1e-4, err_msg=name)
+
+    def test_no_future_rows(self):
+        features = self.generator(self.df)
+        changed = self.df.copy()
+        changed.iloc[60:] *= -3
+        changed_features = self.generator(changed)
+        # Rows before the change only look back, so none of their features change.
+        pd.testing.assert_frame_equal(features.loc[:69], changed_features.loc[:69])
+        self.assertFalse(np.allclose(features.loc[70:], changed_features.loc[70:]))
+
+    def test_single_row_window(self):
+        with self.assertRaises(ValueError):
+            FeatureGenerator(['a'], windows=[1])
+        generator = FeatureGenerator(['a'], windows=[1], statistics=['mean', 'min', 'max'])
+        features = generator(self.df)
+        self.assertEqual(generator.lookback, 0)
+        self.assertFalse(features.isna().any().any())
+        for name in generator.feature_names():
+            np.testing.assert_allclose(features[name], self.df['a'], err_msg=name)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            FeatureGenerator(['a'], windows=[0])
+        with self.assertRaises(ValueError):
+            FeatureGenerator(['a'], windows=[3], statistics=['median'])
+        with self.assertRaises(TimeseriesTransformationError):
+            FeatureGenerator(['a'], differences=[100])(self.df)
+
+
+class TestPipelineFeatures(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(1)
+        self.df = pd.DataFrame(rng.normal(size=(120, 2)).cumsum(axis=0), columns=['a', 'b'])
+        self.generator = FeatureGenerator(['a'], lags=[2], windows=[5], statistics=['mean', 'max'])
+        self.pipeline = Pipeline(self.df).impute('None').features(self.generator) \
+            .split(StraightSplit, train_split=0.7, validate_split=0.1) \
+            .normalize(ZStandardizer).transform(['a', 'a_mean5', 'a_max5'], ['a'], 6, 1, label_offset=6)
+
+    def test_stage(self):
+        splits = self.pipeline.output('split')
+        # The split starts after the rows the features look back over.
+        self.assertEqual(splits[0].train_split.index[0], 4)
+        self.assertFalse(splits[0].train_split.isna().any().any())
+        self.assertEqual(len(self.pipeline.timeseries()[0].training_samples.samples[0][0]), 3)
+        state = self.pipeline.training_state(1)
+        self.assertEqual(TrainingState(**state.to_dict()).features, self.generator.to_dict())
+        self.assertTrue(self.pipeline.is_memoized('transformer'))
+        self.pipeline.features(FeatureGenerator(['a'], lags=[2], windows=[5, 6], statistics=['mean', 'max']))
+        self.assertTrue(self.pipeline.is_memoized('imputer'))
+        self.assertFalse(self.pipeline.is_memoized('split'))
+        self.assertEqual(self.pipeline.output('split')[0].train_split.index[0], 5)
+        # Without the stage, the imputed data is split as is.
+        self.pipeline.features(None)
+        self.assertEqual(self.pipeline.output('split')[0].train_split.index[0], 0)
+        self.assertIsNone(self.pipeline.training_state(1).features)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import tensorflow as tf
+
+from AIForecast.modeling.models import SchemaRegistry
+
+MODEL_SCHEMA = os.path.join(os.path.dirname(__file__), '..', '..', 'AIClimateChange', 'models', 'schema', 'model.json')
+
+
+class TestSchemaRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_location = tempfile.mkdtemp()
+        self.schema_path = os.path.join(self.tmp_location, 'model.json')
+        shutil.copy(MODEL_SCHEMA, self.schema_path)
+        self.registry = SchemaRegistry()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_location)
+
+    def test_schema_parsed_once(self):
+        with mock.patch.object(tf.keras.models, 'model_from_json', wraps=tf.keras.models.model_from_json) as parse:
+            for _ in range(3):
+                self.registry.model(self.schema_path, 2, 3)
+            self.registry.model(self.schema_path, 1, 1)
+        self.assertEqual(parse.call_count, 1)
+
+    def test_changed_schema_parsed_again(self):
+        first = self.registry.schema(self.schema_path)
+        self.assertIs(self.registry.schema(self.schema_path), first)
+        with open(self.schema_path, 'r') as f:
+            schema = f.read()
+        with open(self.schema_path, 'w') as f:
+            f.write(schema.replace('"units": 32', '"units": 16'))
+        stat = os.stat(self.schema_path)
+        os.utime(self.schema_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertEqual(self.registry.schema(self.schema_path).layers[0].units, 16)
+
+    def test_output_head_and_fresh_weights(self):
+        multi_step = self.registry.model(self.schema_path, 2, 3)
+        self.assertEqual(multi_step(np.zeros((4, 5, 2), dtype=np.float32)).shape, (4, 3, 2))
+        single_step = self.registry.model(self.schema_path, 1, 1)
+        self.assertEqual(single_step(np.zeros((4, 5, 2), dtype=np.float32)).shape, (4, 1))
+        other = self.registry.model(self.schema_path, 2, 3)
+        other.build((None, 5, 2))
+        self.assertIsNot(other, multi_step)
+        self.assertFalse(np.allclose(other.layers[0].get_weights()[0], multi_step.layers[0].get_weights()[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
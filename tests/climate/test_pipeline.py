@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from AIForecast.modeling import dataprocessing
+from AIForecast.modeling.dataprocessing import DataImputer, RollingSplit, ZStandardizer, MinMaxNormalizer, \
+    SupervisedTimeseriesTransformer
+from AIForecast.modeling.pipeline import Pipeline
+from AIForecast.modeling.profiling import RunProfile
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'col0': rng.normal(size=60), 'col1': rng.normal(size=60)})
+        self.df.iloc[5, 0] = np.nan
+        self.pipeline = Pipeline(self.df) \
+            .impute('Simple') \
+            .split(RollingSplit, 30, 10, 10, stride=10) \
+            .normalize(ZStandardizer) \
+            .transform(['col0', 'col1'], ['col1'], 3, 1)
+
+    def test_matches_hand_wired_stages(self):
+        splits = ZStandardizer(RollingSplit(30, 10, 10, stride=10)(DataImputer('Simple')(self.df)))()
+        expected = SupervisedTimeseriesTransformer(['col0', 'col1'], ['col1'], 3, 1)(splits)
+        timeseries = self.pipeline.timeseries()
+        self.assertEqual(len(timeseries), len(expected))
+        for actual, wanted in zip(timeseries, expected):
+            np.testing.assert_allclose(actual.training_samples.samples, wanted.training_samples.samples)
+            np.testing.assert_allclose(actual.test_samples.labels, wanted.test_samples.labels)
+
+    def test_lazy_until_requested(self):
+        with mock.patch.object(dataprocessing.DataImputer, '__call__') as impute:
+            Pipeline(self.df).impute('Simple')
+        impute.assert_not_called()
+
+    def test_reruns_only_changed_stages(self):
+        profile = RunProfile(trace_memory=False)
+        self.pipeline.timeseries(profile)
+        self.pipeline.transform(['col0', 'col1'], ['col1'], 5, 1)
+        self.assertTrue(self.pipeline.is_memoized('normalizer'))
+        self.assertFalse(self.pipeline.is_memoized('transformer'))
+        timeseries = self.pipeline.timeseries(profile)
+        self.assertEqual(timeseries[0].training_samples.samples.shape[1], 5)
+        self.assertListEqual([stage.name for stage in profile.stages],
+                             ['imputer', 'split', 'normalizer', 'transformer', 'transformer'])
+        self.pipeline.impute('Iterative')
+        self.assertFalse(self.pipeline.is_memoized('split'))
+        self.pipeline.set_data(self.df.copy())
+        self.pipeline.impute('Simple')
+        self.assertTrue(self.pipeline.is_memoized('transformer'))
+
+    def test_memoized_splits_are_not_normalized_twice(self):
+        first = self.pipeline.output('normalizer')
+        self.pipeline.normalize(MinMaxNormalizer)
+        self.pipeline.output('normalizer')
+        self.pipeline.normalize(ZStandardizer)
+        again = self.pipeline.output('normalizer')
+        for split, split_again in zip(first, again):
+            pd.testing.assert_frame_equal(split.train_split, split_again.train_split)
+
+    def test_missing_stage(self):
+        with self.assertRaises(ValueError):
+            Pipeline(self.df).impute('Simple').output('normalizer')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from AIForecast.modeling.dataprocessing import DataImputer, RollingSplit, ZStandardizer, \
+    SupervisedTimeseriesTransformer
+from AIForecast.modeling.profiling import PROFILE_MEMORY_VARIABLE, RunProfile, memory_profiling_enabled
+
+
+class TestRunProfile(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_location = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'col0': rng.normal(size=200), 'col1': rng.normal(size=200)})
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_location)
+
+    def run_pipeline(self, profile: RunProfile):
+        imputed = profile.wrap(DataImputer('Simple'))(self.df)
+        splits = profile.wrap(RollingSplit(100, 20, 20, stride=50))(imputed)
+        splits = profile.wrap(ZStandardizer(splits))()
+        return profile.wrap(SupervisedTimeseriesTransformer(['col0'], ['col1'], 3, 1))(splits)
+
+    def test_records_stages(self):
+        profile = RunProfile()
+        self.run_pipeline(profile)
+        names = [stage.name for stage in profile.stages]
+        self.assertListEqual(names, ['DataImputer', 'RollingSplit', 'ZStandardizer', 'SupervisedTimeseriesTransformer'])
+        imputer = profile.stages[0]
+        self.assertEqual(imputer.output_bytes, 200 * 2 * 4)
+        self.assertListEqual(imputer.output_shapes, [(200, 2)])
+        for stage in profile.stages:
+            self.assertGreater(stage.wall_time, 0)
+            self.assertIsNotNone(stage.peak_memory)
+        self.assertGreater(profile.stages[3].output_bytes, 0)
+        self.assertIn('SupervisedTimeseriesTransformer', str(profile))
+
+    def test_nested_stages(self):
+        profile = RunProfile()
+        with profile.stage('run') as run:
+            with profile.stage('allocate'):
+                buffer = np.ones(2 ** 20)
+            del buffer
+        self.assertListEqual([stage.depth for stage in profile.stages], [0, 1])
+        self.assertGreaterEqual(profile.stages[1].peak_memory, 2 ** 23)
+        self.assertGreaterEqual(run.peak_memory, profile.stages[1].peak_memory)
+        self.assertGreaterEqual(run.wall_time, profile.stages[1].wall_time)
+        self.assertAlmostEqual(profile.total()['wall_time'], run.wall_time)
+
+    def test_exports(self):
+        profile = RunProfile(trace_memory=False)
+        self.run_pipeline(profile)
+        json_path = os.path.join(self.tmp_location, 'model_profile.json')
+        trace_path = os.path.join(self.tmp_location, 'model_trace.json')
+        profile.save(json_path)
+        profile.save_chrome_trace(trace_path)
+        with open(json_path, 'r') as f:
+            saved = json.load(f)
+        self.assertEqual(len(saved['stages']), 4)
+        self.assertIsNone(saved['stages'][0]['peak_memory'])
+        with open(trace_path, 'r') as f:
+            events = json.load(f)['traceEvents']
+        self.assertTrue(all(event['ph'] == 'X' and event['dur'] > 0 for event in events))
+        self.assertListEqual([event['name'] for event in events], [stage['name'] for stage in saved['stages']])
+
+    def test_memory_tracing_opt_in(self):
+        with mock.patch.dict(os.environ, clear=False):
+            os.environ.pop(PROFILE_MEMORY_VARIABLE, None)
+            self.assertFalse(memory_profiling_enabled())
+            os.environ[PROFILE_MEMORY_VARIABLE] = '1'
+            self.assertTrue(memory_profiling_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from AIForecast.modeling.dataprocessing import DataSplit, FeatureScaler, MinMaxNormalizer, ZStandardizer
+from AIForecast.modeling.serving import NPY_CONTENT_TYPE, ForecastServer, MicroBatcher
+
+
+class TestFeatureScaler(unittest.TestCase):
+    def test_matches_normalizers(self):
+        data = pd.DataFrame(np.random.default_rng(0).normal(5, 3, size=(40, 3)), columns=['a', 'b', 'c'])
+        for normalizer in (ZStandardizer, lambda splits: MinMaxNormalizer(splits, (-1, 1))):
+            split = DataSplit(data, data[:30], data[35:], data[30:35])
+            normalized = normalizer([split])
+            normalized()
+            scaler = FeatureScaler.from_dict(json.loads(json.dumps(normalized.scaler(['a', 'c'], ['b']).to_dict())))
+            windows = data[['a', 'c']].to_numpy()[np.newaxis]
+            np.testing.assert_allclose(scaler.scale_inputs(windows)[0], split.parent_data[['a', 'c']], rtol=1e-5)
+            np.testing.assert_allclose(scaler.unscale_outputs(split.parent_data[['b']].to_numpy()), data[['b']],
+                                       rtol=1e-5)
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_coalesces_concurrent_requests(self):
+        batches = []
+        release = threading.Event()
+
+        def predict(windows):
+            release.wait()
+            batches.append(len(windows))
+            return windows.sum(axis=(1, 2))
+
+        batcher = MicroBatcher(predict, max_batch_size=64, max_latency=0.2)
+        windows = [np.full((1, 2, 2), i, dtype=np.float32) for i in range(8)]
+        results = [None] * len(windows)
+
+        def submit(i):
+            results[i] = batcher.submit(windows[i])
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(windows))]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+        self.assertLess(len(batches), len(windows))
+        self.assertEqual(sum(batches), len(windows))
+        for i, result in enumerate(results):
+            np.testing.assert_array_equal(result, [4 * i])
+        self.assertEqual(sum(batcher.metrics.snapshot()['batch_sizes'].values()), len(batches))
+
+
+class TestForecastServer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_location = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp_location, 'model.h5')
+        model = tf.keras.Sequential([tf.keras.layers.LSTM(4, input_shape=(3, 2)), tf.keras.layers.Dense(1)])
+        model.save(self.model_path)
+        self.model = model
+        self.server = ForecastServer(self.model_path, port=0, max_latency=0.01)
+        self.server.start()
+        self.x = np.random.default_rng(0).normal(size=(5, 3, 2)).astype(np.float32)
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        shutil.rmtree(self.tmp_location)
+
+    def request(self, path, body=None, content_type='application/json'):
+        request = urllib.request.Request(self.server.address + path, data=body, headers={'Content-Type': content_type})
+        with urllib.request.urlopen(request) as response:
+            return response.read(), response.headers['Content-Type']
+
+    def test_binds_localhost(self):
+        self.assertEqual(self.server.httpd.server_address[0], '127.0.0.1')
+
+    def test_predict_json_and_npy(self):
+        expected = self.model.predict(self.x, verbose=0)
+        body, _ = self.request('/predict', json.dumps({'windows': self.x.tolist()}).encode())
+        np.testing.assert_allclose(json.loads(body)['predictions'], expected, rtol=1e-4, atol=1e-5)
+        npy = io.BytesIO()
+        np.save(npy, self.x)
+        body, content_type = self.request('/predict', npy.getvalue(), NPY_CONTENT_TYPE)
+        self.assertEqual(content_type, NPY_CONTENT_TYPE)
+        np.testing.assert_allclose(np.load(io.BytesIO(body)), expected, rtol=1e-4, atol=1e-5)
+        metrics = json.loads(self.request('/metrics')[0])
+        self.assertEqual(metrics['requests'], 2)
+        self.assertIsNotNone(metrics['latency_ms']['p99'])
+
+    def test_rejects_wrong_shape(self):
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            self.request('/predict', json.dumps({'windows': [[1, 2, 3]]}).encode())
+        self.assertEqual(error.exception.code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from AIForecast.modeling.dataprocessing import ForecastModelTrainer, StraightSplit, SupervisedTimeseriesTransformer
+from AIForecast.modeling.tflite import PARITY_TOLERANCE, TFLiteForecaster, export_tflite, parity, tflite_path
+
+MODEL_SCHEMA = os.path.join(os.path.dirname(__file__), '..', '..', 'AIClimateChange', 'models', 'schema', 'model.json')
+
+
+class TestTFLiteExport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(rng.normal(size=(300, 3)).cumsum(axis=0), columns=['a', 'b', 'c'])
+        data = (data - data.mean()) / data.std()
+        splits = StraightSplit(train_split=0.7, validate_split=0.15)(data)
+        cls.timeseries = SupervisedTimeseriesTransformer(['a', 'b', 'c'], ['a'], 6, 1)(splits)[0]
+        cls.model, _, _ = ForecastModelTrainer(MODEL_SCHEMA)([cls.timeseries], epochs=2)
+        cls.tmp_location = tempfile.mkdtemp()
+        cls.model_path = os.path.join(cls.tmp_location, 'model.h5')
+        cls.model.save(cls.model_path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.tmp_location)
+
+    def test_parity_on_test_windows(self):
+        windows = self.timeseries.test_samples.samples
+        forecaster = TFLiteForecaster(export_tflite(self.model_path))
+        self.assertLess(parity(self.model, forecaster, windows), PARITY_TOLERANCE)
+        self.assertEqual(forecaster.predict(windows[0]).shape, (1, 1))
+        quantized = TFLiteForecaster(export_tflite(self.model_path, quantize=True))
+        self.assertTrue(os.path.isfile(tflite_path(self.model_path, True)))
+        predictions = self.model.predict(windows, verbose=0)
+        self.assertLess(parity(self.model, quantized, windows), 0.05 * np.ptp(predictions) + PARITY_TOLERANCE)
+
+    def test_batched_export(self):
+        windows = self.timeseries.test_samples.samples[:10]
+        path = export_tflite(self.model, os.path.join(self.tmp_location, 'batched.tflite'), batch_size=4)
+        forecaster = TFLiteForecaster(path)
+        self.assertEqual(forecaster.batch_size, 4)
+        predictions = forecaster.predict(windows)
+        self.assertEqual(len(predictions), 10)
+        self.assertLess(parity(self.model, forecaster, windows), PARITY_TOLERANCE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.core.profiler.protobuf import xplane_pb2
+
+from AIForecast.modeling.tfprofiler import ProfilerCapture, summarize_trace
+
+
+class TestProfilerCapture(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_location = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_location)
+
+    def write_trace(self, events):
+        space = xplane_pb2.XSpace()
+        plane = space.planes.add(name='/host:CPU')
+        line = plane.lines.add(name='tf_Compute')
+        for i, (name, offset, duration) in enumerate(events):
+            plane.event_metadata[i + 1].id = i + 1
+            plane.event_metadata[i + 1].name = name
+            line.events.add(metadata_id=i + 1, offset_ps=offset * 10 ** 9, duration_ps=duration * 10 ** 9)
+        trace_dir = os.path.join(self.tmp_location, 'plugins', 'profile', 'run')
+        os.makedirs(trace_dir)
+        with open(os.path.join(trace_dir, 'host.xplane.pb'), 'wb') as f:
+            f.write(space.SerializeToString())
+
+    def test_self_time_summary(self):
+        self.write_trace([
+            ('ExecutorState::Process', 0, 10),
+            ('lstm/MatMul:MatMul', 1, 4),
+            ('lstm/MatMul_1:MatMul', 5, 2),
+            ('lstm/add:AddV2', 8, 1),
+            ('dense/MatMul:MatMul', 20, 3),
+        ])
+        summary = summarize_trace(self.tmp_location)
+        self.assertListEqual(list(summary.index), ['MatMul', 'AddV2'])
+        self.assertAlmostEqual(summary.loc['MatMul', 'self_time_ms'], 9)
+        self.assertEqual(summary.loc['MatMul', 'count'], 3)
+        by_op = summarize_trace(self.tmp_location, top=1, by='op')
+        self.assertListEqual(list(by_op.index), ['lstm/MatMul'])
+        by_thread = summarize_trace(self.tmp_location, by='thread')
+        self.assertAlmostEqual(by_thread.loc['tf_Compute', 'self_time_ms'], 13)
+
+    def test_captures_batch_range(self):
+        model = tf.keras.Sequential([tf.keras.layers.LSTM(4, input_shape=(6, 2)), tf.keras.layers.Dense(1)])
+        model.compile(optimizer='adam', loss='mse')
+        x, y = np.random.rand(64, 6, 2).astype(np.float32), np.random.rand(64, 1).astype(np.float32)
+        capture = ProfilerCapture(self.tmp_location, epoch=2, start_batch=2, stop_batch=4)
+        model.fit(x, y, batch_size=8, epochs=2, verbose=0, callbacks=[capture])
+        self.assertTrue(capture.captured)
+        summary = summarize_trace(self.tmp_location)
+        self.assertGreater(len(summary), 0)
+        self.assertLessEqual(summary['percent'].sum(), 100 + 1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import functools
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pandas as pd
+
+from research import access
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+FIXTURE_PAGE = 'esrl_site_explorer.html'
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestUpdateResearchSites(unittest.TestCase):
+    def setUp(self) -> None:
+        self.serve_dir = tempfile.mkdtemp()
+        self.out_dir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(FIXTURE_DIR, FIXTURE_PAGE), self.serve_dir)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          functools.partial(QuietHandler, directory=self.serve_dir))
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/{FIXTURE_PAGE}'
+        self.csv_path = os.path.join(self.out_dir, 'esrl_site_meta.csv')
+        self.validators_path = os.path.join(self.out_dir, 'esrl_site_meta.json')
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.serve_dir)
+        shutil.rmtree(self.out_dir)
+
+    def update(self, conditional=True):
+        return access.update_research_sites(self.url, self.csv_path, self.validators_path, conditional)
+
+    def test_parses_fixture(self):
+        self.assertTrue(self.update())
+        sites = pd.read_csv(self.csv_path, index_col=0)
+        self.assertListEqual(list(sites['Code']), ['AAO*', 'ABQ', 'MLO'])
+        self.assertEqual(sites['Project'][0], '» Airborne Flasks*\n» Ozone Airborne*')
+
+    def test_not_modified_skips_rewrite(self):
+        self.assertTrue(self.update())
+        self.assertFalse(self.update())
+
+    def test_unchanged_content_skips_rewrite(self):
+        self.assertTrue(self.update())
+        os.utime(os.path.join(self.serve_dir, FIXTURE_PAGE))
+        mtime = os.path.getmtime(self.csv_path)
+        self.assertFalse(self.update(conditional=False))
+        self.assertEqual(mtime, os.path.getmtime(self.csv_path))
+
+    def test_changed_content_rewrites(self):
+        self.assertTrue(self.update())
+        page = os.path.join(self.serve_dir, FIXTURE_PAGE)
+        with open(page, 'r', encoding='utf-8') as f:
+            html = f.read()
+        with open(page, 'w', encoding='utf-8') as f:
+            f.write(html.replace('Mauna Loa, Hawaii', 'Mauna Loa Observatory, Hawaii'))
+        os.utime(page, (0, os.path.getmtime(self.csv_path) + 10))
+        self.assertTrue(self.update())
+        sites = pd.read_csv(self.csv_path, index_col=0)
+        self.assertEqual(sites['Name'][2], 'Mauna Loa Observatory, Hawaii')
+
+    def test_html_parser_fallback_matches(self):
+        with open(os.path.join(FIXTURE_DIR, FIXTURE_PAGE), 'rb') as f:
+            html = f.read()
+        parsed = access._parse_site_table(html)
+        with mock.patch.dict('sys.modules', {'lxml': None}):
+            fallback = access._parse_site_table(html)
+        self.assertEqual(parsed, fallback)
+
+
+if __name__ == '__main__':
+    unittest.main()
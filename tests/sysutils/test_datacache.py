@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from AIForecast.sysutils import datacache
+
+
+class TestDataCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_location = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_location, 'data.csv')
+        pd.DataFrame({
+            'site': ['MLO', 'MLO', 'MLO'],
+            'year': [1969, 1969, 1970],
+            'month': [11, 12, 1],
+            'co2_mean': [321.98, 323.78, np.nan],
+            'ch4_mean': [1, 2, 3]
+        }).to_csv(self.csv_path, index=False)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_location)
+
+    def test_typed_load(self):
+        data = datacache.load_csv(self.csv_path, date_parts=['year', 'month'])
+        self.assertListEqual(list(data.columns), ['site', 'co2_mean', 'ch4_mean'])
+        self.assertEqual(data.index.dtype, np.dtype('datetime64[ns]'))
+        self.assertEqual(data.index[2], pd.Timestamp(1970, 1, 1))
+        self.assertEqual(data['co2_mean'].dtype, np.float32)
+        self.assertEqual(data['ch4_mean'].dtype, np.float32)
+        self.assertTrue(np.isnan(data['co2_mean'][2]))
+
+    def test_column_projection(self):
+        data = datacache.load_csv(self.csv_path, ['ch4_mean'], ['year', 'month'])
+        self.assertListEqual(list(data.columns), ['ch4_mean'])
+        with self.assertRaises(KeyError):
+            datacache.load_csv(self.csv_path, ['n2o_mean'], ['year', 'month'])
+
+    def test_invalidated_by_source_mtime(self):
+        datacache.load_csv(self.csv_path, date_parts=['year', 'month'])
+        pd.DataFrame({'year': [2000], 'month': [6], 'co2_mean': [370.0]}).to_csv(self.csv_path, index=False)
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        data = datacache.load_csv(self.csv_path, date_parts=['year', 'month'])
+        self.assertListEqual(list(data.columns), ['co2_mean'])
+        self.assertEqual(len(data), 1)
+
+    def test_chunked_numeric_load(self):
+        progress = []
+        data = datacache.load_numeric_csv(self.csv_path, progress=progress.append, chunk_rows=2)
+        self.assertListEqual(list(data.columns), ['year', 'month', 'co2_mean', 'ch4_mean'])
+        self.assertTrue(all(dtype == np.float32 for dtype in data.dtypes))
+        self.assertEqual(len(data), 3)
+        self.assertEqual(len(progress), 2)
+        self.assertEqual(progress[-1], 1.0)
+        np.testing.assert_array_equal(data['ch4_mean'].to_numpy(), np.array([1, 2, 3], dtype=np.float32))
+
+    def test_numeric_load_from_cache(self):
+        parsed = datacache.load_numeric_csv(self.csv_path)
+        self.assertTrue(os.path.isdir(datacache.numeric_cache_path(self.csv_path)))
+        progress = []
+        with mock.patch.object(pd, 'read_csv', side_effect=AssertionError('The CSV file was parsed.')):
+            cached = datacache.load_numeric_csv(self.csv_path, progress=progress.append)
+        pd.testing.assert_frame_equal(cached, parsed)
+        self.assertListEqual(list(cached.columns), ['year', 'month', 'co2_mean', 'ch4_mean'])
+        self.assertEqual(cached['co2_mean'][1], np.float32(323.78))
+        self.assertListEqual(progress, [1.0])
+
+    def test_numeric_cache_with_dates(self):
+        pd.DataFrame({'date': ['2000-01-01', '2000-02-01'], 'site': ['MLO', 'MLO'], 'co2_mean': [370.0, 371.5]}) \
+            .to_csv(self.csv_path, index=False)
+        parsed = datacache.load_numeric_csv(self.csv_path, 'date')
+        with mock.patch.object(pd, 'read_csv', side_effect=AssertionError('The CSV file was parsed.')):
+            cached = datacache.load_numeric_csv(self.csv_path, 'date')
+        pd.testing.assert_frame_equal(cached, parsed)
+        self.assertEqual(cached.index.name, 'date')
+        # A load with another date column does not match the cache, and parses the file.
+        self.assertListEqual(list(datacache.load_numeric_csv(self.csv_path).columns), ['co2_mean'])
+
+if __name__ == '__main__':
+    unittest.main()
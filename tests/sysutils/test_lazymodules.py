@@ -0,0 +1,32 @@
+import subprocess
+import sys
+import unittest
+
+from AIForecast.sysutils.lazymodules import LazyModule, lazy_import
+
+
+class TestLazyModules(unittest.TestCase):
+    def test_imported_on_first_use(self):
+        name = 'AIForecast.sysutils.sysexceptions'
+        loaded = sys.modules.pop(name, None)
+        try:
+            module = lazy_import(name)
+            self.assertIsInstance(module, LazyModule)
+            self.assertFalse(module.is_loaded())
+            self.assertTrue(issubclass(module.TimeseriesTransformationError, Exception))
+            self.assertTrue(module.is_loaded())
+            self.assertIs(module.TimeseriesTransformationError, sys.modules[name].TimeseriesTransformationError)
+            self.assertIs(lazy_import(name), sys.modules[name])
+        finally:
+            if loaded is not None:
+                sys.modules[name] = loaded
+
+    def test_startup_skips_heavy_modules(self):
+        heavy = ('tensorflow', 'sklearn', 'matplotlib', 'pyowm', 'pandas')
+        check = f'import sys, AIForecast.main; print(",".join(m for m in {heavy!r} if m in sys.modules))'
+        result = subprocess.run([sys.executable, '-c', check], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
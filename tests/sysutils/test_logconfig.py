@@ -0,0 +1,65 @@
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from AIForecast import sysutils
+from AIForecast.sysutils.logconfig import LOG_FILE, configure_logging, shutdown_logging
+
+
+class CountedMessage:
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'counted message'
+
+
+class TestLogConfig(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_location = tempfile.mkdtemp()
+        self.root_level = logging.getLogger().level
+
+    def tearDown(self) -> None:
+        shutdown_logging()
+        logging.getLogger().setLevel(self.root_level)
+        shutil.rmtree(self.tmp_location)
+
+    def test_import_configures_nothing(self):
+        check = 'import logging, AIForecast.sysutils, AIForecast.utils; ' \
+                'print(len(logging.getLogger().handlers), logging.getLogger().level)'
+        result = subprocess.run([sys.executable, '-c', check], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ['0', str(logging.WARNING)])
+
+    def test_queued_to_file(self):
+        path = configure_logging(directory=self.tmp_location, console_level=None)
+        self.assertEqual(path, os.path.join(self.tmp_location, LOG_FILE))
+        log = sysutils.log('tests.logconfig')
+        skipped, written = CountedMessage(), CountedMessage()
+        log.debug('%s', skipped)
+        log.info('%s', written)
+        worker = threading.Thread(target=lambda: log.warning('from %s', 'a worker'), name='worker')
+        worker.start()
+        worker.join()
+        shutdown_logging()
+        # A record below the level is dropped before its message is formatted.
+        self.assertEqual(skipped.formatted, 0)
+        self.assertGreater(written.formatted, 0)
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('INFO [MainThread] tests.logconfig: counted message', lines[0])
+        self.assertIn('WARNING [worker] tests.logconfig: from a worker', lines[1])
+        # Records after the shutdown are no longer queued for the closed file.
+        log.info('after shutdown')
+        with open(path) as f:
+            self.assertEqual(len(f.read().splitlines()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
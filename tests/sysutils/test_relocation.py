@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from AIForecast.sysutils import pathing
+from AIForecast.sysutils.pathing import FolderStructure
+from AIForecast.sysutils.relocation import COPIED, CLONED, LINKED, PART_SUFFIX, RENAMED, SKIPPED, relocate_tree
+
+FILES = {'save_state.json': b'{}', os.path.join('models', 'trained', 'model.h5'): b'weights' * 1000,
+         os.path.join('logs', 'aiforecast.log'): b''}
+
+
+class TestRelocation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_location = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmp_location, 'old')
+        for name, content in FILES.items():
+            os.makedirs(os.path.dirname(os.path.join(self.source, name)), exist_ok=True)
+            with open(os.path.join(self.source, name), 'wb') as f:
+                f.write(content)
+        os.makedirs(os.path.join(self.source, 'data', 'weather'))
+        self.root = FolderStructure.ROOT_DIR.get_path()
+
+    def tearDown(self) -> None:
+        FolderStructure.ROOT_DIR.set_path(self.root)
+        shutil.rmtree(self.tmp_location)
+
+    def assertRelocated(self, destination: str):
+        for name, content in FILES.items():
+            with open(os.path.join(destination, name), 'rb') as f:
+                self.assertEqual(f.read(), content)
+        self.assertTrue(os.path.isdir(os.path.join(destination, 'data', 'weather')))
+
+    def test_kept_source_is_resumed(self):
+        destination = os.path.join(self.tmp_location, 'new')
+        os.makedirs(os.path.join(destination, 'models', 'trained'))
+        # A copy that was interrupted before it completed.
+        with open(os.path.join(destination, 'models', 'trained', 'model.h5' + PART_SUFFIX), 'wb') as f:
+            f.write(b'weig')
+        progress = []
+        report = relocate_tree(self.source, destination, progress=lambda done, total: progress.append((done, total)))
+        self.assertRelocated(destination)
+        self.assertRelocated(self.source)
+        self.assertEqual(report.files[COPIED] + report.files[CLONED], len(FILES))
+        self.assertEqual(report.verified, len(FILES))
+        self.assertEqual(progress[-1], (7002, 7002))
+        self.assertFalse(os.path.samefile(os.path.join(self.source, 'save_state.json'),
+                                          os.path.join(destination, 'save_state.json')))
+        self.assertEqual(relocate_tree(self.source, destination).files[SKIPPED], len(FILES))
+        # A complete copy whose content changed is caught by the verification.
+        model = os.path.join(destination, 'models', 'trained', 'model.h5')
+        stat = os.stat(model)
+        with open(model, 'r+b') as f:
+            f.write(b'W')
+        os.utime(model, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        with self.assertRaises(IOError):
+            relocate_tree(self.source, destination)
+
+    def test_kept_source_is_not_linked(self):
+        destination = os.path.join(self.tmp_location, 'linked')
+        os.makedirs(os.path.join(destination, 'models', 'trained'))
+        # A hard link left by a move that was interrupted before the source was removed.
+        name = os.path.join('models', 'trained', 'model.h5')
+        os.link(os.path.join(self.source, name), os.path.join(destination, name))
+        report = relocate_tree(self.source, destination)
+        self.assertEqual(report.files[SKIPPED], 0)
+        self.assertRelocated(destination)
+        self.assertFalse(os.path.samefile(os.path.join(self.source, name), os.path.join(destination, name)))
+
+    def test_moved_source(self):
+        destination = os.path.join(self.tmp_location, 'renamed')
+        self.assertEqual(relocate_tree(self.source, destination, keep_source=False).files[RENAMED], len(FILES))
+        self.assertRelocated(destination)
+        self.assertFalse(os.path.exists(self.source))
+        # A destination with files of its own cannot be renamed over, so the files are hard linked into it.
+        merged = os.path.join(self.tmp_location, 'merged')
+        os.makedirs(merged)
+        with open(os.path.join(merged, 'owm_apikey.txt'), 'w') as f:
+            f.write('key')
+        report = relocate_tree(destination, merged, keep_source=False)
+        self.assertEqual(report.files[LINKED], len(FILES))
+        self.assertEqual(report.bytes_copied, 0)
+        self.assertRelocated(merged)
+        self.assertTrue(os.path.isfile(os.path.join(merged, 'owm_apikey.txt')))
+        self.assertFalse(os.path.exists(destination))
+
+    def test_make_root_directory(self):
+        FolderStructure.ROOT_DIR.set_path(self.source)
+        new_root = os.path.join(self.tmp_location, 'new_root')
+        os.makedirs(new_root)
+        report = pathing.make_root_directory(new_root, keep_old_root=False)
+        self.assertEqual(report.files[RENAMED], len(FILES))
+        self.assertEqual(FolderStructure.ROOT_DIR.get_path(), new_root)
+        # The sub-directories follow the root directory, and the old root is not recreated.
+        for directory in FolderStructure.__members__.values():
+            self.assertTrue(directory.get_path().startswith(new_root))
+            self.assertTrue(os.path.isdir(directory.get_path()))
+        self.assertFalse(os.path.exists(self.source))
+        self.assertRelocated(new_root)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from AIForecast.ui.datatable import TableModel
+
+
+class TestTableModel(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data = pd.DataFrame({
+            'site': ['MLO', 'MLO', None, 'MLO'],
+            'co2_mean': np.array([321.5, np.nan, 323.25, 325.0], dtype=np.float32),
+            'count': [1, 2, 3, 4]
+        }, index=pd.DatetimeIndex(['1969-08-01', '1969-09-01', '1969-10-01', '1969-11-01'], name='date'))
+
+    def test_rows_window(self):
+        model = TableModel(self.data)
+        rows = model.rows(1, 3)
+        self.assertListEqual(rows[0], ['1969-09-01', 'MLO', '', '2'])
+        self.assertListEqual(rows[1], ['1969-10-01', '', '323.25', '3'])
+        self.assertEqual(len(model.rows(3, 100)), 1)
+
+    def test_stats_cached(self):
+        model = TableModel(self.data)
+        stats = model.stats.set_index('column')
+        self.assertEqual(stats.loc['co2_mean', 'min'], np.float32(321.5))
+        self.assertEqual(stats.loc['co2_mean', 'max'], np.float32(325.0))
+        self.assertEqual(stats.loc['co2_mean', 'nulls'], 1)
+        self.assertEqual(stats.loc['count', 'mean'], 2.5)
+        self.assertEqual(stats.loc['site', 'nulls'], 1)
+        self.assertTrue(np.isnan(stats.loc['site', 'mean']))
+        self.assertIs(model.stats, model.stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
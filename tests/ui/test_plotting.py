@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from AIForecast.ui.plotting import minmax_decimate
+
+
+class TestMinMaxDecimate(unittest.TestCase):
+    def test_small_series_unchanged(self):
+        x, y = np.arange(10, dtype=float), np.arange(10, dtype=float)
+        dx, dy = minmax_decimate(x, y, 5)
+        np.testing.assert_array_equal(dx, x)
+        np.testing.assert_array_equal(dy, y)
+
+    def test_extremes_preserved_in_order(self):
+        rng = np.random.default_rng(0)
+        x = np.arange(100_003, dtype=float)
+        y = rng.normal(size=len(x))
+        dx, dy = minmax_decimate(x, y, 700)
+        self.assertLessEqual(len(dy), 2 * 700)
+        self.assertTrue(np.all(np.diff(dx) >= 0))
+        self.assertEqual(dy.max(), y.max())
+        self.assertEqual(dy.min(), y.min())
+
+    def test_nan_buckets_keep_gap(self):
+        x = np.arange(40, dtype=float)
+        y = np.arange(40, dtype=float)
+        y[10:20] = np.nan
+        dx, dy = minmax_decimate(x, y, 4)
+        self.assertTrue(np.isnan(dy[2:4]).all())
+        self.assertFalse(np.isnan(dy[[0, 1, 4, 5, 6, 7]]).any())
+
+
+if __name__ == '__main__':
+    unittest.main()